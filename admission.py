@@ -0,0 +1,173 @@
+"""Token-bucket admission control for questions headed to GROQ.
+
+Only questions that miss every local tier reach the AI tier, and those are
+the ones that cost GROQ quota and can wait 30 seconds. Each one must take a
+token from its client's bucket and from the global bucket; a refused
+question is shed by the chatbot (closest learned/resume match or a fast
+"busy" reply) instead of queuing behind GROQ.
+
+Buckets live in memory per worker by default. With RATE_LIMIT_FILE set,
+workers on one host share them through a small file of fixed slots (slot 0
+is global, clients hash into the rest) updated under an flock, so the
+limits hold for the whole host rather than per worker.
+"""
+import hashlib
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError:  # Windows: per-worker buckets only
+    fcntl = None
+
+# (tokens, last refill as wall-clock seconds) per bucket in the shared file
+SLOT = struct.Struct('<dd')
+
+
+def client_key(forwarded_for, remote_addr):
+    """Rate-limit key for a request.
+
+    Behind one proxy (Render, nginx) the peer address is the proxy, and the
+    rightmost X-Forwarded-For entry is the one it appended; entries further
+    left come from the client and can be forged.
+    """
+    if forwarded_for:
+        hops = [hop.strip() for hop in forwarded_for.split(',') if hop.strip()]
+        if hops:
+            return hops[-1]
+    return remote_addr or 'unknown'
+
+
+def refill(state, now, rate, burst):
+    """Top a [tokens, updated] bucket up for the time since its last refill"""
+    tokens, updated = state
+    if updated <= 0:
+        # Never used (or a zeroed slot in the shared file)
+        tokens = burst
+    else:
+        tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+    state[0], state[1] = tokens, now
+
+
+class AdmissionControl:
+    """Per-client and global token buckets; rates are tokens per second, 0 disables"""
+
+    def __init__(self, client_rate=10 / 60, client_burst=5, global_rate=1.0, global_burst=30,
+                 shared_path=None, client_slots=4096, max_clients=10000):
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.global_rate = global_rate
+        self.global_burst = global_burst
+        self.client_slots = client_slots
+        self.max_clients = max_clients
+
+        self.shared_path = shared_path if shared_path and fcntl else None
+        if shared_path and not fcntl:
+            print("⚠️ File locks unavailable - rate limiting per worker only")
+        self.fd = None
+        self.fd_pid = None
+
+        self.clients = OrderedDict()
+        self.global_state = [0.0, 0.0]
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Build from RATE_LIMIT_* environment overrides (rates per minute)"""
+        return cls(
+            client_rate=float(os.getenv('RATE_LIMIT_CLIENT_PER_MIN', '10')) / 60,
+            client_burst=float(os.getenv('RATE_LIMIT_CLIENT_BURST', '5')),
+            global_rate=float(os.getenv('RATE_LIMIT_GLOBAL_PER_MIN', '60')) / 60,
+            global_burst=float(os.getenv('RATE_LIMIT_GLOBAL_BURST', '30')),
+            shared_path=os.getenv('RATE_LIMIT_FILE') or None,
+        )
+
+    @property
+    def enabled(self):
+        return self.client_rate > 0 or self.global_rate > 0
+
+    # ==================== PUBLIC API ====================
+
+    def admit(self, client):
+        """Take a token for `client`; returns None if admitted, else the refusing bucket ('client' or 'global')"""
+        if not self.enabled:
+            return None
+        now = time.time()
+        if self.shared_path:
+            try:
+                return self.admit_shared(client, now)
+            except OSError as e:
+                print(f"⚠️ Shared rate limit file unavailable, using this worker's buckets: {e}")
+        with self.lock:
+            state = self.clients.get(client)
+            if state is None:
+                state = self.clients[client] = [0.0, 0.0]
+                if len(self.clients) > self.max_clients:
+                    # Forget the least recently seen client; it comes back with a full bucket
+                    self.clients.popitem(last=False)
+            else:
+                self.clients.move_to_end(client)
+            return self.take(state, self.global_state, now)
+
+    def take(self, client_state, global_state, now):
+        """Take one token from both buckets, or from neither"""
+        if self.client_rate > 0:
+            refill(client_state, now, self.client_rate, self.client_burst)
+        if self.global_rate > 0:
+            refill(global_state, now, self.global_rate, self.global_burst)
+        if self.client_rate > 0 and client_state[0] < 1:
+            return 'client'
+        if self.global_rate > 0 and global_state[0] < 1:
+            return 'global'
+        if self.client_rate > 0:
+            client_state[0] -= 1
+        if self.global_rate > 0:
+            global_state[0] -= 1
+        return None
+
+    def stats(self):
+        with self.lock:
+            return {
+                'shared': bool(self.shared_path),
+                'clients': None if self.shared_path else len(self.clients),
+                'global_tokens': None if self.shared_path else round(self.global_state[0], 1),
+            }
+
+    # ==================== SHARED FILE ====================
+
+    def open_shared(self):
+        """This process's handle on the shared file.
+
+        flock belongs to the open file description, so a handle inherited
+        from a preloading gunicorn master would not exclude sibling workers.
+        """
+        pid = os.getpid()
+        if self.fd is None or self.fd_pid != pid:
+            fd = os.open(self.shared_path, os.O_RDWR | os.O_CREAT, 0o600)
+            size = SLOT.size * (self.client_slots + 1)
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self.fd, self.fd_pid = fd, pid
+        return self.fd
+
+    def client_slot(self, client):
+        digest = hashlib.sha1(str(client).encode('utf-8')).digest()
+        return 1 + int.from_bytes(digest[:8], 'little') % self.client_slots
+
+    def admit_shared(self, client, now):
+        fd = self.open_shared()
+        client_offset = self.client_slot(client) * SLOT.size
+        with self.lock:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                global_state = list(SLOT.unpack(os.pread(fd, SLOT.size, 0)))
+                client_state = list(SLOT.unpack(os.pread(fd, SLOT.size, client_offset)))
+                refused = self.take(client_state, global_state, now)
+                os.pwrite(fd, SLOT.pack(*global_state), 0)
+                os.pwrite(fd, SLOT.pack(*client_state), client_offset)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        return refused
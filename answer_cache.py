@@ -0,0 +1,114 @@
+"""In-process cache of AI answers keyed on a normalized question.
+
+Sits in front of the GROQ call so identical or trivially different questions
+("what's your tech stack?" vs "What is your tech stack") don't each trigger
+a fresh model call.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+
+CONTRACTIONS = {
+    "what's": "what is",
+    "who's": "who is",
+    "where's": "where is",
+    "when's": "when is",
+    "how's": "how is",
+    "that's": "that is",
+    "it's": "it is",
+    "you're": "you are",
+    "i'm": "i am",
+    "don't": "do not",
+    "doesn't": "does not",
+    "didn't": "did not",
+    "can't": "cannot",
+    "won't": "will not",
+    "isn't": "is not",
+    "aren't": "are not",
+    "you've": "you have",
+    "i've": "i have",
+}
+
+CONTRACTION_PATTERN = re.compile(r"\b(" + "|".join(re.escape(c) for c in CONTRACTIONS) + r")\b")
+
+
+def normalize_question(question):
+    """Lowercase, expand contractions and strip punctuation/extra spaces"""
+    text = question.lower().replace("’", "'").strip()
+    text = CONTRACTION_PATTERN.sub(lambda m: CONTRACTIONS[m.group(1)], text)
+    text = re.sub(r"[^a-z0-9]+", " ", text)
+    return text.strip()
+
+
+def canonical_question(question):
+    """Lowercase, single-spaced, without trailing ?!. - changes no local answer, unlike normalize_question"""
+    return " ".join(question.lower().split()).rstrip("?!. ")
+
+
+class AnswerCache:
+    """Thread-safe LRU cache with a per-entry TTL and hit/miss counters"""
+
+    def __init__(self, max_size=256, ttl=3600, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, question):
+        """Return the cached answer for a question, or None"""
+        key = normalize_question(question)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            answer, expires_at = entry
+            if self.clock() >= expires_at:
+                del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return answer
+
+    def set(self, question, answer):
+        """Cache an answer, evicting the least recently used entry if full"""
+        key = normalize_question(question)
+        if not key or self.max_size <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (answer, self.clock() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *questions):
+        """Drop cached answers for the given questions"""
+        with self.lock:
+            for question in questions:
+                if question:
+                    self.entries.pop(normalize_question(question), None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        """Counters shown on the admin stats page"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self.entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits / lookups * 100) if lookups else 0.0,
+            }
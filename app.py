@@ -1,9 +1,17 @@
-from flask import Flask, request, jsonify, render_template, redirect, url_for, flash, session
+from flask import Flask, request, jsonify, render_template, redirect, url_for, flash, session, Response, stream_with_context
 from flask_cors import CORS
-from chatbot import chatbot, get_response
+from chatbot import chatbot, get_response, get_response_stream
+from qa_dedupe import qa_id_for
+from admission import client_key
+from answer_cache import canonical_question
+from compiled_resume import ResumeError
+from batch_answers import parse_questions, answer_batch, MAX_CONCURRENCY, MAX_QUESTIONS
 from datetime import datetime
 from functools import wraps
+import json
 import os
+import time
+import zlib
 
 app = Flask(__name__)
 # Configure CORS to allow all origins and methods
@@ -19,6 +27,20 @@ app.secret_key = os.getenv('FLASK_SECRET_KEY', 'chatbot-admin-secret-key-2024')
 # Admin password
 ADMIN_PASSWORD = os.getenv('ADMIN_PASSWORD', 'Adarsh232774')
 
+# Exact match handlers for standard questions (shared with asgi.py)
+HELP_TRIGGERS = ['help', 'what can you do', 'menu', 'options', 'features']
+HELP_MESSAGE = """
+Here's what I can tell you about Adarsh:
+<ul style="text-align: left; display: inline-block; padding-left: 20px;">
+    <li>👨‍💻 <b>Skills</b> (Languages, frameworks, tools)</li>
+    <li>🚀 <b>Projects</b> (Rahify, Student Tracker, etc.)</li>
+    <li>💼 <b>Experience</b> (Quinbay, UTD TA)</li>
+    <li>🎓 <b>Education</b> (MS at UTD, B.Tech at SRMAP)</li>
+    <li>👤 <b>Personal</b> (Interests, contact info, fun facts!)</li>
+</ul>
+What would you like to know?
+        """
+
 # ==================== AUTHENTICATION ====================
 
 def login_required(f):
@@ -59,6 +81,33 @@ def index():
     """Main chat interface"""
     return render_template("index.html")
 
+def wants_stream(data):
+    """Check whether the client opted into a Server-Sent Events response"""
+    return bool(data.get("stream")) or "text/event-stream" in request.headers.get("Accept", "")
+
+def sse_response(chunks, started=None):
+    """Relay text chunks to the client as Server-Sent Events"""
+    def generate():
+        try:
+            for chunk in chunks:
+                yield f"data: {json.dumps({'token': chunk})}\n\n"
+            yield f"event: done\ndata: {json.dumps({'status': 'success'})}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'error': str(e), 'message': 'Failed to generate AI response.'})}\n\n"
+        finally:
+            if started is not None:
+                chatbot.metrics.requests.observe(time.perf_counter() - started, mode='stream')
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def client_id():
+    """Rate-limit key for the current request"""
+    return client_key(request.headers.get("X-Forwarded-For"), request.remote_addr)
+
 @app.route("/api/chat", methods=["POST", "OPTIONS"])
 @app.route("/chat", methods=["POST", "OPTIONS"])
 def chat():
@@ -67,70 +116,162 @@ def chat():
         return "", 200
     data = request.get_json()
     question = data.get("message", data.get("question", ""))
+    stream = wants_stream(data)
     
     if not question:
         return jsonify({"error": "No message provided"}), 400
         
-    # Exact match handlers for standard questions
     user_message_lower = question.lower().strip()
+    started = time.perf_counter()
     
-    if user_message_lower in ['help', 'what can you do', 'menu', 'options', 'features']:
-        help_msg = """
-Here's what I can tell you about Adarsh:
-<ul style="text-align: left; display: inline-block; padding-left: 20px;">
-    <li>👨‍💻 <b>Skills</b> (Languages, frameworks, tools)</li>
-    <li>🚀 <b>Projects</b> (Rahify, Student Tracker, etc.)</li>
-    <li>💼 <b>Experience</b> (Quinbay, UTD TA)</li>
-    <li>🎓 <b>Education</b> (MS at UTD, B.Tech at SRMAP)</li>
-    <li>👤 <b>Personal</b> (Interests, contact info, fun facts!)</li>
-</ul>
-What would you like to know?
-        """
+    if user_message_lower in HELP_TRIGGERS:
+        chatbot.record_answer('help', time.perf_counter() - started)
+        if stream:
+            return sse_response([HELP_MESSAGE], started)
+        chatbot.metrics.requests.observe(time.perf_counter() - started, mode='json')
         return jsonify({
-            "response": help_msg,
+            "response": HELP_MESSAGE,
             "status": "success"
         })
         
+    if stream:
+        return sse_response(get_response_stream(question, client_id()), started)
+        
     try:
-        response = get_response(question)
+        response = get_response(question, client_id())
         return jsonify({"response": response, "status": "success"})
     except Exception as e:
         return jsonify({"error": str(e), "message": "Failed to generate AI response."}), 500
+    finally:
+        chatbot.metrics.requests.observe(time.perf_counter() - started, mode='json')
+
+# ==================== CACHEABLE ANSWERS ====================
+
+# Browser and CDN lifetimes for GET /api/answer; stale copies are served while one revalidates
+ANSWER_MAX_AGE = int(os.getenv('ANSWER_MAX_AGE', '60'))
+ANSWER_EDGE_MAX_AGE = int(os.getenv('ANSWER_EDGE_MAX_AGE', '300'))
+ANSWER_STALE_WHILE_REVALIDATE = int(os.getenv('ANSWER_STALE_WHILE_REVALIDATE', '86400'))
+# Longer questions are never canned answers worth caching
+ANSWER_MAX_LENGTH = 300
+HELP_VERSION = "help"
+
+def answer_cache_control():
+    return (f"public, max-age={ANSWER_MAX_AGE}, s-maxage={ANSWER_EDGE_MAX_AGE}, "
+            f"stale-while-revalidate={ANSWER_STALE_WHILE_REVALIDATE}")
+
+@app.route("/api/answer", methods=["GET"])
+def answer():
+    """Cacheable answer to a question from help, the resume or reviewed learned pairs
+    
+    204 means the question needs the chat route (AI, cached or unreviewed answers)
+    """
+    question = request.args.get("q", "")
+    key = canonical_question(question)
+    if not key:
+        return jsonify({"error": "No question provided"}), 400
+    if key != question:
+        # One URL per question, so the CDN caches each answer once
+        chatbot.metrics.answer_gets.inc(result='redirect')
+        response = redirect(url_for("answer", q=key), code=308)
+        response.headers["Cache-Control"] = f"public, max-age={ANSWER_STALE_WHILE_REVALIDATE}"
+        return response
+    
+    started = time.perf_counter()
+    if key in HELP_TRIGGERS:
+        tier, text, version = 'help', HELP_MESSAGE, HELP_VERSION
+    elif len(key) <= ANSWER_MAX_LENGTH:
+        tier, text, version = chatbot.get_stored_response(key)
+    else:
+        tier, text, version = None, None, None
+    if version is None:
+        chatbot.metrics.answer_gets.inc(result='uncacheable')
+        return "", 204, {"Cache-Control": "no-store"}
+    
+    chatbot.record_answer(tier, time.perf_counter() - started)
+    response = jsonify({"response": text, "tier": tier, "status": "success"})
+    response.headers["Cache-Control"] = answer_cache_control()
+    # Also keyed on the body, so a deploy that rewords a template never reuses an old tag
+    response.set_etag(f"{version}-{zlib.crc32(response.get_data()):08x}")
+    response = response.make_conditional(request)
+    chatbot.metrics.answer_gets.inc(result='not_modified' if response.status_code == 304 else 'ok')
+    chatbot.metrics.requests.observe(time.perf_counter() - started, mode='get')
+    return response
+
+@app.route("/api/batch", methods=["POST"])
+def batch():
+    """Answer a JSONL batch of questions, streaming one JSONL result per question"""
+    # Every batch can fan out to hundreds of GROQ calls, so it is never open
+    token = os.getenv('BATCH_TOKEN')
+    bearer = token and request.headers.get('Authorization') == f"Bearer {token}"
+    if not (bearer or session.get('admin_logged_in')):
+        return jsonify({"error": "Unauthorized"}), 401
+    
+    items = parse_questions(request.get_data().splitlines())
+    if not items:
+        return jsonify({"error": "No questions provided"}), 400
+    if len(items) > MAX_QUESTIONS:
+        return jsonify({"error": f"At most {MAX_QUESTIONS} questions per batch"}), 413
+    concurrency = request.args.get('concurrency', MAX_CONCURRENCY, type=int)
+    
+    def generate():
+        for result in answer_batch(chatbot, items, concurrency):
+            yield json.dumps(result) + "\n"
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.route("/metrics")
+def metrics():
+    """Prometheus scrape endpoint for this worker's metrics"""
+    token = os.getenv('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f"Bearer {token}":
+        return "Unauthorized\n", 401, {"Content-Type": "text/plain"}
+    return Response(chatbot.metrics.render(), mimetype="text/plain; version=0.0.4")
 
 # ==================== ADMIN ROUTES ====================
 
-def handle_firebase_error():
-    """Handle Firebase connection errors"""
-    if not chatbot.firebase_db:
-        return render_template("admin/error.html", error="Firebase not connected")
+def handle_store_error():
+    """Handle a missing learned Q&A store"""
+    if not chatbot.qa_store:
+        return render_template("admin/error.html", error="Firebase not connected (or set QA_STORE=sqlite)")
     return None
 
 @app.route("/admin")
 @login_required
 def admin_dashboard():
-    """Admin dashboard - view all Q&A pairs"""
-    error = handle_firebase_error()
+    """Admin dashboard - one page of Q&A pairs at a time"""
+    error = handle_store_error()
     if error:
         return error
     
+    filters = {
+        'reviewed': request.args.get('reviewed', ''),
+        'source': request.args.get('source', ''),
+        'q': request.args.get('q', '').strip()
+    }
+    
     try:
-        docs = chatbot.firebase_db.collection('learned_qa').stream()
-        qa_pairs = []
-        
-        for doc in docs:
-            data = doc.to_dict()
-            qa_pairs.append({
-                'id': doc.id,
-                'question': data.get('question', ''),
-                'answer': data.get('answer', ''),
-                'ai_generated': data.get('ai_generated', False),
-                'reviewed': data.get('reviewed', False),
-                'created_at': data.get('created_at'),
-                'updated_at': data.get('updated_at')
-            })
-        
-        qa_pairs.sort(key=lambda x: x.get('created_at') or datetime.min, reverse=True)
-        return render_template("admin/dashboard.html", qa_pairs=qa_pairs)
+        page = chatbot.qa_store.page(
+            after=request.args.get('after'),
+            before=request.args.get('before'),
+            reviewed={'yes': True, 'no': False}.get(filters['reviewed']),
+            ai_generated={'ai': True, 'manual': False}.get(filters['source']),
+            prefix=filters['q']
+        )
+        # Keep the active filters on next/prev links, minus empty values
+        link_args = {key: value for key, value in filters.items() if value}
+        return render_template(
+            "admin/dashboard.html",
+            qa_pairs=page['rows'],
+            counts=chatbot.qa_store.counts(),
+            filters=filters,
+            search_hint=chatbot.qa_store.search_hint,
+            next_url=url_for("admin_dashboard", after=page['next_cursor'], **link_args) if page['next_cursor'] else None,
+            prev_url=url_for("admin_dashboard", before=page['prev_cursor'], **link_args) if page['prev_cursor'] else None
+        )
     
     except Exception as e:
         return render_template("admin/error.html", error=f"Error: {str(e)}")
@@ -150,13 +291,13 @@ def admin_add():
         flash("Both question and answer are required!", "error")
         return redirect(url_for("admin_add"))
     
-    error = handle_firebase_error()
+    error = handle_store_error()
     if error:
-        flash("Firebase not connected!", "error")
+        flash("Q&A store not connected!", "error")
         return redirect(url_for("admin_add"))
     
     try:
-        doc_id = question.lower().replace(" ", "_").replace("?", "").replace("!", "")[:50]
+        doc_id = qa_id_for(question)
         qa_data = {
             'question': question,
             'answer': answer,
@@ -166,7 +307,8 @@ def admin_add():
             'updated_at': datetime.now()
         }
         
-        chatbot.firebase_db.collection('learned_qa').document(doc_id).set(qa_data)
+        chatbot.write_qa(doc_id, qa_data)
+        chatbot.record_qa(doc_id, qa_data, replace=True)
         flash("Q&A pair added successfully!", "success")
         return redirect(url_for("admin_dashboard"))
         
@@ -178,7 +320,7 @@ def admin_add():
 @login_required
 def admin_edit(qa_id):
     """Edit existing Q&A pair"""
-    error = handle_firebase_error()
+    error = handle_store_error()
     if error:
         return error
     
@@ -192,12 +334,14 @@ def admin_edit(qa_id):
             return redirect(url_for("admin_edit", qa_id=qa_id))
         
         try:
-            chatbot.firebase_db.collection('learned_qa').document(qa_id).update({
+            updates = {
                 'question': question,
                 'answer': answer,
                 'reviewed': reviewed,
                 'updated_at': datetime.now()
-            })
+            }
+            qa_data = chatbot.write_qa(qa_id, updates, op='update')
+            chatbot.record_qa(qa_id, qa_data, replace=True)
             
             flash("Q&A pair updated successfully!", "success")
             return redirect(url_for("admin_dashboard"))
@@ -208,12 +352,11 @@ def admin_edit(qa_id):
     
     # GET request
     try:
-        doc = chatbot.firebase_db.collection('learned_qa').document(qa_id).get()
-        if not doc.exists:
+        qa_data = chatbot.qa_store.get(qa_id)
+        if qa_data is None:
             return render_template("admin/error.html", error="Q&A pair not found")
         
-        qa_data = doc.to_dict()
-        qa_data['id'] = doc.id
+        qa_data['id'] = qa_id
         return render_template("admin/edit.html", qa=qa_data)
         
     except Exception as e:
@@ -223,13 +366,14 @@ def admin_edit(qa_id):
 @login_required
 def admin_delete(qa_id):
     """Delete Q&A pair"""
-    error = handle_firebase_error()
+    error = handle_store_error()
     if error:
-        flash("Firebase not connected!", "error")
+        flash("Q&A store not connected!", "error")
         return redirect(url_for("admin_dashboard"))
     
     try:
-        chatbot.firebase_db.collection('learned_qa').document(qa_id).delete()
+        chatbot.write_qa(qa_id, op='delete')
+        chatbot.forget_qa(qa_id)
         flash("Q&A pair deleted successfully!", "success")
     except Exception as e:
         flash(f"Error: {str(e)}", "error")
@@ -240,38 +384,84 @@ def admin_delete(qa_id):
 @login_required
 def admin_stats():
     """Statistics dashboard"""
-    error = handle_firebase_error()
+    error = handle_store_error()
     if error:
         return error
     
     try:
-        docs = chatbot.firebase_db.collection('learned_qa').stream()
-        
-        total_qa = 0
-        ai_generated = 0
-        reviewed = 0
-        
-        for doc in docs:
-            data = doc.to_dict()
-            total_qa += 1
-            if data.get('ai_generated', False):
-                ai_generated += 1
-            if data.get('reviewed', False):
-                reviewed += 1
-        
-        stats = {
-            'total_qa': total_qa,
-            'ai_generated': ai_generated,
-            'manual': total_qa - ai_generated,
-            'reviewed': reviewed,
-            'unreviewed': total_qa - reviewed
-        }
-        
-        return render_template("admin/stats.html", stats=stats)
+        return render_template(
+            "admin/stats.html",
+            stats=chatbot.qa_store.counts(),
+            store_label=chatbot.qa_store.label,
+            cache=chatbot.answer_cache.stats(),
+            resume=chatbot.resume_loader.status(),
+            latency=chatbot.latency.summary(),
+            metrics=chatbot.metrics.summary()
+        )
         
     except Exception as e:
         return render_template("admin/error.html", error=f"Error: {str(e)}")
 
+@app.route("/admin/stats/reconcile", methods=["POST"])
+@login_required
+def admin_reconcile_stats():
+    """Recompute the Q&A counters from the store"""
+    error = handle_store_error()
+    if error:
+        flash("Q&A store not connected!", "error")
+        return redirect(url_for("admin_stats"))
+    
+    try:
+        chatbot.qa_store.reconcile()
+        flash(f"Counters recalculated from {chatbot.qa_store.label}!", "success")
+    except Exception as e:
+        flash(f"Error: {str(e)}", "error")
+    
+    return redirect(url_for("admin_stats"))
+
+@app.route("/admin/stats/compact", methods=["POST"])
+@login_required
+def admin_compact():
+    """Merge near-duplicate Q&A pairs into aliases of one canonical pair"""
+    error = handle_store_error()
+    if error:
+        flash("Q&A store not connected!", "error")
+        return redirect(url_for("admin_stats"))
+    
+    try:
+        _, clusters = chatbot.compact_learned_qa()
+        merged = sum(len(ids) for _, ids in clusters)
+        flash(f"Merged {merged} near-duplicate pairs into {len(clusters)} canonical pairs!", "success")
+    except Exception as e:
+        flash(f"Error: {str(e)}", "error")
+    
+    return redirect(url_for("admin_stats"))
+
+@app.route("/admin/resume/reload", methods=["POST"])
+def admin_reload_resume():
+    """Re-read resume.yaml now instead of waiting for the next mtime check"""
+    # Deploy scripts can call this with a token instead of an admin session
+    token = os.getenv('RESUME_RELOAD_TOKEN')
+    bearer = token and request.headers.get('Authorization') == f"Bearer {token}"
+    if not (bearer or session.get('admin_logged_in')):
+        return jsonify({"error": "Unauthorized"}), 401
+    
+    try:
+        compiled, changed = chatbot.reload_resume(force=request.args.get('force') == '1')
+    except ResumeError as e:
+        if bearer:
+            return jsonify({"error": str(e), "resume": chatbot.resume_loader.status()}), 422
+        flash(f"resume.yaml not reloaded, still serving the previous version: {e}", "error")
+        return redirect(url_for("admin_stats"))
+    
+    if bearer:
+        return jsonify({"changed": changed, "resume": chatbot.resume_loader.status()})
+    if changed:
+        flash(f"Loaded resume.yaml version {compiled.version} ({len(compiled.router)} answers)!", "success")
+    else:
+        flash("resume.yaml hasn't changed since it was last loaded.", "success")
+    return redirect(url_for("admin_stats"))
+
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8080))
     app.run(host="0.0.0.0", port=port, debug=True)
\ No newline at end of file
@@ -0,0 +1,159 @@
+"""ASGI entry point that serves /api/chat on an asyncio event loop.
+
+Under gunicorn's sync workers every chat request holds a worker for the whole
+GROQ round trip, so a handful of slow completions queue up the cheap
+help/resume/learned answers behind them. Here the chat routes are handled
+natively: GROQ calls are awaited (llm_client.AsyncGroqClient) and the local
+tiers and Firestore writes run on worker threads. Every other route is the
+unchanged Flask app, bridged through a2wsgi's thread pool.
+
+Run with:
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+or under gunicorn:
+    gunicorn asgi:app -k uvicorn.workers.UvicornWorker
+"""
+import json
+import os
+import time
+
+from a2wsgi import WSGIMiddleware
+
+from admission import client_key
+from app import app as flask_app, HELP_MESSAGE, HELP_TRIGGERS
+from chatbot import chatbot
+
+CHAT_PATHS = ('/api/chat', '/chat')
+# Threads for the bridged Flask routes (admin pages, /metrics, static files)
+WSGI_THREADS = int(os.getenv('ASGI_WSGI_THREADS', '10'))
+
+wsgi_app = WSGIMiddleware(flask_app, workers=WSGI_THREADS)
+
+# ==================== RESPONSES ====================
+
+async def send_json(send, payload, status=200):
+    """Send a complete JSON response"""
+    body = json.dumps(payload).encode()
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode()),
+            (b'access-control-allow-origin', b'*'),
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def send_sse(send, chunks, started):
+    """Relay async text chunks to the client as Server-Sent Events"""
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream; charset=utf-8'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+            (b'access-control-allow-origin', b'*'),
+        ],
+    })
+
+    async def event(text):
+        await send({'type': 'http.response.body', 'body': text.encode(), 'more_body': True})
+
+    try:
+        async for chunk in chunks:
+            await event(f"data: {json.dumps({'token': chunk})}\n\n")
+        await event(f"event: done\ndata: {json.dumps({'status': 'success'})}\n\n")
+    except OSError:
+        # Client went away mid-stream
+        return
+    except Exception as e:
+        await event(f"event: error\ndata: {json.dumps({'error': str(e), 'message': 'Failed to generate AI response.'})}\n\n")
+    finally:
+        chatbot.metrics.requests.observe(time.perf_counter() - started, mode='stream')
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def single_chunk(text):
+    yield text
+
+# ==================== CHAT ROUTE ====================
+
+async def read_body(receive):
+    """Read the full request body"""
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+async def chat(scope, receive, send):
+    """Async twin of app.chat with the same request and response formats"""
+    try:
+        data = json.loads(await read_body(receive) or b'{}')
+    except ValueError:
+        await send_json(send, {"error": "Invalid JSON body"}, 400)
+        return
+    if not isinstance(data, dict):
+        data = {}
+
+    question = data.get("message", data.get("question", ""))
+    headers = dict(scope['headers'])
+    stream = bool(data.get("stream")) or "text/event-stream" in headers.get(b'accept', b'').decode('latin-1')
+
+    if not question:
+        await send_json(send, {"error": "No message provided"}, 400)
+        return
+
+    peer = scope.get('client')
+    client = client_key(headers.get(b'x-forwarded-for', b'').decode('latin-1'), peer[0] if peer else None)
+
+    started = time.perf_counter()
+    if question.lower().strip() in HELP_TRIGGERS:
+        chatbot.record_answer('help', time.perf_counter() - started)
+        if stream:
+            await send_sse(send, single_chunk(HELP_MESSAGE), started)
+            return
+        chatbot.metrics.requests.observe(time.perf_counter() - started, mode='json')
+        await send_json(send, {"response": HELP_MESSAGE, "status": "success"})
+        return
+
+    if stream:
+        await send_sse(send, chatbot.get_response_stream_async(question, client), started)
+        return
+
+    try:
+        response = await chatbot.get_response_async(question, client)
+        payload, status = {"response": response, "status": "success"}, 200
+    except Exception as e:
+        payload, status = {"error": str(e), "message": "Failed to generate AI response."}, 500
+    finally:
+        chatbot.metrics.requests.observe(time.perf_counter() - started, mode='json')
+    await send_json(send, payload, status)
+
+# ==================== APPLICATION ====================
+
+async def lifespan(receive, send):
+    """Close the pooled GROQ connections on shutdown"""
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            print("⚡ Async chat routes ready")
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if chatbot.async_llm:
+                await chatbot.async_llm.close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+    elif scope['type'] == 'http' and scope['method'] == 'POST' and scope['path'] in CHAT_PATHS:
+        await chat(scope, receive, send)
+    else:
+        await wsgi_app(scope, receive, send)
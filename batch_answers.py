@@ -0,0 +1,164 @@
+"""Answer a batch of questions with concurrent GROQ fan-out.
+
+Used to pre-populate learned_qa and to re-check answer quality after
+editing resume.yaml. Each question goes through the normal local tiers
+(learned, resume, cache) in order; the misses are sent to GROQ on a bounded
+thread pool, and the new answers are saved with grouped Firestore commits
+instead of one write per answer. Results come back one JSON object per
+question, in completion order, tagged with the question's index.
+
+Served by POST /api/batch and runnable from the command line:
+
+    python batch_answers.py questions.jsonl -o answers.jsonl --concurrency 8
+    python batch_answers.py questions.jsonl --url https://host --token $BATCH_TOKEN
+
+Input lines are {"question": "...", "id": "optional"} objects (a "message"
+key or a bare JSON string also works).
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from answer_cache import normalize_question
+
+MAX_CONCURRENCY = int(os.getenv('BATCH_MAX_CONCURRENCY', '8'))
+MAX_QUESTIONS = int(os.getenv('BATCH_MAX_QUESTIONS', '1000'))
+# Answers saved per grouped Firestore commit
+COMMIT_SIZE = 100
+
+
+def parse_questions(lines):
+    """[{index, id, question} or {index, error}] from JSONL lines"""
+    items = []
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if not line:
+            continue
+        item = {'index': len(items)}
+        try:
+            data = json.loads(line)
+        except ValueError:
+            items.append(dict(item, error="Invalid JSON line"))
+            continue
+        if isinstance(data, str):
+            data = {'question': data}
+        question = data.get('question', data.get('message', '')) if isinstance(data, dict) else ''
+        if not isinstance(question, str) or not question.strip():
+            items.append(dict(item, error="No question provided"))
+            continue
+        if data.get('id') is not None:
+            item['id'] = data['id']
+        items.append(dict(item, question=question.strip()))
+    return items
+
+
+def answer_batch(bot, items, concurrency=MAX_CONCURRENCY, commit_size=COMMIT_SIZE):
+    """Yield one result dict per item as answers become available"""
+    concurrency = max(1, min(concurrency, MAX_CONCURRENCY))
+    misses = []
+
+    for item in items:
+        if 'error' in item:
+            yield item
+            continue
+        started = time.perf_counter()
+        tier, response = bot.get_local_response(item['question'])
+        if response is None:
+            misses.append((item, started))
+            continue
+        seconds = time.perf_counter() - started
+        bot.record_answer(tier, seconds)
+        yield dict(item, tier=tier, response=response, ms=round(seconds * 1000, 1))
+
+    if not misses:
+        return
+
+    # Repeats of a question share one GROQ call and one save
+    groups = {}
+    for item, started in misses:
+        groups.setdefault(normalize_question(item['question']), []).append((item, started))
+
+    pending = []
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch-ai")
+    try:
+        futures = {executor.submit(bot.coalesced_ai_response, group[0][0]['question']): group
+                   for group in groups.values()}
+        for future in as_completed(futures):
+            group = futures[future]
+            ai_response, fresh = future.result()
+            if fresh:
+                pending.append((group[0][0]['question'], ai_response))
+            if len(pending) >= commit_size:
+                bot.save_learned_qa_batch(pending)
+                pending = []
+            for item, started in group:
+                seconds = time.perf_counter() - started
+                bot.record_answer('ai', seconds)
+                yield dict(item, tier='ai', response=ai_response + bot.ai_note(), ms=round(seconds * 1000, 1))
+    finally:
+        # Also runs when the client goes away mid-stream
+        executor.shutdown(wait=True, cancel_futures=True)
+        if pending:
+            bot.save_learned_qa_batch(pending)
+
+
+def post_batch(url, token, lines, concurrency):
+    """Yield result dicts streamed back from a deployed /api/batch"""
+    import requests
+
+    headers = {'Content-Type': 'application/x-ndjson'}
+    if token:
+        headers['Authorization'] = f"Bearer {token}"
+    response = requests.post(f"{url.rstrip('/')}/api/batch", params={'concurrency': concurrency},
+                             data="".join(lines).encode('utf-8'), headers=headers, stream=True, timeout=600)
+    response.raise_for_status()
+    for line in response.iter_lines(decode_unicode=True):
+        if line:
+            yield json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('questions', help="JSONL file of questions ('-' for stdin)")
+    parser.add_argument('-o', '--output', help="write results here instead of stdout")
+    parser.add_argument('--concurrency', type=int, default=MAX_CONCURRENCY, help="parallel GROQ calls")
+    parser.add_argument('--url', help="send to a deployed app's /api/batch instead of answering locally")
+    parser.add_argument('--token', default=os.getenv('BATCH_TOKEN'), help="bearer token for --url")
+    args = parser.parse_args()
+
+    source = sys.stdin if args.questions == '-' else open(args.questions, encoding='utf-8')
+    with source:
+        lines = source.readlines()
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    counts = {}
+    started = time.perf_counter()
+    # The chatbot logs with print(); keep stdout for results
+    with contextlib.redirect_stdout(sys.stderr):
+        if args.url:
+            results = post_batch(args.url, args.token, lines, args.concurrency)
+        else:
+            from chatbot import chatbot
+            results = answer_batch(chatbot, parse_questions(lines), args.concurrency)
+        try:
+            for result in results:
+                output.write(json.dumps(result) + "\n")
+                output.flush()
+                tier = result.get('tier', 'error')
+                counts[tier] = counts.get(tier, 0) + 1
+        finally:
+            if args.output:
+                output.close()
+    summary = ", ".join(f"{tier} {count}" for tier, count in sorted(counts.items()))
+    print(f"✅ Answered {sum(counts.values())} questions in {time.perf_counter() - started:.1f}s ({summary})",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""Concurrency load test: gunicorn sync workers vs the asyncio entry point.
+
+Starts the same app twice under gunicorn - sync workers serving app:app and
+uvicorn workers serving asgi:app - against a slow groq_stub.py and an
+in-memory Firestore. At each concurrency level, that many clients keep asking
+fresh AI questions while a few probe clients ask cheap questions (help menu,
+resume keywords, learned matches). It reports AI throughput and the latency
+of the cheap tiers, which is what a visitor notices when GROQ is slow.
+
+Usage:
+    python bench_async.py                                   # 8 / 32 / 128 clients
+    python bench_async.py --concurrency 16 64 --groq-latency 2 --duration 20
+    python bench_async.py --modes async --stream
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+from groq_stub import GroqStub
+from metrics import percentile
+
+MODES = {
+    'sync': ('app:app', 'sync'),
+    'async': ('asgi:app', 'uvicorn.workers.UvicornWorker'),
+}
+CHEAP_TIERS = ('help', 'resume', 'learned')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+# ==================== SERVER (child process) ====================
+
+def serve(mode, port, workers, pairs, firestore_latency):
+    """Seed the chatbot, then run gunicorn with preload so every worker shares it"""
+    from gunicorn.app.base import BaseApplication
+    from bench_chat import prepare
+    from chatbot import chatbot
+
+    target, worker_class = MODES[mode]
+    module, name = target.split(':')
+    application = getattr(__import__(module), name)
+    prepare(chatbot, pairs, firestore_latency)
+
+    class Server(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f'127.0.0.1:{port}')
+            self.cfg.set('workers', workers)
+            self.cfg.set('worker_class', worker_class)
+            self.cfg.set('preload_app', True)
+            self.cfg.set('timeout', 300)
+            # Longer than any wait in the load generator's connection pool
+            self.cfg.set('keepalive', 75)
+            self.cfg.set('loglevel', 'warning')
+
+        def load(self):
+            return application
+
+    Server().run()
+
+# ==================== LOAD (parent process) ====================
+
+def cheap_questions(pairs):
+    from bench_chat import HELP_QUESTIONS, RESUME_QUESTIONS, learned_question
+    return {
+        'help': HELP_QUESTIONS,
+        'resume': RESUME_QUESTIONS,
+        'learned': [learned_question(i) for i in range(0, pairs, max(1, pairs // 50))],
+    }
+
+
+def ai_questions(seed):
+    """Endless unique questions that miss every local tier"""
+    import yaml
+    from bench_chat import VOCABULARY
+    from intent_router import IntentRouter
+
+    with open(os.getenv('RESUME_PATH', 'resume.yaml')) as file:
+        router = IntentRouter(yaml.safe_load(file))
+    rng = random.Random(seed)
+    for n in itertools.count():
+        question = ' '.join(rng.sample(VOCABULARY, 6)) + f' {n}?'
+        if not router.answer(question):
+            yield question
+
+
+async def ask(client, url, question, stream):
+    started = time.perf_counter()
+    async with client.stream('POST', url, json={'message': question, 'stream': stream}) as response:
+        async for _ in response.aiter_bytes():
+            pass
+    if response.status_code != 200:
+        raise RuntimeError(f"{response.status_code}")
+    return time.perf_counter() - started
+
+
+async def run_level(base_url, concurrency, args, questions, probes):
+    """Hold `concurrency` AI clients busy for --duration while probing cheap tiers"""
+    import httpx
+
+    url = base_url + '/api/chat'
+    ai_latencies = []
+    cheap_latencies = {tier: [] for tier in CHEAP_TIERS}
+    errors = []
+    rng = random.Random(args.seed)
+    deadline = time.monotonic() + args.duration
+
+    async def ai_client(client):
+        while time.monotonic() < deadline:
+            try:
+                ai_latencies.append(await ask(client, url, next(questions), args.stream))
+            except Exception as e:
+                errors.append(e)
+
+    async def probe_client(client):
+        while time.monotonic() < deadline:
+            tier = rng.choice(CHEAP_TIERS)
+            try:
+                cheap_latencies[tier].append(await ask(client, url, rng.choice(probes[tier]), args.stream))
+            except Exception as e:
+                errors.append(e)
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(timeout=300, limits=limits) as client:
+        started = time.monotonic()
+        await asyncio.gather(*[ai_client(client) for _ in range(concurrency)],
+                             *[probe_client(client) for _ in range(args.probes)])
+        elapsed = time.monotonic() - started
+
+    cheap = sorted(itertools.chain(*cheap_latencies.values()))
+    ai_latencies.sort()
+    return {
+        'ai_rps': len(ai_latencies) / elapsed,
+        'ai_p50_ms': percentile(ai_latencies, 50) * 1000 if ai_latencies else None,
+        'cheap_count': len(cheap),
+        'cheap_p50_ms': percentile(cheap, 50) * 1000 if cheap else None,
+        'cheap_p95_ms': percentile(cheap, 95) * 1000 if cheap else None,
+        'cheap_p99_ms': percentile(cheap, 99) * 1000 if cheap else None,
+        'errors': len(errors),
+    }
+
+
+def wait_until_up(base_url, server, timeout=60):
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"server exited with code {server.returncode}")
+        try:
+            if httpx.post(base_url + '/api/chat', json={'message': 'help'}).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def run_mode(mode, stub, args):
+    port = free_port()
+    env = dict(os.environ, GROQ_API_URL=stub.url, GROQ_API_KEY='bench', GROQ_MAX_RETRIES='0',
+               GROQ_TIMEOUT='300', QA_SYNC_MODE='off', QA_WRITE_BEHIND='false',
+               RATE_LIMIT_CLIENT_PER_MIN='0', RATE_LIMIT_GLOBAL_PER_MIN='0')
+    env.pop('STARTUP_SNAPSHOT_PATH', None)
+    command = [sys.executable, __file__, '--serve', mode, '--port', str(port), '--workers', str(args.workers),
+               '--pairs', str(args.pairs), '--firestore-latency', str(args.firestore_latency)]
+    output = None if args.verbose else subprocess.DEVNULL
+    server = subprocess.Popen(command, env=env, stdout=output, stderr=output)
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        wait_until_up(base_url, server)
+        questions = ai_questions(args.seed)
+        probes = cheap_questions(args.pairs)
+        return [(level, asyncio.run(run_level(base_url, level, args, questions, probes)))
+                for level in args.concurrency]
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def fmt(value):
+    return f"{value:>9.1f}" if value is not None else f"{'-':>9}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[8, 32, 128],
+                        help="concurrent AI clients per level")
+    parser.add_argument('--probes', type=int, default=4, help="concurrent cheap-tier clients")
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds per level")
+    parser.add_argument('--workers', type=int, default=4, help="gunicorn workers in both modes")
+    parser.add_argument('--pairs', type=int, default=1000, help="learned Q&A pairs")
+    parser.add_argument('--groq-latency', type=float, default=1.0, help="stub seconds per completion")
+    parser.add_argument('--token-delay', type=float, default=0.0, help="stub seconds between streamed tokens")
+    parser.add_argument('--firestore-latency', type=float, default=0.02, help="fake Firestore seconds per RPC")
+    parser.add_argument('--stream', action='store_true', help="ask for SSE responses")
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--verbose', action='store_true', help="show server output")
+    parser.add_argument('--serve', choices=list(MODES), help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.workers, args.pairs, args.firestore_latency)
+        return
+
+    stub = GroqStub(latency=args.groq_latency, token_delay=args.token_delay).start()
+    try:
+        print(f"\n⚡ {args.workers} workers, GROQ {args.groq_latency:g}s per completion, "
+              f"{args.probes} cheap-tier probes, {args.duration:g}s per level")
+        print(f"{'mode':<6} {'clients':>7} {'ai req/s':>9} {'ai p50':>9} {'cheap n':>8} "
+              f"{'cheap p50':>9} {'cheap p95':>9} {'cheap p99':>9} {'errors':>7}")
+        for mode in args.modes:
+            for level, result in run_mode(mode, stub, args):
+                print(f"{mode:<6} {level:>7} {result['ai_rps']:>9.1f} {fmt(result['ai_p50_ms'])} "
+                      f"{result['cheap_count']:>8} {fmt(result['cheap_p50_ms'])} {fmt(result['cheap_p95_ms'])} "
+                      f"{fmt(result['cheap_p99_ms'])} {result['errors']:>7}")
+        print("(latencies in ms)")
+    finally:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
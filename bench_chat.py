@@ -0,0 +1,318 @@
+"""Offline load test for the /api/chat pipeline.
+
+Drives the Flask app through its test client with a realistic question mix
+(help menu, resume keywords, learned matches and AI misses) while GROQ is
+served by groq_stub.py and Firestore by fake_firestore.py, so it needs no
+network or credentials. For each learned_qa size it reports throughput and
+p50/p95/p99 latency per answer tier.
+
+Usage:
+    python bench_chat.py                             # 100 / 1k / 10k / 50k pairs
+    python bench_chat.py --sizes 100 1000 --requests 500 --stream
+    python bench_chat.py --save-baseline             # writes bench_baseline.json
+    python bench_chat.py --compare                   # exit 1 on p95 regressions
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from fake_firestore import FakeFirestore
+from groq_stub import GroqStub
+from metrics import percentile
+from qa_store import FirestoreStore
+
+BASELINE_PATH = 'bench_baseline.json'
+MIX = (('help', 0.1), ('resume', 0.3), ('learned', 0.4), ('ai', 0.2))
+
+HELP_QUESTIONS = ['help', 'menu', 'what can you do', 'options', 'features']
+RESUME_QUESTIONS = [
+    'what are your skills', 'tell me about your experience', 'what projects have you built',
+    'what is your favorite food', 'do you know python', 'tell me about rahify',
+    'how can I contact you', 'what are your hobbies', 'education?', 'do you have pets',
+    'are you open to relocation', 'have you used docker', 'when is your birthday',
+]
+STEMS = [
+    'what did you learn about', 'how would you explain', 'what is your take on', 'have you worked with',
+    'tell me something about', 'why do people ask about', 'how long did it take to build', 'any advice on',
+]
+SYLLABLES = ['ka', 'lo', 'mi', 'ren', 'tus', 'vo', 'zan', 'pel', 'dri', 'qua', 'sho', 'nim', 'bex', 'tor', 'gal', 'fin']
+# Ordinary words that hit no resume intent, so random phrases fall through to the AI
+VOCABULARY = [
+    'harbor', 'violin', 'glacier', 'pumpkin', 'lantern', 'meadow', 'compass', 'falcon', 'velvet',
+    'orchard', 'thunder', 'pebble', 'canyon', 'saffron', 'quartz', 'willow', 'marble', 'ember',
+    'nectar', 'tundra', 'gazebo', 'walnut', 'origami', 'sourdough', 'trombone', 'kayak', 'lilac',
+    'sundial', 'tapestry', 'mosaic', 'igloo', 'plankton', 'cobalt', 'bramble', 'juniper', 'lagoon',
+    'minaret', 'nutmeg', 'oasis', 'parsley', 'quiver', 'riddle', 'sequoia', 'thimble', 'umbrella',
+    'vortex', 'wombat', 'yodel', 'zephyr', 'anchor', 'biscuit', 'cactus', 'dolphin', 'easel',
+]
+
+
+def pseudo_word(n):
+    """Deterministic made-up word, so learned questions are distinct but realistic in length"""
+    word = ''
+    for _ in range(3):
+        word += SYLLABLES[n % len(SYLLABLES)]
+        n //= len(SYLLABLES)
+    return word
+
+
+def learned_question(i):
+    words = ' '.join(pseudo_word(i * 7919 + k * 104729) for k in range(3))
+    return f"{STEMS[i % len(STEMS)]} {words} {i}"
+
+
+def learned_pairs(count):
+    base = datetime(2024, 1, 1)
+    return {
+        f"bench_{i}": {
+            'question': learned_question(i),
+            'answer': f"Benchmark answer {i}.",
+            'ai_generated': i % 3 == 0,
+            'reviewed': i % 4 == 0,
+            'created_at': base + timedelta(minutes=i),
+            'updated_at': base + timedelta(minutes=i),
+        }
+        for i in range(count)
+    }
+
+
+def question_mix(requests, size, seed, router):
+    """Deterministic list of (tier, question) pairs"""
+    rng = random.Random(seed)
+    tiers = [tier for tier, _ in MIX]
+    weights = [weight for _, weight in MIX]
+    questions = []
+    for _ in range(requests):
+        tier = rng.choices(tiers, weights)[0]
+        if tier == 'help':
+            question = rng.choice(HELP_QUESTIONS)
+        elif tier == 'resume':
+            question = rng.choice(RESUME_QUESTIONS)
+        elif tier == 'learned':
+            question = learned_question(rng.randrange(size))
+            if rng.random() < 0.3:
+                # Near misses still have to clear the fuzzy threshold
+                question = question.capitalize() + '?'
+        else:
+            question = ' '.join(rng.sample(VOCABULARY, 6)) + '?'
+            while router.answer(question):
+                question = ' '.join(rng.sample(VOCABULARY, 6)) + '?'
+        questions.append((tier, question))
+    return questions
+
+
+def prepare(bot, size, firestore_latency):
+    """Point the chatbot at a fresh fake Firestore seeded with `size` pairs"""
+    from metrics import LatencyRecorder
+
+    if bot.qa_writer:
+        bot.qa_writer.stop()
+    pairs = learned_pairs(size)
+    db = FakeFirestore(latency=firestore_latency)
+    db.load('learned_qa', pairs)
+    bot.qa_store = FirestoreStore(db)
+    bot.apply_learned_qa(pairs)
+    bot.qa_writer = bot.init_qa_writer()
+    bot.answer_cache.clear()
+    bot.latency = LatencyRecorder()
+
+
+def ask(client, question, stream):
+    """POST one question; returns (total seconds, seconds to first chunk)"""
+    started = time.perf_counter()
+    response = client.post('/api/chat', json={'message': question, 'stream': stream}, buffered=False)
+    first = None
+    for _ in response.response:
+        if first is None:
+            first = time.perf_counter() - started
+    response.close()
+    if response.status_code != 200:
+        raise RuntimeError(f"/api/chat returned {response.status_code} for {question!r}")
+    return time.perf_counter() - started, first
+
+
+def run_size(app, bot, size, args):
+    prepare(bot, size, args.firestore_latency)
+    questions = question_mix(args.requests, size, args.seed + size, bot.intent_router)
+
+    # Warm caches and connections outside the measured window
+    warmup = app.test_client()
+    for tier, question in question_mix(20, size, args.seed - 1, bot.intent_router):
+        if tier != 'ai':
+            ask(warmup, question, args.stream)
+    bot.latency = type(bot.latency)()
+
+    samples = {tier: [] for tier, _ in MIX}
+    firsts = {tier: [] for tier, _ in MIX}
+    local = threading.local()
+
+    def run(item):
+        tier, question = item
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        total, first = ask(local.client, question, args.stream)
+        return tier, total, first
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for tier, total, first in pool.map(run, questions):
+            samples[tier].append(total)
+            if first is not None:
+                firsts[tier].append(first)
+    elapsed = time.perf_counter() - started
+    if bot.qa_writer:
+        bot.qa_writer.flush()
+
+    tiers = {}
+    for tier, values in samples.items():
+        values.sort()
+        firsts[tier].sort()
+        tiers[tier] = {
+            'count': len(values),
+            'p50': ms(percentile(values, 50)),
+            'p95': ms(percentile(values, 95)),
+            'p99': ms(percentile(values, 99)),
+            'first_p50': ms(percentile(firsts[tier], 50)),
+        }
+
+    # The server records which tier actually answered; flag questions that strayed
+    served = {tier: summary['count'] for tier, summary in bot.latency.summary().items()}
+    strays = sum(abs(served.get(tier, 0) - tiers[tier]['count']) for tier in tiers) // 2
+    return {
+        'pairs': size,
+        'requests': len(questions),
+        'throughput': round(len(questions) / elapsed, 1),
+        'mismatched_tiers': strays,
+        'tiers': tiers,
+    }
+
+
+def ms(seconds):
+    return round(seconds * 1000, 3) if seconds is not None else None
+
+
+def print_result(result, stream):
+    print(f"\n📊 {result['pairs']} learned pairs: {result['requests']} requests, "
+          f"{result['throughput']} req/s")
+    header = f"   {'tier':<8} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    print(header + (f" {'first p50':>10}" if stream else ""))
+    for tier, summary in result['tiers'].items():
+        if not summary['count']:
+            continue
+        line = (f"   {tier:<8} {summary['count']:>6} {summary['p50']:>9.2f} "
+                f"{summary['p95']:>9.2f} {summary['p99']:>9.2f}")
+        if stream:
+            line += f" {summary['first_p50'] or 0:>10.2f}"
+        print(line)
+    if result['mismatched_tiers']:
+        print(f"   ⚠️ {result['mismatched_tiers']} question(s) were answered by a different tier than intended")
+
+
+def compare(results, baseline, tolerance, floor_ms):
+    """Return regression messages for p95 latencies and throughput"""
+    regressions = []
+    for size, result in results.items():
+        base = baseline.get('results', {}).get(size)
+        if not base:
+            continue
+        if result['throughput'] < base['throughput'] / (1 + tolerance):
+            regressions.append(f"{size} pairs: throughput {result['throughput']} req/s "
+                               f"vs baseline {base['throughput']}")
+        for tier, summary in result['tiers'].items():
+            before = base['tiers'].get(tier, {}).get('p95')
+            now = summary['p95']
+            if before is None or now is None:
+                continue
+            if now > before * (1 + tolerance) and now - before > floor_ms:
+                regressions.append(f"{size} pairs / {tier}: p95 {now:.2f}ms vs baseline {before:.2f}ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000, 50000])
+    parser.add_argument('--requests', type=int, default=500, help="measured requests per size")
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--stream', action='store_true', help="use the SSE variant of /api/chat")
+    parser.add_argument('--groq-latency', type=float, default=0.02, help="stub seconds per completion")
+    parser.add_argument('--token-delay', type=float, default=0.0, help="stub seconds between streamed tokens")
+    parser.add_argument('--firestore-latency', type=float, default=0.0, help="fake seconds per Firestore RPC")
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--compare', action='store_true', help="compare against the saved baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument('--floor-ms', type=float, default=1.0, help="ignore p95 changes smaller than this")
+    parser.add_argument('--verbose', action='store_true', help="keep the app's own log output")
+    args = parser.parse_args()
+
+    stub = GroqStub(latency=args.groq_latency, token_delay=args.token_delay).start()
+    os.environ.update({
+        'GROQ_API_URL': stub.url,
+        'GROQ_API_KEY': 'bench',
+        'QA_SYNC_MODE': 'off',
+        'QA_WRITE_BEHIND': 'true',
+        # Every request comes from one address; measure the tiers, not the limiter
+        'RATE_LIMIT_CLIENT_PER_MIN': '0',
+        'RATE_LIMIT_GLOBAL_PER_MIN': '0',
+    })
+    os.environ.pop('STARTUP_SNAPSHOT_PATH', None)
+
+    from app import app
+    from chatbot import chatbot
+
+    results = {}
+    try:
+        for size in args.sizes:
+            # The app logs every answer; printing that would dominate the timings
+            with open(os.devnull, 'w') as devnull:
+                quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(devnull)
+                with quiet:
+                    result = run_size(app, chatbot, size, args)
+            results[str(size)] = result
+            print_result(result, args.stream)
+    finally:
+        if chatbot.qa_writer:
+            chatbot.qa_writer.stop()
+        stub.stop()
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'settings': {key: getattr(args, key) for key in
+                     ('requests', 'concurrency', 'stream', 'groq_latency', 'token_delay', 'firestore_latency', 'seed')},
+        'results': results,
+    }
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f"\n💾 Saved baseline to {args.baseline}")
+
+    if args.compare:
+        try:
+            with open(args.baseline) as file:
+                baseline = json.load(file)
+        except FileNotFoundError:
+            print(f"\n⚠️ No baseline at {args.baseline}; run with --save-baseline first")
+            sys.exit(2)
+        if baseline.get('settings') != report['settings']:
+            print(f"\n⚠️ Baseline was recorded with different settings: {baseline.get('settings')}")
+        regressions = compare(results, baseline, args.tolerance, args.floor_ms)
+        if regressions:
+            print("\n❌ Regressions against baseline:")
+            for message in regressions:
+                print(f"   - {message}")
+            sys.exit(1)
+        print("\n✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
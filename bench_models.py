@@ -0,0 +1,92 @@
+"""AI-tier latency with and without model routing and hedging.
+
+Answers a mix of AI questions (short facts, open-ended questions, tasks)
+through chatbot.get_response while groq_stub.py serves both models:
+
+- fast:  --fast-latency seconds per completion
+- large: --large-latency seconds, except --tail of calls take --tail-latency
+         (the slow completions that set p95 today)
+
+Scenarios:
+- large:  every question goes to the large model, no hedging (the old behaviour)
+- routed: ModelRouter picks the model; the large one is hedged after --budget
+
+Usage:
+    python bench_models.py --questions 200
+    python bench_models.py --large-latency 1.2 --tail-latency 8 --budget 4 --questions 40
+"""
+import argparse
+import contextlib
+import io
+import random
+import statistics
+import time
+
+from groq_stub import GroqStub
+from llm_client import GroqClient
+from metrics import percentile
+from model_router import FAST_MODEL, LARGE_MODEL, ModelRouter
+
+QUESTIONS = [
+    "do you like cricket?", "what's your favorite color and why?", "tell me a joke",
+    "what is the capital of france?", "how did you build rahify and what was hardest?",
+    "what did you do at quinbay day to day?", "any advice for a new grad?",
+    "which harbor lantern compass would you pick for a long trip?",
+    "how would you design a scalable chat system for millions of users?",
+    "write a python function to reverse a linked list",
+    "can you explain how you would cache answers in a chatbot like this one?",
+    "what is your take on remote work versus working in an office these days?",
+]
+
+
+def run(scenario, args, stub):
+    from chatbot import chatbot
+
+    rng = random.Random(args.seed)
+    stub.models = {
+        FAST_MODEL: {'latency': args.fast_latency},
+        LARGE_MODEL: {'latency': lambda: args.tail_latency if rng.random() < args.tail else args.large_latency},
+    }
+    chatbot.llm = GroqClient('bench-key', base_url=stub.url, max_retries=0)
+    chatbot.models = ModelRouter(mode='large' if scenario == 'large' else 'auto',
+                                 latency_budget=0 if scenario == 'large' else args.budget,
+                                 metrics=chatbot.metrics)
+    stub.requests.clear()
+    latencies = []
+    for i in range(args.questions):
+        question = QUESTIONS[i % len(QUESTIONS)]
+        chatbot.answer_cache.clear()
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            chatbot.get_response(question)
+        latencies.append(time.perf_counter() - started)
+    # Let the losing hedged calls finish before the next scenario
+    time.sleep(args.tail_latency)
+    fast = sum(1 for request in stub.requests if request.get('model') == FAST_MODEL)
+    return sorted(latencies), fast, len(stub.requests)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--questions', type=int, default=120)
+    parser.add_argument('--fast-latency', type=float, default=0.03)
+    parser.add_argument('--large-latency', type=float, default=0.12)
+    parser.add_argument('--tail', type=float, default=0.1, help="share of large-model calls that are slow")
+    parser.add_argument('--tail-latency', type=float, default=0.8)
+    parser.add_argument('--budget', type=float, default=0.3, help="seconds before the large model is hedged")
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"\n🔀 {args.questions} AI questions · fast {args.fast_latency}s · large {args.large_latency}s "
+          f"({args.tail:.0%} at {args.tail_latency}s) · budget {args.budget}s")
+    print(f"{'scenario':<8} {'p50':>8} {'p95':>8} {'p99':>8} {'mean':>8}  calls (fast)")
+    with GroqStub() as stub:
+        for scenario in ('large', 'routed'):
+            latencies, fast, calls = run(scenario, args, stub)
+            p50, p95, p99 = (percentile(latencies, pct) * 1000 for pct in (50, 95, 99))
+            print(f"{scenario:<8} {p50:>6.0f}ms {p95:>6.0f}ms {p99:>6.0f}ms "
+                  f"{statistics.mean(latencies) * 1000:>6.0f}ms  {calls} ({fast})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Memory per learned pair and scan time: store dicts vs QARecord.
+
+Builds --pairs pairs shaped like Firestore's to_dict() (aware timestamps,
+two flags) once as plain dicts and once as QARecords, and reports the bytes
+each form adds per pair. The question and answer strings are created up
+front and shared by both, so they are not counted; the record's lowered
+question is. The scan is a substring check over every question, lowering
+each one for the dicts (what search_learned_qa used to do) and reading
+the precomputed text for the records.
+
+Usage:
+    python bench_records.py --pairs 20000
+"""
+import argparse
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from qa_record import QARecord
+
+
+def pair_factory(count):
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    questions = [f"What did you build with Tool {i} at Company {i % 97}?" for i in range(count)]
+    answers = [f"I used Tool {i} for a dashboard." for i in range(count)]
+    return lambda i: {
+        'question': questions[i],
+        'answer': answers[i],
+        'ai_generated': i % 3 == 0,
+        'reviewed': i % 4 == 0,
+        'created_at': base + timedelta(minutes=i),
+        'updated_at': base + timedelta(minutes=i, seconds=30),
+    }
+
+
+def measure(count):
+    """{form: (bytes per pair, scan ms)}"""
+    pair = pair_factory(count)
+    results = {}
+    for name, build in (('dict', pair), ('QARecord', lambda i: QARecord(pair(i)))):
+        tracemalloc.start()
+        stored = {f"id{i}": build(i) for i in range(count)}
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        started = time.perf_counter()
+        if name == 'dict':
+            hits = sum(1 for qa_data in stored.values() if 'tool 7 ' in qa_data['question'].lower())
+        else:
+            hits = sum(1 for qa_data in stored.values() if 'tool 7 ' in qa_data.text)
+        assert hits == 1
+        results[name] = (size / count, (time.perf_counter() - started) * 1000)
+        del stored
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pairs', type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"\n🧮 {args.pairs} learned pairs")
+    print(f"{'form':<10} {'bytes/pair':>11} {'scan':>9}")
+    for name, (per_pair, scan_ms) in measure(args.pairs).items():
+        print(f"{name:<10} {per_pair:>11.0f} {scan_ms:>7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Per-worker memory and boot time with and without the shared Q&A snapshot.
+
+Starts --workers fresh interpreters, like gunicorn workers, against an
+in-memory Firestore (fake_firestore.py) holding --pairs learned Q&A pairs:
+
+- private: every worker streams the collection and builds its own indexes
+- shared:  one worker loads the store and publishes QA_SHARED_SNAPSHOT, the
+           others memory-map it (it is started first so it wins the lock)
+
+For each worker it reports boot time (import to learned Q&A ready) and, once
+every worker is up, RSS and PSS. PSS splits pages shared by several
+processes between them, so it is the per-worker cost that adds up to what
+the host actually spends.
+
+Usage:
+    python bench_shared.py --pairs 5000 --workers 4
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+SCENARIOS = ('private', 'shared')
+WORDS = ("react django flask python firebase groq chatbot resume project deploy docker aws api latency cache "
+         "database postgres supabase frontend backend machine learning model internship university texas dallas "
+         "portfolio youtube hobby cricket travel favorite team lead skills experience design testing").split()
+
+
+def make_pairs(count):
+    rng = random.Random(7)
+    base = datetime(2024, 1, 1)
+    pairs = {}
+    for i in range(count):
+        topic = " ".join(rng.sample(WORDS, 4))
+        pairs[f"bench_{i}"] = {
+            'question': f"what about {topic} number {i}?",
+            'answer': f"Answer {i}: " + " ".join(rng.choice(WORDS) for _ in range(60)),
+            'ai_generated': i % 3 == 0,
+            'reviewed': i % 4 == 0,
+            'created_at': base + timedelta(minutes=i),
+            'updated_at': base + timedelta(minutes=i),
+        }
+    return pairs
+
+
+def memory_mb():
+    """(RSS, PSS) of this process in MB"""
+    values = {}
+    for path in ('/proc/self/status', '/proc/self/smaps_rollup'):
+        with open(path) as file:
+            for line in file:
+                key, _, rest = line.partition(':')
+                if key in ('VmRSS', 'Pss'):
+                    values[key] = int(rest.split()[0]) / 1024
+    return values.get('VmRSS'), values.get('Pss')
+
+
+def run_child(pairs):
+    """Boot one worker, report, then hold still until the parent asks for memory"""
+    started = time.perf_counter()
+    import app  # noqa: F401
+    from chatbot import chatbot
+    from fake_firestore import FakeFirestore
+
+    class SeededFirestore(FakeFirestore):
+        # Generated on first read, so workers that never stream it don't hold a copy
+        def collection(self, name):
+            if not self.collections:
+                self.load('learned_qa', make_pairs(pairs))
+            return super().collection(name)
+    chatbot.init_firebase = SeededFirestore
+
+    chatbot.start_store()
+    ready = time.perf_counter()
+    question = make_pairs(1)['bench_0']['question'] if pairs else "hello"
+    hit = chatbot.get_response(question).startswith("Answer 0")
+    print(json.dumps({'boot_s': ready - started, 'learned_hit': hit,
+                      'leader': bool(chatbot.shared and chatbot.shared.leader)}), flush=True)
+
+    sys.stdin.readline()
+    rss, pss = memory_mb()
+    print(json.dumps({'rss_mb': rss, 'pss_mb': pss}), flush=True)
+    sys.stdin.readline()
+
+
+def start_worker(pairs, env):
+    return subprocess.Popen([sys.executable, __file__, '--child', '--pairs', str(pairs)], env=env,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+
+
+def read_json(worker):
+    while True:
+        line = worker.stdout.readline()
+        if not line:
+            raise RuntimeError("worker exited early")
+        if line.startswith('{'):
+            return json.loads(line)
+
+
+def run_scenario(scenario, pairs, workers, directory):
+    env = dict(os.environ, QA_SYNC_MODE='off', QA_WRITE_BEHIND='false', GROQ_API_KEY='')
+    env.pop('STARTUP_SNAPSHOT_PATH', None)
+    env.pop('QA_SHARED_SNAPSHOT', None)
+    if scenario == 'shared':
+        path = os.path.join(directory, f'learned_qa.{time.time_ns()}.snap')
+        env['QA_SHARED_SNAPSHOT'] = path
+
+    procs, results = [], []
+    if scenario == 'shared':
+        # The publisher comes up first, as the first gunicorn worker to load would
+        procs.append(start_worker(pairs, env))
+        results.append(read_json(procs[0]))
+    rest = [start_worker(pairs, env) for _ in range(workers - len(procs))]
+    results += [read_json(proc) for proc in rest]
+    procs += rest
+
+    for proc in procs:
+        proc.stdin.write("measure\n")
+        proc.stdin.flush()
+    for proc, result in zip(procs, results):
+        result.update(read_json(proc))
+    for proc in procs:
+        proc.stdin.close()
+        proc.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pairs', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.pairs)
+        return
+
+    directory = tempfile.mkdtemp()
+    print(f"\n🗺️  {args.workers} workers, {args.pairs} learned pairs")
+    print(f"{'scenario':<9} {'worker':<10} {'boot':>9} {'RSS':>9} {'PSS':>9}  learned hit")
+    for scenario in SCENARIOS:
+        results = run_scenario(scenario, args.pairs, args.workers, directory)
+        for i, result in enumerate(results):
+            role = 'publisher' if result['leader'] else f"#{i}"
+            print(f"{scenario:<9} {role:<10} {result['boot_s']:>8.2f}s {result['rss_mb']:>7.0f}MB "
+                  f"{result['pss_mb']:>7.0f}MB  {result['learned_hit']}")
+        followers = [r for r in results if not r['leader']]
+        print(f"{scenario:<9} {'total':<10} {statistics.median(r['boot_s'] for r in followers):>8.2f}s "
+              f"{sum(r['rss_mb'] for r in results):>7.0f}MB {sum(r['pss_mb'] for r in results):>7.0f}MB  "
+              f"(median boot of non-publishers)")
+
+
+if __name__ == "__main__":
+    main()
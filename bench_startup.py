@@ -0,0 +1,122 @@
+"""Cold-start benchmark: import cost and time to first answer.
+
+Each scenario runs in a fresh interpreter against an in-memory Firestore
+(fake_firestore.py) seeded with --pairs learned Q&A pairs:
+
+- eager:    the old behaviour - the Firestore client is imported and the whole
+            collection is loaded before the first request is answered
+- lazy:     Firebase and the Q&A load happen on the first request
+- snapshot: the first request is answered from STARTUP_SNAPSHOT_PATH while
+            the live load runs in the background
+
+Usage:
+    python bench_startup.py --pairs 5000 --latency 0.3 --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+SCENARIOS = ('eager', 'lazy', 'snapshot')
+QUESTION = "benchmark question number 7 about projects"
+
+
+def make_pairs(count):
+    base = datetime(2024, 1, 1)
+    return {
+        f"bench_{i}": {
+            'question': f"benchmark question number {i} about projects",
+            'answer': f"Benchmark answer {i}",
+            'ai_generated': i % 3 == 0,
+            'reviewed': i % 4 == 0,
+            'created_at': base + timedelta(minutes=i),
+            'updated_at': base + timedelta(minutes=i),
+        }
+        for i in range(count)
+    }
+
+
+def run_child(scenario, pairs, latency):
+    """Measure one cold start inside this (fresh) interpreter"""
+    docs = make_pairs(pairs)
+    started = time.perf_counter()
+    if scenario == 'eager':
+        import firebase_admin.firestore  # noqa: F401 - the old module-level import
+    import app  # noqa: F401
+    from chatbot import chatbot
+    imported = time.perf_counter()
+
+    def init_firebase():
+        from fake_firestore import FakeFirestore
+        db = FakeFirestore(latency=latency)
+        db.load('learned_qa', docs)
+        return db
+    chatbot.init_firebase = init_firebase
+
+    if scenario == 'eager':
+        chatbot.start_store()
+    answer = chatbot.get_response(QUESTION)
+    answered = time.perf_counter()
+    chatbot.store_ready.wait()
+    ready = time.perf_counter()
+
+    return {
+        'import_s': imported - started,
+        'first_answer_s': answered - started,
+        'ready_s': ready - started,
+        'learned_hit': answer.startswith("Benchmark answer"),
+    }
+
+
+def run_scenario(scenario, pairs, latency, snapshot_path):
+    env = dict(os.environ, QA_SYNC_MODE='off', QA_WRITE_BEHIND='false', GROQ_API_KEY='')
+    env.pop('STARTUP_SNAPSHOT_PATH', None)
+    if scenario == 'snapshot':
+        env['STARTUP_SNAPSHOT_PATH'] = snapshot_path
+    output = subprocess.run(
+        [sys.executable, __file__, '--child', scenario, '--pairs', str(pairs), '--latency', str(latency)],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def build_snapshot(path, pairs):
+    """Write the snapshot a previous process would have left behind"""
+    import yaml
+    from startup_snapshot import resume_digest, save_snapshot
+    resume_path = os.getenv('RESUME_PATH', 'resume.yaml')
+    with open(resume_path) as file:
+        resume = yaml.safe_load(file)
+    save_snapshot(path, resume, resume_digest(resume_path), make_pairs(pairs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pairs', type=int, default=5000)
+    parser.add_argument('--latency', type=float, default=0.3, help="seconds per Firestore RPC")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--child', choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.pairs, args.latency)))
+        return
+
+    snapshot_path = os.path.join(tempfile.mkdtemp(), 'startup_snapshot.pickle')
+    build_snapshot(snapshot_path, args.pairs)
+    print(f"\n⏱️  Cold start with {args.pairs} pairs, {args.latency:g}s per Firestore RPC, median of {args.runs} runs")
+    print(f"{'scenario':<10} {'import':>10} {'1st answer':>12} {'store ready':>12}  learned hit")
+    for scenario in SCENARIOS:
+        results = [run_scenario(scenario, args.pairs, args.latency, snapshot_path) for _ in range(args.runs)]
+        median = {key: statistics.median(r[key] for r in results) for key in ('import_s', 'first_answer_s', 'ready_s')}
+        print(f"{scenario:<10} {median['import_s'] * 1000:>8.0f}ms {median['first_answer_s'] * 1000:>10.0f}ms "
+              f"{median['ready_s'] * 1000:>10.0f}ms  {all(r['learned_hit'] for r in results)}")
+
+
+if __name__ == "__main__":
+    main()
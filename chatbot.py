@@ -1,30 +1,249 @@
-import yaml
-import re
 from difflib import SequenceMatcher
 import random
-import requests
 import os
-from datetime import datetime, timezone
-import firebase_admin
-from firebase_admin import credentials, firestore
+import json
+import threading
+import time
+import asyncio
+import zlib
+from datetime import datetime
 from dotenv import load_dotenv
+from qa_index import QAIndex
+from qa_record import QARecord, records
+from qa_dedupe import NearDuplicateIndex, qa_id_for, dedupe_text, pair_questions, compact
+from compiled_resume import ResumeLoader
+from answer_cache import AnswerCache, normalize_question
+from prompt_context import PromptContext, estimate_tokens
+from write_behind import WriteBehindQueue, coalesce
+from single_flight import SingleFlight
+from admission import AdmissionControl
+from model_router import ModelRouter
+from shared_snapshot import SnapshotCoordinator, SharedLearnedQA, shared_views
+from qa_sync import QASync
+from qa_counters import pair_after
+from qa_store import FirestoreStore, SQLiteStore
+from metrics import LatencyRecorder, ChatMetrics
+from startup_snapshot import load_snapshot, save_snapshot
+from llm_client import GroqClient, AsyncGroqClient, LLMError, LLMTimeoutError, CircuitOpenError
 
 # Load environment variables
 load_dotenv()
 
+RESUME_PATH = os.getenv('RESUME_PATH', 'resume.yaml')
+SNAPSHOT_PATH = os.getenv('STARTUP_SNAPSHOT_PATH')
+# Where learned Q&A pairs live: 'firestore' or a local 'sqlite' file
+QA_STORE = os.getenv('QA_STORE', 'firestore').lower()
+QA_SQLITE_PATH = os.getenv('QA_SQLITE_PATH', 'learned_qa.db')
+# Optional memory-mapped learned Q&A file shared by the workers on one host
+QA_SHARED_SNAPSHOT = os.getenv('QA_SHARED_SNAPSHOT')
+QA_SHARED_WAIT = float(os.getenv('QA_SHARED_WAIT', '30'))
+# Resume chunks and learned pairs selected into each AI prompt
+CONTEXT_TOKEN_BUDGET = int(os.getenv('CONTEXT_TOKEN_BUDGET', '500'))
+CONTEXT_MAX_PIECES = int(os.getenv('CONTEXT_MAX_PIECES', '8'))
+# Lowest BM25 score a learned pair or resume chunk needs to stand in for a rate-limited AI answer
+SHED_MIN_SCORE = float(os.getenv('SHED_MIN_SCORE', '5.0'))
+BUSY_MESSAGE = ("I'm answering a lot of questions right now, so I can't write a new answer this second. "
+                "Try again in a minute, or ask about Adarsh's skills, projects, or experience!")
+
+class FallbackAnswer(str):
+    """Canned reply sent when GROQ could not answer; never saved or handed to waiting requests"""
+
+
 class PersonalChatbot:
     def __init__(self, name="AdarshBot"):
         self.name = name
-        self.resume = self.load_resume()
-        self.firebase_db = self.init_firebase()
-        self.learned_qa = self.load_learned_qa()
+        self.snapshot = load_snapshot(SNAPSHOT_PATH) if SNAPSHOT_PATH else None
+        # learned_qa and its derived views are also updated from the sync thread
+        self.qa_lock = threading.RLock()
+        # resume.yaml compiled into canned answers and prompt sections, swapped whole when it changes
+        self.resume_loader = ResumeLoader.from_env(RESUME_PATH, on_swap=self.install_resume, swap_lock=self.qa_lock)
+        self.resume_loader.load(self.snapshot)
+        self.metrics = ChatMetrics()
         self.groq_api_key = os.getenv('GROQ_API_KEY')
+        self.llm = GroqClient.from_env(self.groq_api_key, metrics=self.metrics) if self.groq_api_key else None
+        self.async_llm = None
+        # Fast or large model per question, with a fallback when the large one is slow
+        self.models = ModelRouter.from_env(metrics=self.metrics)
+        self.answer_cache = AnswerCache(
+            max_size=int(os.getenv('ANSWER_CACHE_SIZE', '256')),
+            ttl=int(os.getenv('ANSWER_CACHE_TTL', '3600'))
+        )
+        # Identical AI questions asked at the same moment share one GROQ call
+        self.flights = SingleFlight.from_env()
+        # Per-client and global token buckets in front of the AI tier
+        self.admission = AdmissionControl.from_env()
+        
+        self.latency = LatencyRecorder()
+        
+        self.learned_qa = {}
+        self.qa_index = QAIndex()
+        # MinHash/LSH over questions and aliases: catches near-duplicates the trigram search misses
+        self.near_duplicates = NearDuplicateIndex()
+        self.prompt_context = self.build_prompt_context({})
+        self.qa_sync = None
+        self.qa_writer = None
+        self.shared = None
+        
+        # The Q&A store and the live load wait for first use so importing app stays cheap
+        self._qa_store = None
+        self.store_lock = threading.Lock()
+        self.store_started = False
+        self.store_ready = threading.Event()
+        self.snapshot_lock = threading.Lock()
+        if self.snapshot:
+            self.apply_learned_qa(self.snapshot['learned_qa'])
+            print(f"📸 Serving {len(self.learned_qa)} Q&A pairs from the startup snapshot")
+        
+    # ==================== LAZY STARTUP ====================
+    
+    @property
+    def qa_store(self):
+        """Learned Q&A store (None without one), connecting on first use"""
+        self.start_store()
+        return self._qa_store
+    
+    @qa_store.setter
+    def qa_store(self, store):
+        self._qa_store = store
+        self.store_started = True
+        self.store_ready.set()
+    
+    def start_store(self, wait=True):
+        """Open the Q&A store and load learned Q&A once, optionally waiting for it"""
+        with self.store_lock:
+            if not self.store_started:
+                self.store_started = True
+                if self.snapshot:
+                    # Keep answering from the snapshot while the live load runs
+                    threading.Thread(target=self.load_store, name="qa-store-load", daemon=True).start()
+                else:
+                    self.load_store()
+        if wait:
+            self.store_ready.wait()
+    
+    def load_store(self):
+        """Open the Q&A store, load learned Q&A and start sync and write-behind"""
+        loaded = False
+        try:
+            self._qa_store = self.init_store()
+            if QA_SHARED_SNAPSHOT:
+                loaded = self.start_shared_snapshot()
+            else:
+                self.qa_sync = self.init_qa_sync()
+                loaded = self.load_learned_qa()
+            self.qa_writer = self.init_qa_writer()
+        except Exception as e:
+            print(f"⚠️ Error starting the learned Q&A store: {e}")
+        finally:
+            self.store_ready.set()
+        
+        if loaded and SNAPSHOT_PATH:
+            threading.Thread(target=self.write_snapshot, name="qa-snapshot", daemon=True).start()
+    
+    def write_snapshot(self):
+        """Save resume data and learned Q&A for the next cold start"""
+        with self.qa_lock:
+            learned_qa = dict(self.learned_qa)
+        with self.snapshot_lock:
+            compiled = self.compiled_resume
+            return save_snapshot(SNAPSHOT_PATH, compiled.data, compiled.digest, learned_qa)
+    
+    def apply_learned_qa(self, learned_qa):
+        """Swap in a freshly loaded learned Q&A store and its derived views"""
+        learned_qa = records(learned_qa)
+        # Build the views outside the lock so searches keep running meanwhile
+        qa_index = QAIndex()
+        qa_index.rebuild(learned_qa)
+        near_duplicates = NearDuplicateIndex()
+        near_duplicates.rebuild(learned_qa)
+        prompt_context = self.build_prompt_context(learned_qa)
+        with self.qa_lock:
+            self.learned_qa = learned_qa
+            self.qa_index = qa_index
+            self.near_duplicates = near_duplicates
+            self.prompt_context = prompt_context
+        
+    def install_learned_qa(self, learned_qa):
+        """Serve a full load from the store: published to every worker in shared mode, else indexed here"""
+        if self.shared and self.shared.leader:
+            self.swap_snapshot(self.shared.write(learned_qa))
+        else:
+            self.apply_learned_qa(learned_qa)
+    
+    # ==================== SHARED SNAPSHOT ====================
+    
+    def start_shared_snapshot(self):
+        """Serve learned Q&A from the shared snapshot, publishing it if no other worker does"""
+        self.shared = SnapshotCoordinator.from_env(QA_SHARED_SNAPSHOT, on_lead=self.lead_shared_snapshot,
+                                                   on_swap=self.swap_snapshot, publish=self.publish_snapshot)
+        if self.shared.try_lead():
+            loaded = self.lead_shared_snapshot()
+        else:
+            snapshot = self.shared.wait_for_file(QA_SHARED_WAIT)
+            loaded = snapshot is not None
+            if loaded:
+                self.swap_snapshot(snapshot)
+                print(f"🗺️ Serving {snapshot.count} Q&A pairs from shared snapshot #{snapshot.generation}")
+            else:
+                print("⚠️ No shared Q&A snapshot published yet - serving it once it appears")
+        self.shared.start()
+        return loaded
+    
+    def lead_shared_snapshot(self):
+        """Load and sync the store on behalf of every worker (install_learned_qa publishes it)"""
+        self.qa_sync = self.init_qa_sync()
+        return self.load_learned_qa()
+    
+    def publish_snapshot(self):
+        """Republish after synced changes"""
+        with self.qa_lock:
+            learned_qa = dict(self.learned_qa)
+        self.swap_snapshot(self.shared.write(learned_qa))
+    
+    def swap_snapshot(self, snapshot):
+        """Serve a newly published snapshot, replaying local changes it does not have yet"""
+        learned_qa, qa_index, near_duplicates, bm25, texts = shared_views(snapshot)
+        compiled = self.compiled_resume
+        prompt_context = PromptContext(compiled.data, token_budget=CONTEXT_TOKEN_BUDGET, max_pieces=CONTEXT_MAX_PIECES,
+                                       index=bm25, texts=texts, chunks=compiled.chunks)
+        with self.qa_lock:
+            previous = self.learned_qa
+            self.learned_qa = learned_qa
+            self.qa_index = qa_index
+            self.near_duplicates = near_duplicates
+            self.prompt_context = prompt_context
+            if isinstance(previous, SharedLearnedQA):
+                changed, removed = previous.pending(snapshot)
+                for qa_id, qa_data in changed:
+                    self.record_qa(qa_id, qa_data, replace=True)
+                for qa_id in removed:
+                    self.forget_qa(qa_id)
         
-    # ==================== FIREBASE SETUP ====================
+    # ==================== Q&A STORE SETUP ====================
+    
+    def init_store(self):
+        """Open the learned Q&A store chosen by QA_STORE"""
+        if QA_STORE == 'sqlite':
+            try:
+                store = SQLiteStore(QA_SQLITE_PATH)
+                print(f"🗄️ Using SQLite Q&A store at {QA_SQLITE_PATH}")
+                return store
+            except Exception as e:
+                print(f"⚠️ SQLite Q&A store unavailable: {e}")
+                print("📝 Continuing without a Q&A store - some features may be limited")
+                return None
+        if QA_STORE != 'firestore':
+            print(f"⚠️ Unknown QA_STORE '{QA_STORE}' - using Firestore")
+        db = self.init_firebase()
+        return FirestoreStore(db) if db else None
     
     def init_firebase(self):
         """Initialize Firebase connection"""
         try:
+            # Imported here: firebase_admin pulls in the whole Firestore client
+            import firebase_admin
+            from firebase_admin import credentials, firestore
+            
             if not firebase_admin._apps:
                 firebase_key_path = os.getenv('FIREBASE_KEY_PATH', 'firebase-key.json')
                 
@@ -36,7 +255,6 @@ class PersonalChatbot:
                 # Check for FIREBASE_CREDENTIALS environment variable (Render setup)
                 elif os.getenv('FIREBASE_CREDENTIALS'):
                     try:
-                        import json
                         firebase_config = json.loads(os.getenv('FIREBASE_CREDENTIALS'))
                         cred = credentials.Certificate(firebase_config)
                         print("🔑 Using FIREBASE_CREDENTIALS environment variable")
@@ -77,142 +295,239 @@ class PersonalChatbot:
             return None
 
     def load_learned_qa(self):
-        """Load learned Q&A pairs from Firebase"""
-        if not self.firebase_db:
-            print("📝 Firebase not available - starting with empty Q&A database")
-            return {}
+        """Load learned Q&A pairs from the store; returns True once applied"""
+        if not self._qa_store:
+            print("📝 Q&A store not available - learned Q&A will not be loaded")
+            return False
         
         try:
-            docs = self.firebase_db.collection('learned_qa').stream()
-            learned_qa = {}
-            for doc in docs:
-                data = doc.to_dict()
-                learned_qa[doc.id] = data
-            print(f"📚 Loaded {len(learned_qa)} learned Q&A pairs from Firebase")
-            return learned_qa
+            if self.qa_sync:
+                # The sync's first snapshot doubles as the initial load and is
+                # applied (via on_load) before any change it delivers
+                learned_qa = self.qa_sync.start()
+            else:
+                learned_qa = self._qa_store.load_all()
+                self.install_learned_qa(learned_qa)
+            print(f"📚 Loaded {len(learned_qa)} learned Q&A pairs from {self._qa_store.label}")
+            return True
         except Exception as e:
-            print(f"⚠️ Error loading learned Q&A from Firebase: {e}")
-            print("📝 Continuing with empty Q&A database")
-            return {}
+            print(f"⚠️ Error loading learned Q&A from {self._qa_store.label}: {e}")
+            print("📝 Continuing with the Q&A pairs already in memory")
+            return False
+
+    def learned_record(self, question, answer, ai_generated=True):
+        """Document id and fields for a new Q&A pair"""
+        question_id = qa_id_for(question)
+        qa_data = {
+            'question': question,
+            'answer': answer,
+            'ai_generated': ai_generated,
+            'reviewed': False,
+            'created_at': datetime.now(),
+            'updated_at': datetime.now()
+        }
+        return question_id, qa_data
+
+    def ingest_learned_qa(self, question, answer, ai_generated=True):
+        """Record a new pair in memory; returns (qa_id, op, data to store), op None when there is nothing to store.
+
+        A question that is a near-duplicate of a stored pair becomes an alias
+        of that pair instead of a new document. Only the alias is written, so
+        the stored answer (and an admin edit this worker hasn't synced yet)
+        stays as it is.
+        """
+        question_id, qa_data = self.learned_record(question, answer, ai_generated)
+        with self.qa_lock:
+            match_id, _ = self.near_duplicates.find(question, exclude=question_id)
+            match = self.learned_qa.get(match_id) if match_id else None
+            if match is not None:
+                print(f"🧬 Near-duplicate of a learned question, saved as an alias: {question[:50]}...")
+                if dedupe_text(question) in {dedupe_text(text) for text in pair_questions(match)}:
+                    return match_id, None, None
+                alias = {'aliases': [question], 'updated_at': datetime.now()}
+                self.record_qa(match_id, pair_after(match, 'alias', alias), replace=True)
+                return match_id, 'alias', alias
+            if self.learned_qa.get(question_id, {}).get('aliases'):
+                qa_data['aliases'] = self.learned_qa[question_id]['aliases']
+            self.record_qa(question_id, qa_data, replace=True)
+        return question_id, 'set', qa_data
 
     def save_learned_qa(self, question, answer, ai_generated=True):
-        """Save new Q&A pair to Firebase"""
-        if not self.firebase_db:
-            print("📝 Firebase not available - cannot save Q&A pair")
+        """Save new Q&A pair to the store"""
+        store = self.qa_store
+        if not store:
+            print("📝 Q&A store not available - cannot save Q&A pair")
             return None
         
         try:
-            question_id = re.sub(r'[^a-zA-Z0-9]', '_', question.lower())[:50]
-            qa_data = {
-                'question': question,
-                'answer': answer,
-                'ai_generated': ai_generated,
-                'reviewed': False,
-                'created_at': datetime.now(),
-                'updated_at': datetime.now()
-            }
-            
-            self.firebase_db.collection('learned_qa').document(question_id).set(qa_data)
-            self.learned_qa[question_id] = qa_data
-            print(f"💾 Saved Q&A to Firebase: {question[:50]}...")
+            # Serve the pair from memory right away; the store catches up in the background
+            question_id, op, qa_data = self.ingest_learned_qa(question, answer, ai_generated)
+            if op is None:
+                return question_id
+            if self.qa_writer and self.qa_writer.enqueue(question_id, qa_data, op=op):
+                print(f"💾 Queued Q&A for {store.label}: {question[:50]}...")
+            else:
+                store.commit({question_id: (op, qa_data)})
+                print(f"💾 Saved Q&A to {store.label}: {question[:50]}...")
             return question_id
         except Exception as e:
-            print(f"⚠️ Error saving Q&A to Firebase: {e}")
+            print(f"⚠️ Error saving Q&A to {store.label}: {e}")
             print("📝 Q&A not saved but continuing operation")
             return None
 
+    def save_learned_qa_batch(self, pairs, ai_generated=True):
+        """Save several (question, answer) pairs with one store commit"""
+        store = self.qa_store
+        if not store:
+            print(f"📝 Q&A store not available - cannot save {len(pairs)} Q&A pairs")
+            return []
+        
+        try:
+            saved = []
+            direct = {}
+            for question, answer in pairs:
+                question_id, op, qa_data = self.ingest_learned_qa(question, answer, ai_generated)
+                if question_id not in saved:
+                    saved.append(question_id)
+                if op is None or (self.qa_writer and self.qa_writer.enqueue(question_id, qa_data, op=op)):
+                    continue
+                # A pair and its aliases from the same batch become one write
+                direct[question_id] = coalesce(direct.get(question_id), (op, qa_data))
+            
+            if direct:
+                # One write per pair plus one counter update stays far below Firestore's 500-write limit
+                store.commit(direct)
+            print(f"💾 Saved {len(saved)} Q&A pairs to {store.label} ({len(direct)} in one commit)")
+            return saved
+        except Exception as e:
+            print(f"⚠️ Error saving Q&A batch to {store.label}: {e}")
+            return []
+
+    def write_qa(self, qa_id, qa_data=None, op='set'):
+        """Write a pair to the store and wait for it; returns the pair afterwards.
+
+        Goes through the write-behind queue when there is one, so an admin
+        edit or delete lands after any AI save still queued for that pair
+        instead of being overwritten by it.
+        """
+        if self.qa_writer:
+            return self.qa_writer.write(qa_id, qa_data, op=op)
+        return self.qa_store.write(qa_id, qa_data, op=op)
+
+    def init_qa_writer(self):
+        """Start the write-behind queue for Firestore unless disabled (e.g. on serverless)"""
+        # Local SQLite commits are cheaper than the queue's hand-off
+        if not self._qa_store or not self._qa_store.remote:
+            return None
+        default = 'false' if os.getenv('VERCEL') else 'true'
+        if os.getenv('QA_WRITE_BEHIND', default).lower() not in ('1', 'true', 'yes'):
+            return None
+        return WriteBehindQueue(
+            self._qa_store,
+            max_queue=int(os.getenv('QA_WRITE_QUEUE_SIZE', '1000')),
+            batch_size=int(os.getenv('QA_WRITE_BATCH_SIZE', '50'))
+        ).start()
+
+    def init_qa_sync(self):
+        """Choose how learned Q&A stays in step with the store after startup"""
+        store = self._qa_store
+        if not store:
+            return None
+        if os.getenv('VERCEL'):
+            default = 'off'
+        else:
+            # Only Firestore pushes changes; other workers' SQLite writes are polled (cheaply)
+            default = 'listen' if store.remote else 'poll'
+        mode = os.getenv('QA_SYNC_MODE', default).lower()
+        if mode not in ('listen', 'poll'):
+            return None
+        if mode == 'listen' and not store.remote:
+            mode = 'poll'
+        return QASync(
+            store,
+            on_change=lambda qa_id, qa_data: self.record_qa(qa_id, qa_data, replace=True),
+            on_remove=self.forget_qa,
+            on_load=self.install_learned_qa,
+            mode=mode,
+            poll_interval=float(os.getenv('QA_SYNC_POLL_INTERVAL', '30' if store.remote else '2')),
+            poll_margin=float(os.getenv('QA_SYNC_POLL_MARGIN', '60'))
+        )
+
+    def record_qa(self, qa_id, qa_data, replace=False):
+        """Apply a saved or edited pair to the in-memory store and derived views"""
+        with self.qa_lock:
+            previous = self.learned_qa.get(qa_id)
+            if previous is not None:
+                if not replace:
+                    qa_data = {**previous, **qa_data}
+                self.answer_cache.invalidate(previous.get('question'))
+            qa_data = QARecord(qa_data)
+            self.learned_qa[qa_id] = qa_data
+            self.qa_index.add(qa_id, qa_data.text)
+            self.near_duplicates.add(qa_id, qa_data)
+            self.prompt_context.add_qa(qa_id, qa_data)
+            self.answer_cache.invalidate(qa_data.get('question'))
+        if self.shared:
+            self.shared.mark_dirty()
+
+    def compact_learned_qa(self):
+        """Merge near-duplicate pairs in the store, then apply the result in memory"""
+        if self.qa_writer:
+            self.qa_writer.flush()
+        writes, clusters = compact(self.qa_store, apply=True)
+        for qa_id, (op, qa_data) in writes.items():
+            if op == 'delete':
+                self.forget_qa(qa_id)
+            else:
+                self.record_qa(qa_id, qa_data, replace=True)
+        return writes, clusters
+
+    def forget_qa(self, qa_id):
+        """Remove a deleted pair from the in-memory store and derived views"""
+        with self.qa_lock:
+            previous = self.learned_qa.pop(qa_id, None)
+            if previous is None:
+                return
+            self.qa_index.remove(qa_id)
+            self.near_duplicates.remove(qa_id)
+            self.prompt_context.remove_qa(qa_id)
+            self.answer_cache.invalidate(previous.get('question'))
+        if self.shared:
+            self.shared.mark_dirty()
+
     # ==================== RESUME DATA ====================
     
-    def load_resume(self):
-        """Load resume data from YAML file"""
-        try:
-            with open("resume.yaml", "r") as file:
-                return yaml.safe_load(file)
-        except FileNotFoundError:
-            print("Warning: resume.yaml not found")
-            return {}
+    @property
+    def compiled_resume(self):
+        """The resume version being served"""
+        return self.resume_loader.current
+
+    @property
+    def resume(self):
+        return self.resume_loader.current.data
+
+    @property
+    def intent_router(self):
+        return self.resume_loader.current.router
+
+    def refresh_resume(self):
+        """Current compiled resume, reloading resume.yaml first if it changed"""
+        return self.resume_loader.check()
+
+    def reload_resume(self, force=False):
+        """(compiled resume, changed) after re-reading resume.yaml now; raises ResumeError"""
+        return self.resume_loader.reload(force=force)
+
+    def install_resume(self, compiled):
+        """Point prompt retrieval at a new resume version (under qa_lock, just before it is served)"""
+        self.prompt_context.set_resume(compiled.data, compiled.chunks)
+        # Cached AI answers were written against the old resume
+        self.answer_cache.clear()
 
     def get_resume_response(self, question):
         """Get predefined response from resume data"""
-        question = question.lower()
-        
-        # Direct keyword matching
-        responses = {
-            'name': f"Hi! I'm {self.resume.get('personal', {}).get('name', 'Adarsh')} 👋",
-            'location': f"I'm based in {self.resume.get('personal', {}).get('location', 'the US')}",
-            'email': f"You can reach me at {self.resume.get('personal', {}).get('email', 'my email')}",
-            'skills': self.format_skills(),
-            'experience': self.format_experience(),
-            'projects': self.format_projects(),
-            'education': self.format_education(),
-            'contact': f"Email: {self.resume.get('personal', {}).get('email', '')} | Phone: {self.resume.get('personal', {}).get('phone', '')}",
-        }
-        
-        # Find best match
-        best_match = None
-        best_score = 0
-        
-        for keyword, response in responses.items():
-            if keyword in question:
-                score = SequenceMatcher(None, question, keyword).ratio()
-                if score > best_score:
-                    best_score = score
-                    best_match = response
-        
-        return best_match if best_score > 0.3 else None
-
-    def format_skills(self):
-        """Format skills from resume"""
-        skills = self.resume.get('skills', {})
-        parts = []
-        if 'languages' in skills:
-            parts.append(f"Languages: {', '.join(skills['languages'])}")
-        if 'frameworks' in skills:
-            parts.append(f"Frameworks: {', '.join(skills['frameworks'])}")
-        if 'tools_and_technologies' in skills:
-            parts.append(f"Tools: {', '.join(skills['tools_and_technologies'])}")
-        return " | ".join(parts) if parts else "I have various technical skills!"
-
-    def format_experience(self):
-        """Format work experience"""
-        experience = self.resume.get('experience', [])
-        if experience:
-            # Show the most recent experience (first in list)
-            exp = experience[0]
-            role = exp.get('role', 'Developer')
-            company = exp.get('company', 'company')
-            duration = exp.get('duration', 'duration')
-            responsibilities = exp.get('responsibilities', [])
-            
-            if responsibilities:
-                return f"I'm currently working as a {role} at {company} ({duration}). {'. '.join(responsibilities[:2])}."
-            return f"I'm currently working as a {role} at {company} ({duration})."
-        return "I have professional experience in technology and software development."
-
-    def format_projects(self):
-        """Format projects"""
-        projects = self.resume.get('projects', [])
-        if projects:
-            project_names = [p.get('name', 'Project') for p in projects[:5]]
-            return f"I've built projects including: {', '.join(project_names)}. Each taught me valuable skills in development and problem-solving."
-        return "I enjoy building projects that solve real problems!"
-
-    def format_education(self):
-        """Format education"""
-        education = self.resume.get('education', [])
-        if education:
-            # Show the most recent education (Master's degree)
-            edu = education[0]
-            degree = edu.get('degree', 'degree')
-            university = edu.get('university', 'university')
-            year = edu.get('year', 'year')
-            gpa = edu.get('gpa', '')
-            location = edu.get('location', '')
-            
-            if gpa and gpa != 'Pursuing':
-                return f"I'm pursuing a {degree} from {university} in {location} ({year}) with a GPA of {gpa}."
-            return f"I'm pursuing a {degree} from {university} in {location} ({year})."
-        return "I have a strong educational background in computer science."
+        # One automaton pass over the question; every answer was rendered at compile time
+        return self.refresh_resume().answer(question)
 
     # ==================== AI INTEGRATION ====================
     
@@ -222,8 +537,14 @@ class PersonalChatbot:
         best_match = None
         best_score = 0
         
-        for qa_id, qa_data in self.learned_qa.items():
-            stored_question = qa_data['question'].lower()
+        # Only score the shortlist from the trigram index, not every pair
+        with self.qa_lock:
+            candidates = [(qa_id, self.learned_qa.get(qa_id)) for qa_id in self.qa_index.candidates(question_lower)]
+        
+        for qa_id, qa_data in candidates:
+            if qa_data is None:
+                continue
+            stored_question = qa_data.text
             similarity = SequenceMatcher(None, question_lower, stored_question).ratio()
             
             # Boost score for exact matches
@@ -236,183 +557,483 @@ class PersonalChatbot:
                 best_score = similarity
                 best_match = qa_data
         
+        if best_match is None:
+            # Aliases and reworded near-duplicates ("tell me about urself!!")
+            with self.qa_lock:
+                qa_id, score = self.near_duplicates.find(question)
+                best_match = self.learned_qa.get(qa_id) if qa_id else None
+            if best_match is not None:
+                best_score = score
+        
         return best_match, best_score
 
-    def get_dynamic_prompt_context(self):
-        """Build a dynamic prompt context from resume YAML"""
-        # Personal
-        personal = self.resume.get('personal', {})
-        bio = personal.get('summary', '')
-        
-        # Education
-        education = self.resume.get('education', [{}])[0]
-        edu_str = f"{education.get('degree')} at {education.get('university')} ({education.get('year')})"
-        
-        # Experience
-        experience = self.resume.get('experience', [{}])[0]
-        exp_str = f"{experience.get('role')} at {experience.get('company')}"
-        
-        # Projects (Top 5)
-        projects = self.resume.get('projects', [])[:5]
-        projects_str = "\n".join([f"- {p.get('name')}: {p.get('description')} (Live: {p.get('live', 'N/A')})" for p in projects])
-        
-        # Skills
-        skills = self.resume.get('skills', {})
-        langs = ", ".join(skills.get('languages', []))
-        frameworks = ", ".join(skills.get('frameworks', []))
-        tools = ", ".join(skills.get('tools_and_technologies', []))
+    def build_prompt_context(self, learned_qa):
+        """BM25 index over resume chunks and learned pairs for prompt retrieval"""
+        compiled = self.compiled_resume
+        return PromptContext(compiled.data, learned_qa, token_budget=CONTEXT_TOKEN_BUDGET,
+                             max_pieces=CONTEXT_MAX_PIECES, chunks=compiled.chunks)
+
+    def build_ai_prompt(self, question):
+        """Build the system prompt sent to GROQ for a question"""
+        self.refresh_resume()
         
-        # Personal Facts
-        facts = self.resume.get('personal_facts', {})
-        facts_str = "\n".join([f"- {k.replace('_', ' ').title()}: {v}" for k, v in facts.items()])
+        # Only the resume chunks and past answers relevant to this question
+        with self.qa_lock:
+            # Swapped under the same lock, so the prefix always matches the chunks
+            prompt_prefix = self.compiled_resume.prompt_prefix
+            context_text, pieces = self.prompt_context.render(question)
         
-        # Career Goals
-        goals = self.resume.get('career_goals', {})
-        goals_str = "\n".join([f"- {k.replace('_', ' ').title()}: {v}" for k, v in goals.items()])
+        prompt = f"""{prompt_prefix}{context_text}
+
+INSTRUCTIONS:
+1. Answer ANY question asked with genuine knowledge and enthusiasm.
+2. Provide interesting facts, insights, or personal touches when possible based on the background above.
+3. ALWAYS smoothly transition to how this relates to Adarsh's skills or projects when appropriate.
+4. Be conversational, smart, and personable. Feel free to use markdown formatting like tables, bold text, or lists if it makes the answer better.
+5. If the question is about technology/programming, emphasize Adarsh's expertise.
+6. When answering personal questions, use the personal facts provided.
+7. Keep responses concise (under 80 words) but impactful. Do not mention word limits.
+8. Use the related past answers for consistency, but don't repeat them word for word.
+
+CURRENT QUESTION: {question}"""
         
-        return f"""
-ABOUT ADARSH:
-- {bio}
-- Current Education: {edu_str}
-- Latest Experience: {exp_str}
+        tokens = estimate_tokens(prompt)
+        self.metrics.prompt_tokens.observe(tokens)
+        print(f"🧮 Prompt ~{tokens} tokens ({pieces} context pieces) for: {question[:50]}...")
+        return prompt
 
-TOP 5 PROJECTS:
-{projects_str}
+    def ai_fallback_response(self, question, reason="unavailable"):
+        """Canned answer used when GROQ cannot answer, as a FallbackAnswer"""
+        return FallbackAnswer(self.fallback_text(question, reason))
 
-CORE SKILLS:
-- Languages: {langs}
-- Frameworks: {frameworks}
-- Tools: {tools}
+    def fallback_text(self, question, reason):
+        if reason == "timeout":
+            return f"That's a great question about '{question}'! It's taking me a little too long to think of the perfect answer right now. Could you ask me something else?"
+        if reason == "error":
+            return f"That's a great question about '{question}'! While I'm here to share Adarsh's incredible journey in technology. I don't think I can answer that question right now as I am having trouble. Maybe will ask Adarsh to answer that question."
+        return f"That's a great question about '{question}'! While I'm here to share Adarsh's incredible journey in technology. I don't think I can answer that question right now. Maybe will ask Adarsh to answer that question."
 
-PERSONAL FACTS ABOUT ADARSH:
-{facts_str}
+    def ai_failure_response(self, question, error):
+        """Log a failed GROQ call and pick the matching fallback answer"""
+        if isinstance(error, LLMTimeoutError):
+            print("⚠️ API request timed out")
+            return self.ai_fallback_response(question, "timeout")
+        if isinstance(error, CircuitOpenError):
+            print("⚠️ GROQ circuit open - skipping AI call")
+            return self.ai_fallback_response(question)
+        if isinstance(error, LLMError):
+            print(f"⚠️ {error}")
+            if error.body:
+                print(error.body)
+            return self.ai_fallback_response(question)
+        print(f"⚠️ AI generation error: {error}")
+        return self.ai_fallback_response(question, "error")
 
-CAREER GOALS:
-{goals_str}
-"""
+    def route_model(self, question):
+        """(model, reason) for an AI question from its length, detected intent and retrieval score"""
+        _, intent_score = self.intent_router.route(question, threshold=0)
+        with self.qa_lock:
+            hits = self.prompt_context.index.search(question, limit=1)
+        model, reason = self.models.choose(question, intent_score, hits[0][0] if hits else 0.0)
+        self.models.record_route(model, reason)
+        return model, reason
+
+    def ai_payload(self, question, model=None):
+        """Chat completion payload sent to GROQ for a question"""
+        with self.metrics.span('prompt_build'):
+            prompt = self.build_ai_prompt(question)
+        
+        return {
+            'model': model or self.models.large_model,
+            'messages': [{'role': 'system', 'content': prompt}],
+            'max_tokens': 500,
+            'temperature': 0.7
+        }
 
     def generate_ai_response(self, question):
         """Generate AI response using GROQ"""
-        if not self.groq_api_key:
-            return f"That's a great question about '{question}'! While I'm here to share Adarsh's incredible journey in technology. I don't think I can answer that question right now. Maybe will ask Adarsh to answer that question."
+        if not self.llm:
+            return self.ai_fallback_response(question)
         
         try:
-            # Get recent context from learned Q&A pairs
-            context_pairs = []
-            if self.learned_qa:
-                # Sort by created_at and get last 25
-                sorted_qa = sorted(
-                    self.learned_qa.values(), 
-                    key=lambda x: x.get('created_at') or datetime.now(timezone.utc), 
-                    reverse=True
-                )[:25]
+            model, reason = self.route_model(question)
+            payload = self.ai_payload(question, model)
+            with self.metrics.span('groq_call'):
+                race = self.models.race(self.llm.chat, payload)
+                body = race.result()
+            ai_answer = body['choices'][0]['message']['content'].strip()
+            print(f"🤖 Generated AI response with {race.model} ({reason}) for: {question[:50]}... ({race.latency:.2f}s)")
+            self.answer_cache.set(question, ai_answer)
+            return ai_answer
                 
-                for qa in sorted_qa:
-                    context_pairs.append(f"Q: {qa['question']}\nA: {qa['answer']}")
-            
-            context_text = "\n\n".join(context_pairs) if context_pairs else "No previous conversations yet."
-            
-            # Build dynamic prompt
-            dynamic_context = self.get_dynamic_prompt_context()
-            
-            prompt = f"""You are Adarsh's personal AI assistant. Answer as Adarsh in first person ("I", "my"). You should be knowledgeable, engaging, and redirect to Adarsh's career when relevant.
+        except Exception as e:
+            return self.ai_failure_response(question, e)
 
-LIVE SOURCES (direct visitors here for more info if they ask):
-- Portfolio: https://adarshgella.com
-- GitHub: https://github.com/gadarsh043
-- LinkedIn: https://linkedin.com/in/g-adarsh-sonu
-- YouTube: https://www.youtube.com/@g_adarsh_sonu
+    def stream_ai_response(self, question):
+        """Yield AI response tokens from GROQ as they arrive, ending with a FallbackAnswer if it fails"""
+        if not self.llm:
+            yield self.ai_fallback_response(question)
+            return
+        
+        try:
+            tokens = []
+            model, reason = self.route_model(question)
+            payload = self.ai_payload(question, model)
+            race = self.models.race(self.llm.stream_chat, payload, stream=True)
+            # Includes the time the client takes to consume each token
+            with self.metrics.span('groq_stream'):
+                for token in race:
+                    tokens.append(token)
+                    yield token
+            print(f"🤖 Streamed AI response with {race.model} ({reason}) for: {question[:50]}... "
+                  f"({race.latency:.2f}s to first token)")
+            self.answer_cache.set(question, "".join(tokens).strip())
+                
+        except Exception as e:
+            yield self.ai_failure_response(question, e)
 
-{dynamic_context}
+    # ==================== MAIN RESPONSE LOGIC ====================
+    
+    def get_stored_response(self, question):
+        """(tier, response, version) from learned Q&A or the resume, or (None, None, None)
+        
+        version names what the answer was built from - the matched pair's updated_at or the
+        resume digest, the same on every worker - and is None for unreviewed AI answers
+        """
+        # 1. Check learned Q&A (from the startup snapshot while the live load runs)
+        with self.metrics.span('store_wait'):
+            self.start_store(wait=not self.snapshot)
+        if self.learned_qa:
+            with self.metrics.span('learned_search'):
+                learned_match, score = self.search_learned_qa(question)
+            if learned_match and score > 0.7:
+                response = learned_match['answer']
+                if learned_match.get('ai_generated') and not learned_match.get('reviewed'):
+                    response += "\n\n*💡 This answer was AI-generated and may be updated as I learn more!*"
+                    return 'learned', response, None
+                text_hash = zlib.crc32(learned_match.text.encode())
+                return 'learned', response, f"qa-{learned_match.updated or 0:x}-{text_hash:08x}"
+        
+        # 2. Check resume-based responses
+        with self.metrics.span('resume_route'):
+            compiled = self.refresh_resume()
+            resume_response = compiled.answer(question)
+        if resume_response:
+            return 'resume', resume_response, f"resume-{(compiled.digest or 'none')[:16]}"
+        return None, None, None
+    
+    def get_local_response(self, question):
+        """Answer without calling the AI; returns (tier, response) or (None, None)"""
+        tier, response, _ = self.get_stored_response(question)
+        if response is not None:
+            return tier, response
+        
+        # 3. Reuse a recent AI answer for the same normalized question
+        with self.metrics.span('cache_lookup'):
+            cached_response = self.answer_cache.get(question)
+        if cached_response:
+            return 'cache', cached_response + self.ai_note()
+        
+        return None, None
 
-PREVIOUS CONVERSATIONS (last 25):
-{context_text}
+    def ai_note(self):
+        """Note appended to AI-generated answers"""
+        if self._qa_store or not self.store_ready.is_set():
+            return "\n\n*💡 This answer was AI-generated. I'm always learning and improving my responses!*"
+        return "\n\n*💡 This answer was AI-generated. Note: Learning features are currently limited.*"
 
-INSTRUCTIONS:
-1. Answer ANY question asked with genuine knowledge and enthusiasm.
-2. Provide interesting facts, insights, or personal touches when possible based on the PERSONAL FACTS.
-3. ALWAYS smoothly transition to how this relates to Adarsh's skills or projects when appropriate.
-4. Be conversational, smart, and personable. Feel free to use markdown formatting like tables, bold text, or lists if it makes the answer better.
-5. If the question is about technology/programming, emphasize Adarsh's expertise.
-6. When answering personal questions, use the PERSONAL FACTS provided.
-7. Keep responses concise (under 80 words) but impactful. Do not mention word limits.
-8. Check the previous conversations below to avoid repeating answers exactly.
+    def finish_ai_response(self, question, ai_response):
+        """Persist a fresh AI answer and return the note appended to it"""
+        # Save to the Q&A store if available
+        if self.qa_store:
+            with self.metrics.span('qa_save'):
+                self.save_learned_qa(question, ai_response, ai_generated=True)
+        return self.ai_note()
 
-CURRENT QUESTION: {question}"""
+    def coalesced_ai_response(self, question):
+        """AI answer for a question, sharing an identical in-flight call.
 
-            response = requests.post(
-                "https://api.groq.com/openai/v1/chat/completions",
-                headers={
-                    'Authorization': f'Bearer {self.groq_api_key}',
-                    'Content-Type': 'application/json'
-                },
-                json={
-                    'model': 'llama-3.3-70b-versatile',
-                    'messages': [{'role': 'system', 'content': prompt}],
-                    'max_tokens': 500,
-                    'temperature': 0.7
-                },
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                ai_answer = response.json()['choices'][0]['message']['content'].strip()
-                print(f"🤖 Generated AI response for: {question[:50]}...")
-                return ai_answer
+        Returns (answer, fresh); fresh answers were generated here and still
+        need saving, the others were saved by the request that generated them
+        (or are fallback replies, which are never saved).
+        """
+        flight, ai_response = self.lead_or_wait(question)
+        if ai_response is not None:
+            return ai_response, False
+        try:
+            ai_response = self.generate_ai_response(question)
+        finally:
+            self.end_flight(flight, ai_response)
+        return ai_response, not isinstance(ai_response, FallbackAnswer)
+
+    def lead_or_wait(self, question):
+        """Lead the AI call for a question or wait for an identical one in flight.
+
+        Returns (flight, None) when this request must generate the answer
+        (passing flight to end_flight afterwards), or (None, answer) when an
+        identical in-flight call already produced it.
+        """
+        flight, leader = self.flights.join(normalize_question(question))
+        if leader:
+            return flight, None
+        return None, self.shared_answer(question, flight.wait(self.flights.wait_timeout))
+
+    async def lead_or_wait_async(self, question):
+        """Async variant of lead_or_wait"""
+        key = normalize_question(question)
+        if self.flights.lock_dir:
+            # Waiting on another worker's file lock blocks
+            flight, leader = await asyncio.to_thread(self.flights.join, key)
+        else:
+            flight, leader = self.flights.join(key)
+        if leader:
+            return flight, None
+        return None, self.shared_answer(question, await flight.wait_async(self.flights.wait_timeout))
+
+    def shared_answer(self, question, ai_response):
+        if ai_response is not None:
+            self.metrics.coalesced.inc()
+            print(f"🔗 Shared in-flight AI answer for: {question[:50]}...")
+        return ai_response
+
+    def end_flight(self, flight, ai_response):
+        """Hand a leader's answer to the requests waiting on it; after a failure they answer on their own"""
+        if flight is not None:
+            self.flights.finish(flight, None if isinstance(ai_response, FallbackAnswer) else ai_response)
+
+    def admit_ai(self, question, client):
+        """None if the question may go to the AI tier, else the response to send instead"""
+        # Batch jobs and scripts pass no client; joining an in-flight call costs no GROQ quota
+        if client is None or self.flights.in_flight(normalize_question(question)):
+            return None
+        scope = self.admission.admit(client)
+        if scope is None:
+            return None
+        self.metrics.limited.inc(scope=scope)
+        fallback, response = self.shed_response(question)
+        self.metrics.shed.inc(fallback=fallback)
+        print(f"🚦 Rate limited ({scope}), answered from {fallback}: {question[:50]}...")
+        return response
+
+    def shed_response(self, question):
+        """(fallback, response) from the closest learned pair or resume chunk, or a quick busy reply"""
+        with self.qa_lock:
+            hits = self.prompt_context.index.search(question, limit=1)
+            best = hits[0] if hits and hits[0][0] >= SHED_MIN_SCORE else None
+            if best and best[1].startswith('qa:'):
+                qa_data = self.learned_qa.get(best[1][3:])
+                if qa_data:
+                    return 'learned', (f"{qa_data['answer']}\n\n*⏳ I'm busy right now, so this is my closest "
+                                       f"saved answer (to \"{qa_data['question']}\"). Ask again in a minute for a fresh one!*")
+            elif best:
+                text = self.prompt_context.texts[best[1]]
+                return 'resume', (f"Here's the closest thing I can share right now: {text}\n\n"
+                                  "*⏳ I'm busy right now - ask again in a minute for a full answer!*")
+        return 'busy', BUSY_MESSAGE
+
+    def record_answer(self, tier, seconds):
+        """Record which tier answered and how long it took"""
+        self.latency.record(tier, seconds)
+        self.metrics.answers.observe(seconds, tier=tier)
+
+    def get_response(self, question, client=None):
+        """Main method to get chatbot response; client is the rate-limit key (None skips the limits)"""
+        if not question:
+            return "Hi! I'm Adarsh's AI assistant. Ask me about his skills, projects, or experience!"
+        
+        question = question.strip()
+        started = time.perf_counter()
+        
+        tier, response = self.get_local_response(question)
+        if response is None:
+            tier, response = 'shed', self.admit_ai(question, client)
+        if response is None:
+            # 4. Generate AI response, unless an identical question is already being answered
+            tier = 'ai'
+            ai_response, fresh = self.coalesced_ai_response(question)
+            if fresh:
+                response = ai_response + self.finish_ai_response(question, ai_response)
             else:
-                print(f"⚠️ GROQ API error: {response.status_code}")
-                try:
-                    print(response.json())
-                except:
-                    pass
-                return f"That's a great question about '{question}'! While I'm here to share Adarsh's incredible journey in technology. I don't think I can answer that question right now. Maybe will ask Adarsh to answer that question."
+                response = ai_response + self.ai_note()
+        
+        self.record_answer(tier, time.perf_counter() - started)
+        return response
+
+    def get_response_stream(self, question, client=None):
+        """Streaming variant of get_response that yields text chunks"""
+        if not question:
+            yield "Hi! I'm Adarsh's AI assistant. Ask me about his skills, projects, or experience!"
+            return
+        
+        question = question.strip()
+        started = time.perf_counter()
+        
+        tier, response = self.get_local_response(question)
+        if response is None:
+            tier, response = 'shed', self.admit_ai(question, client)
+        if response is not None:
+            self.record_answer(tier, time.perf_counter() - started)
+            yield response
+            return
+        
+        # 4. Stream AI response, then save the assembled answer
+        flight, ai_response = self.lead_or_wait(question)
+        if ai_response is not None:
+            self.record_answer('ai', time.perf_counter() - started)
+            yield ai_response + self.ai_note()
+            return
+        
+        tokens = []
+        failed = False
+        try:
+            for token in self.stream_ai_response(question):
+                # A stream that broke off ends in the fallback apology; the partial answer is not kept
+                failed = isinstance(token, FallbackAnswer)
+                tokens.append(token)
+                yield token
+            ai_response = None if failed else "".join(tokens).strip()
+        finally:
+            self.end_flight(flight, ai_response)
+        note = self.ai_note() if failed else self.finish_ai_response(question, ai_response)
+        self.record_answer('ai', time.perf_counter() - started)
+        yield note
+
+    # ==================== ASYNC RESPONSE LOGIC ====================
+    # Used by asgi.py: GROQ calls are awaited on the event loop while the local
+    # tiers and Firestore writes run on worker threads, so a slow completion
+    # no longer ties up a whole worker.
+
+    def get_async_llm(self):
+        """AsyncGroqClient for the ASGI path, created on first use inside the event loop"""
+        if self.async_llm is None and self.groq_api_key:
+            self.async_llm = AsyncGroqClient.from_env(self.groq_api_key, metrics=self.metrics)
+        return self.async_llm
+
+    async def generate_ai_response_async(self, question):
+        """Async variant of generate_ai_response"""
+        llm = self.get_async_llm()
+        if not llm:
+            return self.ai_fallback_response(question)
+        
+        try:
+            model, reason = self.route_model(question)
+            payload = self.ai_payload(question, model)
+            with self.metrics.span('groq_call'):
+                race = self.models.race_async(llm.chat, payload)
+                body = await race.result()
+            ai_answer = body['choices'][0]['message']['content'].strip()
+            print(f"🤖 Generated AI response with {race.model} ({reason}) for: {question[:50]}... ({race.latency:.2f}s)")
+            self.answer_cache.set(question, ai_answer)
+            return ai_answer
                 
-        except requests.exceptions.Timeout:
-            print("⚠️ API request timed out")
-            return f"That's a great question about '{question}'! It's taking me a little too long to think of the perfect answer right now. Could you ask me something else?"
-            
         except Exception as e:
-            print(f"⚠️ AI generation error: {e}")
-            return f"That's a great question about '{question}'! While I'm here to share Adarsh's incredible journey in technology. I don't think I can answer that question right now as I am having trouble. Maybe will ask Adarsh to answer that question."
+            return self.ai_failure_response(question, e)
 
-    # ==================== MAIN RESPONSE LOGIC ====================
-    
-    def get_response(self, question):
-        """Main method to get chatbot response"""
+    async def stream_ai_response_async(self, question):
+        """Async variant of stream_ai_response"""
+        llm = self.get_async_llm()
+        if not llm:
+            yield self.ai_fallback_response(question)
+            return
+        
+        try:
+            tokens = []
+            model, reason = self.route_model(question)
+            payload = self.ai_payload(question, model)
+            race = self.models.race_async(llm.stream_chat, payload, stream=True)
+            with self.metrics.span('groq_stream'):
+                async for token in race:
+                    tokens.append(token)
+                    yield token
+            print(f"🤖 Streamed AI response with {race.model} ({reason}) for: {question[:50]}... "
+                  f"({race.latency:.2f}s to first token)")
+            self.answer_cache.set(question, "".join(tokens).strip())
+                
+        except Exception as e:
+            yield self.ai_failure_response(question, e)
+
+    async def admit_ai_async(self, question, client):
+        """Async variant of admit_ai"""
+        if self.admission.shared_path:
+            # Waiting on another worker's file lock blocks
+            return await asyncio.to_thread(self.admit_ai, question, client)
+        return self.admit_ai(question, client)
+
+    async def get_response_async(self, question, client=None):
+        """Async variant of get_response"""
         if not question:
             return "Hi! I'm Adarsh's AI assistant. Ask me about his skills, projects, or experience!"
         
         question = question.strip()
+        started = time.perf_counter()
         
-        # 1. Check Firebase learned Q&A (only if Firebase is available)
-        if self.firebase_db:
-            learned_match, score = self.search_learned_qa(question)
-            if learned_match and score > 0.7:
-                response = learned_match['answer']
-                if learned_match.get('ai_generated') and not learned_match.get('reviewed'):
-                    response += "\n\n*💡 This answer was AI-generated and may be updated as I learn more!*"
-                return response
+        tier, response = await asyncio.to_thread(self.get_local_response, question)
+        if response is None:
+            tier, response = 'shed', await self.admit_ai_async(question, client)
+        if response is None:
+            tier = 'ai'
+            flight, ai_response = await self.lead_or_wait_async(question)
+            if ai_response is not None:
+                response = ai_response + self.ai_note()
+            else:
+                try:
+                    ai_response = await self.generate_ai_response_async(question)
+                finally:
+                    self.end_flight(flight, ai_response)
+                if isinstance(ai_response, FallbackAnswer):
+                    response = ai_response + self.ai_note()
+                else:
+                    response = ai_response + await asyncio.to_thread(self.finish_ai_response, question, ai_response)
         
-        # 2. Check resume-based responses
-        resume_response = self.get_resume_response(question)
-        if resume_response:
-            return resume_response
+        self.record_answer(tier, time.perf_counter() - started)
+        return response
+
+    async def get_response_stream_async(self, question, client=None):
+        """Async variant of get_response_stream"""
+        if not question:
+            yield "Hi! I'm Adarsh's AI assistant. Ask me about his skills, projects, or experience!"
+            return
         
-        # 3. Generate AI response
-        ai_response = self.generate_ai_response(question)
+        question = question.strip()
+        started = time.perf_counter()
         
-        # Save to Firebase if available
-        if self.firebase_db:
-            self.save_learned_qa(question, ai_response, ai_generated=True)
-            ai_response += "\n\n*💡 This answer was AI-generated. I'm always learning and improving my responses!*"
-        else:
-            ai_response += "\n\n*💡 This answer was AI-generated. Note: Learning features are currently limited.*"
+        tier, response = await asyncio.to_thread(self.get_local_response, question)
+        if response is None:
+            tier, response = 'shed', await self.admit_ai_async(question, client)
+        if response is not None:
+            self.record_answer(tier, time.perf_counter() - started)
+            yield response
+            return
         
-        return ai_response
+        flight, ai_response = await self.lead_or_wait_async(question)
+        if ai_response is not None:
+            self.record_answer('ai', time.perf_counter() - started)
+            yield ai_response + self.ai_note()
+            return
+        
+        tokens = []
+        failed = False
+        try:
+            async for token in self.stream_ai_response_async(question):
+                failed = isinstance(token, FallbackAnswer)
+                tokens.append(token)
+                yield token
+            ai_response = None if failed else "".join(tokens).strip()
+        finally:
+            self.end_flight(flight, ai_response)
+        if failed:
+            note = self.ai_note()
+        else:
+            note = await asyncio.to_thread(self.finish_ai_response, question, ai_response)
+        self.record_answer('ai', time.perf_counter() - started)
+        yield note
 
 # Create chatbot instance
 chatbot = PersonalChatbot("AdarshBot")
 
-# Compatibility function
-def get_response(question):
-    return chatbot.get_response(question)
+# Compatibility functions
+def get_response(question, client=None):
+    return chatbot.get_response(question, client)
+
+def get_response_stream(question, client=None):
+    return chatbot.get_response_stream(question, client)
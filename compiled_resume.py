@@ -0,0 +1,229 @@
+"""resume.yaml compiled once per version and hot-reloaded when it changes.
+
+The chatbot used to read resume.yaml once at startup, so an edit meant
+restarting every worker, and the prompt summary was rebuilt on the first AI
+call after an mtime change while canned answers rendered lazily per worker.
+A CompiledResume holds everything derived from one version of the file: the
+parsed data, the intent router with every canned answer already rendered, the
+resume chunks for prompt retrieval and the static prompt prefix. It is never
+modified; a new version is compiled off to the side and swapped in with one
+assignment, so a request sees either the old resume or the new one.
+
+ResumeLoader stats the file at most every RESUME_CHECK_INTERVAL seconds on
+the request path. A changed mtime or size is confirmed by the content hash,
+and the new file must parse and validate before it replaces the current
+version; a broken edit is reported and the last good resume keeps serving.
+"""
+import hashlib
+import os
+import threading
+import time
+
+import yaml
+
+from intent_router import IntentRouter
+from prompt_context import resume_chunks
+
+# Sections the router and prompt builders index into
+MAPPING_SECTIONS = ('personal', 'personal_facts', 'career_goals', 'skills')
+LIST_SECTIONS = ('education', 'experience', 'projects', 'achievements', 'languages', 'keywords')
+ENTRY_SECTIONS = ('education', 'experience', 'projects')
+
+
+class ResumeError(ValueError):
+    """resume.yaml is missing, unparsable or has the wrong shape"""
+
+
+def validate_resume(resume):
+    """Raise ResumeError listing every section with the wrong shape"""
+    if not isinstance(resume, dict):
+        raise ResumeError("resume.yaml must be a mapping of sections")
+    problems = []
+    for section in MAPPING_SECTIONS:
+        if resume.get(section) is not None and not isinstance(resume[section], dict):
+            problems.append(f"'{section}' must be a mapping")
+    for section in LIST_SECTIONS:
+        if resume.get(section) is not None and not isinstance(resume[section], list):
+            problems.append(f"'{section}' must be a list")
+    if resume.get('interests') is not None and not isinstance(resume['interests'], (dict, list)):
+        problems.append("'interests' must be a mapping or a list")
+    for section in ENTRY_SECTIONS:
+        entries = resume.get(section)
+        if not isinstance(entries, list):
+            continue
+        for i, entry in enumerate(entries):
+            if not isinstance(entry, dict):
+                problems.append(f"'{section}' entry {i + 1} must be a mapping")
+            elif section == 'projects' and not entry.get('name'):
+                problems.append(f"project {i + 1} has no name")
+    if problems:
+        raise ResumeError("; ".join(problems))
+
+
+def prompt_summary(resume):
+    """Short always-included summary from resume YAML; the rest is retrieved per question"""
+    personal = resume.get('personal', {}) or {}
+    bio = " ".join(str(personal.get('summary', '')).split())
+
+    education = (resume.get('education') or [{}])[0]
+    edu_str = f"{education.get('degree')} at {education.get('university')} ({education.get('year')})"
+
+    experience = (resume.get('experience') or [{}])[0]
+    exp_str = f"{experience.get('role')} at {experience.get('company')}"
+
+    return f"""
+ABOUT ADARSH:
+- {bio}
+- Current Education: {edu_str}
+- Latest Experience: {exp_str}
+"""
+
+
+def prompt_prefix(resume):
+    """Render the static, resume-derived part of the system prompt"""
+    return f"""You are Adarsh's personal AI assistant. Answer as Adarsh in first person ("I", "my"). You should be knowledgeable, engaging, and redirect to Adarsh's career when relevant.
+
+LIVE SOURCES (direct visitors here for more info if they ask):
+- Portfolio: https://adarshgella.com
+- GitHub: https://github.com/gadarsh043
+- LinkedIn: https://linkedin.com/in/g-adarsh-sonu
+- YouTube: https://www.youtube.com/@g_adarsh_sonu
+{prompt_summary(resume)}
+"""
+
+
+class CompiledResume:
+    """One version of resume.yaml and everything derived from it; read-only"""
+
+    __slots__ = ('data', 'digest', 'version', 'loaded_at', 'router', 'chunks', 'prompt_prefix')
+
+    def __init__(self, data, digest=None, version=1):
+        data = data or {}
+        validate_resume(data)
+        router = IntentRouter(data)
+        try:
+            # Every canned answer now, so requests only ever read them
+            router.render_all()
+            chunks = tuple(resume_chunks(data))
+            prefix = prompt_prefix(data)
+        except Exception as e:
+            raise ResumeError(f"could not compile resume: {e}") from e
+        for name, value in (('data', data), ('digest', digest), ('version', version), ('loaded_at', time.time()),
+                            ('router', router), ('chunks', chunks), ('prompt_prefix', prefix)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledResume is read-only; compile a new one instead")
+
+    def answer(self, question):
+        """Canned answer for a question, or None"""
+        return self.router.answer(question)
+
+    def summary(self):
+        return {'version': self.version, 'digest': (self.digest or '')[:12],
+                'loaded_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.loaded_at)),
+                'answers': len(self.router), 'chunks': len(self.chunks)}
+
+
+def file_state(path):
+    """(mtime_ns, size) of a file, or None if it is missing"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ResumeLoader:
+    """Watches resume.yaml and swaps in a new CompiledResume when its content changes"""
+
+    def __init__(self, path, check_interval=2.0, on_swap=None, swap_lock=None):
+        self.path = path
+        self.check_interval = check_interval
+        # Called with the new version before it becomes current; both happen under swap_lock
+        self.on_swap = on_swap
+        self.swap_lock = swap_lock or threading.Lock()
+        self.lock = threading.Lock()
+        self.current = CompiledResume({}, version=0)
+        self.state = None
+        self.next_check = 0.0
+        self.last_error = None
+
+    @classmethod
+    def from_env(cls, path, on_swap=None, swap_lock=None):
+        return cls(path, check_interval=float(os.getenv('RESUME_CHECK_INTERVAL', '2')), on_swap=on_swap,
+                   swap_lock=swap_lock)
+
+    def read(self):
+        """(file state, bytes, digest) as of one read"""
+        state = file_state(self.path)
+        try:
+            with open(self.path, 'rb') as file:
+                content = file.read()
+        except OSError as e:
+            raise ResumeError(f"cannot read {self.path}: {e}") from e
+        return state, content, hashlib.sha1(content).hexdigest()
+
+    def compile(self, content, digest):
+        try:
+            data = yaml.safe_load(content)
+        except yaml.YAMLError as e:
+            raise ResumeError(f"invalid YAML in {self.path}: {e}") from e
+        if not data:
+            # Usually a file caught mid-write
+            raise ResumeError(f"{self.path} is empty")
+        return CompiledResume(data, digest, self.current.version + 1)
+
+    def load(self, snapshot=None):
+        """Compile the resume at startup, from the startup snapshot when it is current"""
+        with self.lock:
+            try:
+                self.state, content, digest = self.read()
+                if snapshot and snapshot.get('resume_digest') == digest:
+                    self.current = CompiledResume(snapshot['resume'], digest, 1)
+                else:
+                    self.current = self.compile(content, digest)
+            except ResumeError as e:
+                self.last_error = str(e)
+                print(f"Warning: {e}")
+        return self.current
+
+    def check(self):
+        """Current version, reloading first if the file changed since the last look"""
+        now = time.monotonic()
+        if now < self.next_check:
+            return self.current
+        self.next_check = now + self.check_interval
+        if file_state(self.path) != self.state:
+            try:
+                self.reload()
+            except ResumeError as e:
+                print(f"⚠️ Keeping the previous resume: {e}")
+        return self.current
+
+    def reload(self, force=False):
+        """(current version, whether it changed); raises ResumeError and keeps the old one"""
+        with self.lock:
+            try:
+                state, content, digest = self.read()
+            except ResumeError as e:
+                self.last_error = str(e)
+                raise
+            # check() won't retry this state, so a broken edit is reported once
+            self.state = state
+            if digest == self.current.digest and not force:
+                return self.current, False
+            try:
+                compiled = self.compile(content, digest)
+            except ResumeError as e:
+                self.last_error = str(e)
+                raise
+            with self.swap_lock:
+                if self.on_swap:
+                    self.on_swap(compiled)
+                self.current, self.last_error = compiled, None
+        print(f"📄 Loaded resume.yaml version {compiled.version} ({compiled.summary()['answers']} answers)")
+        return compiled, True
+
+    def status(self):
+        return dict(self.current.summary(), path=self.path, error=self.last_error)
@@ -0,0 +1,23 @@
+import pytest
+
+
+@pytest.fixture
+def patch_chatbot(monkeypatch):
+    """Swap attributes on the shared chatbot for one test: patch_chatbot(llm=..., qa_store=...)
+
+    Afterwards pairs the test learned are forgotten, the answer cache is
+    cleared and the swapped attributes are restored.
+    """
+    from chatbot import chatbot
+
+    learned = set(chatbot.learned_qa)
+
+    def patch(**attributes):
+        for name, value in attributes.items():
+            monkeypatch.setattr(chatbot, name, value)
+        return chatbot
+
+    yield patch
+    for qa_id in set(chatbot.learned_qa) - learned:
+        chatbot.forget_qa(qa_id)
+    chatbot.answer_cache.clear()
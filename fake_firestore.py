@@ -0,0 +1,319 @@
+"""In-memory stand-in for the parts of the Firestore client the app uses.
+
+Used by tests and benchmarks to run the chatbot without Firebase
+credentials. Every RPC can be given an artificial latency, and commits can
+be told to fail, so persistence paths can be timed and exercised offline.
+"""
+import copy
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from firebase_admin import firestore
+
+
+class FakeSnapshot:
+    def __init__(self, doc_id, data, reference=None):
+        self.id = doc_id
+        self.reference = reference
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field):
+        return (self._data or {}).get(field)
+
+
+class FakeDocumentRef:
+    def __init__(self, db, collection, doc_id):
+        self.db = db
+        self.collection_name = collection
+        self.id = doc_id
+
+    def set(self, data, merge=False):
+        self.db.rpc()
+        self.db.apply('set', self.collection_name, self.id, data, merge=merge)
+
+    def update(self, data):
+        self.db.rpc()
+        self.db.apply('update', self.collection_name, self.id, data)
+
+    def delete(self):
+        self.db.rpc()
+        self.db.apply('delete', self.collection_name, self.id)
+
+    def get(self, transaction=None):
+        self.db.rpc()
+        with self.db.lock:
+            data = self.db.collections.get(self.collection_name, {}).get(self.id)
+            return FakeSnapshot(self.id, copy.deepcopy(data), self)
+
+
+OPERATORS = {
+    '==': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+    '>': lambda a, b: a is not None and a > b,
+    '>=': lambda a, b: a is not None and a >= b,
+    '<': lambda a, b: a is not None and a < b,
+    '<=': lambda a, b: a is not None and a <= b,
+}
+
+
+class FakeQuery:
+    """Immutable query supporting where/order_by/limit/start_after/select"""
+
+    def __init__(self, collection, filters=(), orders=(), limit_to=None, cursor=None, fields=None):
+        self.collection = collection
+        self.filters = filters
+        self.orders = orders
+        self.limit_to = limit_to
+        self.cursor = cursor
+        self.fields = fields
+
+    def _copy(self, **changes):
+        values = dict(filters=self.filters, orders=self.orders, limit_to=self.limit_to,
+                      cursor=self.cursor, fields=self.fields)
+        values.update(changes)
+        return FakeQuery(self.collection, **values)
+
+    def where(self, field, op, value):
+        return self._copy(filters=self.filters + ((field, op, value),))
+
+    def order_by(self, field, direction='ASCENDING'):
+        return self._copy(orders=self.orders + ((field, direction),))
+
+    def limit(self, count):
+        return self._copy(limit_to=count)
+
+    def start_after(self, snapshot):
+        return self._copy(cursor=snapshot)
+
+    def select(self, fields):
+        return self._copy(fields=list(fields))
+
+    def stream(self):
+        self.collection.db.rpc()
+        with self.collection.db.lock:
+            docs = list(self.collection.db.collections.get(self.collection.name, {}).items())
+
+        docs = [(doc_id, data) for doc_id, data in docs
+                if all(OPERATORS[op](data.get(field), value) for field, op, value in self.filters)]
+        for field, direction in reversed(self.orders):
+            docs.sort(key=lambda item: (item[1].get(field) is None, item[1].get(field)),
+                      reverse=direction == 'DESCENDING')
+
+        if self.cursor is not None:
+            ids = [doc_id for doc_id, _ in docs]
+            if self.cursor.id in ids:
+                docs = docs[ids.index(self.cursor.id) + 1:]
+        if self.limit_to is not None:
+            docs = docs[:self.limit_to]
+
+        for doc_id, data in docs:
+            if self.fields is not None:
+                data = {field: data.get(field) for field in self.fields if field in data}
+            yield FakeSnapshot(doc_id, copy.deepcopy(data), self.collection.document(doc_id))
+
+    def get(self):
+        return list(self.stream())
+
+    def count(self, alias='count'):
+        return FakeAggregation(self)
+
+
+class FakeAggregationResult:
+    def __init__(self, value):
+        self.value = value
+
+
+class FakeAggregation:
+    def __init__(self, query):
+        self.query = query
+
+    def get(self):
+        return [[FakeAggregationResult(sum(1 for _ in self.query.stream()))]]
+
+
+class FakeChangeType:
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeChange:
+    def __init__(self, kind, document):
+        self.type = FakeChangeType(kind)
+        self.document = document
+
+
+class FakeWatch:
+    def __init__(self, db, callback):
+        self.db = db
+        self.callback = callback
+
+    def unsubscribe(self):
+        with self.db.lock:
+            if self in self.db.watches:
+                self.db.watches.remove(self)
+
+
+class FakeCollectionRef(FakeQuery):
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
+        super().__init__(self)
+
+    def document(self, doc_id=None):
+        return FakeDocumentRef(self.db, self.name, doc_id or uuid.uuid4().hex[:20])
+
+    def on_snapshot(self, callback):
+        """Deliver the current documents, then every change, to callback"""
+        watch = FakeWatch(self.db, callback)
+        with self.db.lock:
+            docs = [FakeSnapshot(doc_id, copy.deepcopy(data), self.document(doc_id))
+                    for doc_id, data in self.db.collections.get(self.name, {}).items()]
+            self.db.watches.append(watch)
+        callback(docs, [FakeChange('ADDED', doc) for doc in docs], time.time())
+        return watch
+
+
+class FakeBatch:
+    def __init__(self, db):
+        self.db = db
+        self.ops = []
+
+    def set(self, ref, data, merge=False):
+        self.ops.append(('set', ref, data, merge))
+
+    def update(self, ref, data):
+        self.ops.append(('update', ref, data, False))
+
+    def delete(self, ref):
+        self.ops.append(('delete', ref, None, False))
+
+    def commit(self):
+        self.db.rpc()
+        with self.db.lock:
+            if self.db.fail_commits > 0:
+                self.db.fail_commits -= 1
+                raise RuntimeError("fake commit failure")
+            self.db.commits.append(len(self.ops))
+        for op, ref, data, merge in self.ops:
+            self.db.apply(op, ref.collection_name, ref.id, data, merge=merge)
+
+
+class FakeTransaction(FakeBatch):
+    """Just enough of Transaction for firestore.transactional to drive it"""
+
+    _read_only = False
+    _max_attempts = 1
+
+    def __init__(self, db):
+        super().__init__(db)
+        self._id = None
+
+    @property
+    def in_progress(self):
+        return self._id is not None
+
+    def _clean_up(self):
+        self.ops = []
+        self._id = None
+
+    def get_all(self, references):
+        return [ref.get(transaction=self) for ref in references]
+
+    def _begin(self, retry_id=None):
+        # Serialize transactions against each other and all other writes
+        self.db.lock.acquire()
+        self._id = uuid.uuid4().bytes
+
+    def _commit(self):
+        try:
+            self.commit()
+        finally:
+            self._clean_up()
+            self.db.lock.release()
+
+    def _rollback(self):
+        if self.in_progress:
+            self._clean_up()
+            self.db.lock.release()
+
+
+class FakeFirestore:
+    """Thread-safe in-memory Firestore with optional per-RPC latency"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.collections = {}
+        self.commits = []
+        self.fail_commits = 0
+        self.rpc_count = 0
+        self.watches = []
+        self.lock = threading.RLock()
+
+    def rpc(self):
+        with self.lock:
+            self.rpc_count += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def collection(self, name):
+        return FakeCollectionRef(self, name)
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def transaction(self):
+        return FakeTransaction(self)
+
+    @staticmethod
+    def resolve(current, data):
+        """Apply Increment / SERVER_TIMESTAMP sentinels against stored values"""
+        resolved = {}
+        for field, value in data.items():
+            if isinstance(value, firestore.Increment):
+                resolved[field] = (current or {}).get(field, 0) + value.value
+            elif value is firestore.SERVER_TIMESTAMP:
+                resolved[field] = datetime.now(timezone.utc)
+            else:
+                resolved[field] = copy.deepcopy(value)
+        return resolved
+
+    def apply(self, op, collection, doc_id, data=None, merge=False):
+        with self.lock:
+            docs = self.collections.setdefault(collection, {})
+            existed = doc_id in docs
+            if op == 'delete':
+                docs.pop(doc_id, None)
+            elif op == 'update':
+                if not existed:
+                    raise KeyError(f"No document to update: {collection}/{doc_id}")
+                docs[doc_id].update(self.resolve(docs[doc_id], data))
+            elif merge and existed:
+                docs[doc_id].update(self.resolve(docs[doc_id], data))
+            else:
+                docs[doc_id] = self.resolve(None, data)
+            watches = list(self.watches)
+            current = copy.deepcopy(docs.get(doc_id))
+
+        if op == 'delete':
+            kind = 'REMOVED' if existed else None
+        else:
+            kind = 'MODIFIED' if existed else 'ADDED'
+        if kind:
+            ref = FakeDocumentRef(self, collection, doc_id)
+            change = FakeChange(kind, FakeSnapshot(doc_id, current, ref))
+            for watch in watches:
+                watch.callback([], [change], time.time())
+
+    def load(self, collection, docs):
+        """Seed a collection with {doc_id: data} without counting RPCs"""
+        with self.lock:
+            self.collections.setdefault(collection, {}).update(copy.deepcopy(docs))
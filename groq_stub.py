@@ -0,0 +1,174 @@
+"""Local GROQ-compatible stub server for tests and benchmarks.
+
+Serves POST /openai/v1/chat/completions with canned answers, optional
+latency, scripted failures and OpenAI-style streaming, so the LLM client
+can be exercised without network access:
+
+    python groq_stub.py --port 8099 --latency 0.4
+    GROQ_API_URL=http://127.0.0.1:8099/openai/v1/chat/completions python app.py
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHAT_PATH = '/openai/v1/chat/completions'
+
+
+class GroqStub:
+    """Threaded stub server; configure attributes between requests"""
+
+    def __init__(self, host='127.0.0.1', port=0, answer="Stub answer from the local GROQ server.",
+                 latency=0.0, token_delay=0.0):
+        self.answer = answer
+        self.latency = latency
+        self.token_delay = token_delay
+        # Status codes to return (in order) before succeeding, e.g. [503, 429]
+        self.failures = []
+        self.retry_after = None
+        # Per-model overrides: {"model-name": {"latency": 0.1, "answer": "..."}}; latency may be
+        # a function returning seconds, for latency distributions
+        self.models = {}
+        self.requests = []
+        self.client_ports = set()
+        self.lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out in separate writes; without TCP_NODELAY
+            # keep-alive clients stall ~40ms on delayed ACKs
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                try:
+                    stub.handle(self)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up, e.g. the losing call of a hedged request
+                    self.close_connection = True
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}{CHAT_PATH}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ==================== REQUEST HANDLING ====================
+
+    def handle(self, handler):
+        length = int(handler.headers.get('Content-Length', 0))
+        payload = json.loads(handler.rfile.read(length) or b'{}')
+
+        with self.lock:
+            self.requests.append(payload)
+            self.client_ports.add(handler.client_address[1])
+            status = self.failures.pop(0) if self.failures else 200
+
+        if handler.path != CHAT_PATH:
+            self.send_json(handler, 404, {'error': {'message': 'not found'}})
+            return
+
+        model = payload.get('model', '')
+        overrides = self.models.get(model, {})
+        latency = overrides.get('latency', self.latency)
+        latency = latency() if callable(latency) else latency
+        answer = overrides.get('answer', self.answer)
+        if latency:
+            time.sleep(latency)
+
+        if status != 200:
+            headers = {'Retry-After': str(self.retry_after)} if self.retry_after is not None else {}
+            self.send_json(handler, status, {'error': {'message': f'stub error {status}'}}, headers)
+            return
+
+        usage = {
+            'prompt_tokens': sum(len(m.get('content', '')) for m in payload.get('messages', [])) // 4,
+            'completion_tokens': len(answer.split()),
+        }
+        usage['total_tokens'] = usage['prompt_tokens'] + usage['completion_tokens']
+
+        if payload.get('stream'):
+            self.send_stream(handler, model, answer, usage)
+        else:
+            self.send_json(handler, 200, {
+                'id': 'stub-completion',
+                'object': 'chat.completion',
+                'model': model,
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': answer},
+                             'finish_reason': 'stop'}],
+                'usage': usage,
+            })
+
+    def send_json(self, handler, status, body, headers=None):
+        data = json.dumps(body).encode()
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def send_stream(self, handler, model, answer, usage):
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'text/event-stream')
+        handler.send_header('Transfer-Encoding', 'chunked')
+        handler.end_headers()
+
+        def write_chunk(text):
+            data = text.encode()
+            handler.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            handler.wfile.flush()
+
+        words = answer.split(' ')
+        for i, word in enumerate(words):
+            token = word if i == len(words) - 1 else word + ' '
+            chunk = {'model': model, 'choices': [{'index': 0, 'delta': {'content': token}}]}
+            write_chunk(f"data: {json.dumps(chunk)}\n\n")
+            if self.token_delay:
+                time.sleep(self.token_delay)
+        final = {'model': model, 'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}],
+                 'x_groq': {'usage': usage}}
+        write_chunk(f"data: {json.dumps(final)}\n\n")
+        write_chunk("data: [DONE]\n\n")
+        handler.wfile.write(b"0\r\n\r\n")
+        handler.wfile.flush()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local GROQ-compatible stub server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds before each response")
+    parser.add_argument('--token-delay', type=float, default=0.0, help="seconds between streamed tokens")
+    args = parser.parse_args()
+
+    stub = GroqStub(args.host, args.port, latency=args.latency, token_delay=args.token_delay)
+    print(f"🧪 GROQ stub listening on {stub.url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
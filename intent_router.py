@@ -0,0 +1,403 @@
+"""Compiled intent router for answering resume questions locally.
+
+get_resume_response used to render every canned answer on each call, then
+test 8 hard-coded keywords with a substring check plus SequenceMatcher. The
+router is compiled once per resume.yaml: every intent (sections, personal
+facts, career goals, projects, companies and the resume's `keywords:`) maps
+its keywords into one Aho-Corasick automaton, so a question is matched in a
+single pass, and answers are rendered only when chosen and then cached.
+
+Scoring keeps the old rule. For a keyword found inside the question,
+SequenceMatcher.ratio() is exactly 2*len(keyword)/(len(question)+len(keyword)),
+and an answer still needs a score above 0.3, so long specific questions keep
+going to the AI instead of getting a canned reply.
+
+Technology keywords only answer questions about my experience ("do you know
+react", "have you used docker"). "What is react?" asks for a definition, not
+"Yes! React is part of my toolkit", so it is left to the AI.
+"""
+import re
+from collections import deque
+
+MATCH_THRESHOLD = 0.3
+
+# Generic section answers lose to a specific match (a project, a fact, a skill)
+SECTION, ENTITY = 0, 1
+
+SECTION_KEYWORDS = {
+    'name': ['name'],
+    'location': ['location', 'where are you based', 'where do you live'],
+    'email': ['email'],
+    'contact': ['contact', 'reach you'],
+    'skills': ['skills', 'skill', 'tech stack'],
+    'experience': ['experience', 'work history'],
+    'projects': ['projects'],
+    'education': ['education', 'degree', 'university', 'gpa'],
+    'achievements': ['achievements', 'accomplishments', 'proud of'],
+    'interests': ['interests', 'hobbies', 'hobby'],
+    'languages': ['languages do you speak', 'languages you speak', 'speak'],
+    'certifications': ['certifications', 'certificates', 'certified'],
+    'references': ['references'],
+    'summary': ['about yourself', 'introduce yourself', 'who are you', 'summary'],
+    'work_authorization': ['work authorization', 'visa', 'sponsorship', 'authorized to work'],
+}
+
+FACT_ALIASES = {
+    'birthday': ['born', 'birth date'],
+    'current_pets': ['pets', 'pet', 'cats'],
+    'past_pets': ['dogs'],
+    'drink_of_choice': ['drink'],
+    'relocation': ['relocate'],
+    'work_mode': ['remote', 'hybrid', 'on-site'],
+    'graduation': ['graduate', 'graduating'],
+    'seeking': ['looking for', 'open to work'],
+    'role_preference': ['roles', 'role'],
+}
+
+PERSONAL_LINKS = ('phone', 'portfolio', 'github', 'linkedin', 'youtube', 'instagram', 'imdb')
+
+# Words that make a technology question about my experience rather than a definition
+EXPERIENCE_WORDS = {
+    'know', 'knew', 'use', 'used', 'uses', 'using', 'work', 'worked', 'working', 'experience', 'experienced',
+    'familiar', 'proficient', 'skilled', 'comfortable', 'tried', 'build', 'built', 'code', 'coded', 'program',
+    'project', 'projects', 'skill', 'skills', 'toolkit', 'stack', 'learned', 'learnt',
+}
+
+
+def is_word_char(char):
+    return char.isalnum() or char == '_'
+
+
+def asks_about_experience(question):
+    """True if a (lowercased) question asks whether or how I use something"""
+    return not EXPERIENCE_WORDS.isdisjoint(re.findall(r"[a-z]+", question))
+
+
+def name_variants(text):
+    """Lowercase match forms of a resume name, e.g. 'Supabase (PostgreSQL)'"""
+    text = str(text).lower().strip()
+    variants = [text]
+    if '(' in text and ')' in text:
+        variants.append(text.split('(')[0].strip())
+        inside = text[text.find('(') + 1:text.find(')')].strip()
+        if ',' not in inside and any(c.isalpha() for c in inside):
+            variants.append(inside)
+    for variant in list(variants):
+        if variant.endswith('.js'):
+            variants.append(variant[:-3])
+    return [v for v in variants if len(v) >= 2]
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton that finds every keyword in one pass"""
+
+    def __init__(self, keywords):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for keyword, value in keywords:
+            self.add(keyword, value)
+        self.build()
+
+    def add(self, keyword, value):
+        node = 0
+        for char in keyword:
+            child = self.goto[node].get(char)
+            if child is None:
+                child = len(self.goto)
+                self.goto[node][char] = child
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            node = child
+        self.output[node].append((keyword, value))
+
+    def build(self):
+        """Compute failure links breadth-first and merge suffix outputs"""
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[child] = target if target != child else 0
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def find(self, text):
+        """Yield (start, end, keyword, value) for every whole-word occurrence"""
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(char, 0)
+            for keyword, value in self.output[node]:
+                start, end = index - len(keyword) + 1, index + 1
+                if start > 0 and is_word_char(text[start - 1]) and is_word_char(keyword[0]):
+                    continue
+                if end < len(text) and is_word_char(text[end]) and is_word_char(keyword[-1]):
+                    continue
+                yield start, end, keyword, value
+
+
+class IntentRouter:
+    """Routes a question to a lazily rendered answer compiled from resume data"""
+
+    def __init__(self, resume):
+        self.resume = resume or {}
+        self.renderers = {}
+        self.priorities = {}
+        self.rendered = {}
+
+        patterns = {}
+        for intent, priority, keywords, render in self.intents():
+            self.renderers[intent] = render
+            self.priorities[intent] = priority
+            for keyword in keywords:
+                # The first intent to claim a keyword keeps it
+                patterns.setdefault(keyword.lower(), intent)
+        self.automaton = KeywordAutomaton(patterns.items())
+
+    def __len__(self):
+        return len(self.renderers)
+
+    def route(self, question, threshold=MATCH_THRESHOLD):
+        """Return (intent, score) for the best keyword match, or (None, 0)"""
+        question = question.lower()
+        best, best_key = None, None
+        experience = None
+        for _, _, keyword, intent in self.automaton.find(question):
+            if intent.startswith('tech:'):
+                if experience is None:
+                    experience = asks_about_experience(question)
+                if not experience:
+                    continue
+            score = 2.0 * len(keyword) / (len(question) + len(keyword))
+            if score <= threshold:
+                continue
+            key = (self.priorities[intent], score)
+            if best_key is None or key > best_key:
+                best, best_key = intent, key
+        return (best, best_key[1]) if best else (None, 0)
+
+    def answer(self, question):
+        """Rendered answer for a question, or None if no intent matches"""
+        intent, _ = self.route(question)
+        if intent is None:
+            return None
+        if intent not in self.rendered:
+            self.rendered[intent] = self.renderers[intent]()
+        return self.rendered[intent]
+
+    def render_all(self):
+        """Render every answer up front, so answer() only reads"""
+        for intent, render in self.renderers.items():
+            if intent not in self.rendered:
+                self.rendered[intent] = render()
+        return self.rendered
+
+    # ==================== INTENTS ====================
+
+    def intents(self):
+        """Yield (intent, priority, keywords, render) for everything in the resume"""
+        resume = self.resume
+        personal = resume.get('personal', {}) or {}
+
+        sections = {
+            'name': lambda: f"Hi! I'm {personal.get('name', 'Adarsh')} 👋",
+            'location': lambda: f"I'm based in {personal.get('location', 'the US')}",
+            'email': lambda: f"You can reach me at {personal.get('email', 'my email')}",
+            'contact': lambda: f"Email: {personal.get('email', '')} | Phone: {personal.get('phone', '')}",
+            'skills': self.format_skills,
+            'experience': self.format_experience,
+            'projects': self.format_projects,
+            'education': self.format_education,
+        }
+        if resume.get('achievements'):
+            sections['achievements'] = self.format_achievements
+        if resume.get('interests'):
+            sections['interests'] = self.format_interests
+        if resume.get('languages'):
+            sections['languages'] = lambda: f"I speak {join_words(resume['languages'])}."
+        if (resume.get('skills') or {}).get('certifications'):
+            sections['certifications'] = lambda: (
+                f"My certifications: {', '.join(resume['skills']['certifications'])}.")
+        if resume.get('references'):
+            sections['references'] = lambda: "References are available upon request."
+        if personal.get('summary'):
+            sections['summary'] = lambda: personal['summary'].strip()
+        if personal.get('work_authorization'):
+            sections['work_authorization'] = lambda: personal['work_authorization']
+        for intent, render in sections.items():
+            yield intent, SECTION, SECTION_KEYWORDS[intent], render
+
+        for key in PERSONAL_LINKS:
+            if personal.get(key):
+                yield (f"personal:{key}", ENTITY, [key],
+                       lambda key=key: f"My {key.replace('_', ' ')}: {personal[key]}")
+
+        for section in ('personal_facts', 'career_goals'):
+            for key, value in (resume.get(section) or {}).items():
+                if not value:
+                    continue
+                label = key.replace('_', ' ')
+                keywords = [label] + FACT_ALIASES.get(key, [])
+                if label.startswith('favorite '):
+                    keywords.append(label.replace('favorite', 'favourite', 1))
+                yield (f"{section}:{key}", ENTITY, keywords,
+                       lambda label=label, value=value: f"My {label}: {value}")
+
+        for project in resume.get('projects', []) or []:
+            if project.get('name'):
+                yield (f"project:{project['name']}", ENTITY, name_variants(project['name']),
+                       lambda project=project: self.format_project(project))
+
+        companies = []
+        for exp in resume.get('experience', []) or []:
+            if exp.get('company') and exp['company'] not in companies:
+                companies.append(exp['company'])
+        for company in companies:
+            # People usually shorten "Quinbay Technologies" to "Quinbay"
+            keywords = name_variants(company) + [company.split()[0].lower()]
+            yield (f"company:{company}", ENTITY, keywords,
+                   lambda company=company: self.format_company(company))
+
+        technologies = list(resume.get('keywords', []) or [])
+        for category, items in (resume.get('skills') or {}).items():
+            if category not in ('certifications', 'practices') and isinstance(items, list):
+                technologies.extend(items)
+        for tech in technologies:
+            yield (f"tech:{tech}", ENTITY, name_variants(tech),
+                   lambda tech=tech: self.format_tech(tech))
+
+    # ==================== RENDERING ====================
+
+    def format_skills(self):
+        """Format skills from resume"""
+        skills = self.resume.get('skills', {}) or {}
+        parts = []
+        if 'languages' in skills:
+            parts.append(f"Languages: {', '.join(skills['languages'])}")
+        if 'frameworks' in skills:
+            parts.append(f"Frameworks: {', '.join(skills['frameworks'])}")
+        if 'tools_and_technologies' in skills:
+            parts.append(f"Tools: {', '.join(skills['tools_and_technologies'])}")
+        if not parts:
+            for category, items in skills.items():
+                if category != 'certifications' and isinstance(items, list) and items:
+                    parts.append(f"{category_label(category)}: {', '.join(items[:6])}")
+        return " | ".join(parts) if parts else "I have various technical skills!"
+
+    def format_experience(self):
+        """Format work experience"""
+        experience = self.resume.get('experience', [])
+        if experience:
+            # Show the most recent experience (first in list)
+            exp = experience[0]
+            role = exp.get('role', 'Developer')
+            company = exp.get('company', 'company')
+            duration = exp.get('duration', 'duration')
+            responsibilities = exp.get('responsibilities', [])
+
+            if responsibilities:
+                return f"I'm currently working as a {role} at {company} ({duration}). {'. '.join(responsibilities[:2])}."
+            return f"I'm currently working as a {role} at {company} ({duration})."
+        return "I have professional experience in technology and software development."
+
+    def format_projects(self):
+        """Format projects"""
+        projects = self.resume.get('projects', [])
+        if projects:
+            project_names = [p.get('name', 'Project') for p in projects[:5]]
+            return f"I've built projects including: {', '.join(project_names)}. Each taught me valuable skills in development and problem-solving."
+        return "I enjoy building projects that solve real problems!"
+
+    def format_education(self):
+        """Format education"""
+        education = self.resume.get('education', [])
+        if education:
+            # Show the most recent education (Master's degree)
+            edu = education[0]
+            degree = edu.get('degree', 'degree')
+            university = edu.get('university', 'university')
+            year = edu.get('year', 'year')
+            gpa = edu.get('gpa', '')
+            location = edu.get('location', '')
+
+            if gpa and gpa != 'Pursuing':
+                return f"I'm pursuing a {degree} from {university} in {location} ({year}) with a GPA of {gpa}."
+            return f"I'm pursuing a {degree} from {university} in {location} ({year})."
+        return "I have a strong educational background in computer science."
+
+    def format_achievements(self):
+        """Format the top achievements"""
+        achievements = self.resume.get('achievements', [])[:4]
+        return "A few things I'm proud of:\n" + "\n".join(f"- {item}" for item in achievements)
+
+    def format_interests(self):
+        """Format technical and personal interests"""
+        interests = self.resume.get('interests', {})
+        if not isinstance(interests, dict):
+            return f"I'm into {join_words(interests[:5])}."
+        parts = []
+        if interests.get('technical'):
+            parts.append(f"Tech-wise I'm into {join_words(interests['technical'][:4])}")
+        if interests.get('personal'):
+            parts.append(f"outside of work I enjoy {join_words(interests['personal'][:4]).lower()}")
+        return (", and ".join(parts) + ".") if parts else "I have plenty of interests!"
+
+    def format_project(self, project):
+        """Format a single project"""
+        text = f"**{project['name']}**: {' '.join(str(project.get('description', '')).split())}"
+        technologies = project.get('technologies') or []
+        if technologies:
+            text += f"\n\nTech: {', '.join(technologies[:8])}"
+        live = project.get('live')
+        if live and live != 'N/A':
+            text += f"\n\nLive: {live}"
+        return text
+
+    def format_company(self, company):
+        """Format every role held at one company"""
+        roles = [exp for exp in self.resume.get('experience', []) if exp.get('company') == company]
+        lines = [f"{exp.get('role', 'Developer')} ({exp.get('duration', '')})" for exp in roles]
+        text = f"At {company} I worked as {join_words(lines)}."
+        responsibilities = roles[0].get('responsibilities', []) if roles else []
+        if responsibilities:
+            text += f" {'. '.join(responsibilities[:2])}."
+        return text
+
+    def format_tech(self, tech):
+        """Say where a technology shows up in my skills and projects"""
+        variants = name_variants(tech)
+
+        def uses(item):
+            item = str(item).lower()
+            return any(variant in item for variant in variants)
+
+        categories = [category_label(category)
+                      for category, items in (self.resume.get('skills') or {}).items()
+                      if isinstance(items, list) and any(uses(item) for item in items)]
+        projects = [project.get('name') for project in self.resume.get('projects', []) or []
+                    if any(uses(item) for item in project.get('technologies') or [])]
+
+        text = f"Yes! {tech} is part of my toolkit"
+        if categories:
+            text += f" ({', '.join(categories)})"
+        if projects:
+            text += f". I've used it in {join_words(projects[:4])}"
+        return text + "."
+
+
+def category_label(category):
+    labels = {'ai_genai': 'AI / GenAI', 'cloud_and_tools': 'Cloud & Tools'}
+    return labels.get(category, category.replace('_', ' ').title())
+
+
+def join_words(items):
+    items = [str(item) for item in items]
+    if len(items) <= 1:
+        return "".join(items)
+    return f"{', '.join(items[:-1])} and {items[-1]}"
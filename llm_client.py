@@ -0,0 +1,462 @@
+"""Pooled, keep-alive HTTP client for GROQ chat completions.
+
+All GROQ traffic from chatbot.py goes through GroqClient so connections are
+reused across requests in a worker, transient failures are retried with
+jittered backoff, and a circuit breaker fails fast while GROQ is down.
+AsyncGroqClient is the same client on httpx for the asyncio entry point.
+"""
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import percentile
+
+GROQ_API_URL = os.getenv('GROQ_API_URL', 'https://api.groq.com/openai/v1/chat/completions')
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """Raised when a GROQ call fails after retries"""
+
+    def __init__(self, message, status_code=None, body=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.body = body
+
+
+class LLMTimeoutError(LLMError):
+    """Raised when a GROQ call exceeds its timeout budget"""
+
+
+class CircuitOpenError(LLMError):
+    """Raised without calling GROQ while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a half-open trial call"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return self.CLOSED
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        """Return True if a call may go out right now"""
+        with self.lock:
+            state = self.state
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+            self.trial_in_flight = False
+
+
+def parse_retry_after(value):
+    """Convert a Retry-After header (seconds or HTTP date) into seconds"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class GroqClient:
+    """Keep-alive GROQ client with retries, circuit breaker and latency stats"""
+
+    def __init__(self, api_key, base_url=GROQ_API_URL, connect_timeout=5.0, read_timeout=30.0,
+                 total_timeout=30.0, max_retries=2, backoff_base=0.5, backoff_max=8.0,
+                 pool_size=10, breaker=None, latency_window=200, metrics=None):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.total_timeout = total_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        # Optional metrics.ChatMetrics fed with outcomes, token usage and errors
+        self.metrics = metrics
+
+        self.session = self._connect(api_key, pool_size)
+
+        self.latencies = deque(maxlen=latency_window)
+        self.last_latency = None
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.stats_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, api_key, metrics=None):
+        """Build a client using GROQ_* environment overrides"""
+        return cls(
+            api_key,
+            base_url=os.getenv('GROQ_API_URL', GROQ_API_URL),
+            total_timeout=float(os.getenv('GROQ_TIMEOUT', '30')),
+            max_retries=int(os.getenv('GROQ_MAX_RETRIES', '2')),
+            metrics=metrics,
+        )
+
+    # ==================== PUBLIC API ====================
+
+    def chat(self, payload):
+        """POST a chat completion and return the decoded JSON body"""
+        started = time.monotonic()
+        try:
+            response = self._send(dict(payload, stream=False), stream=False, started=started)
+            try:
+                body = response.json()
+            except ValueError as e:
+                raise LLMError(f"GROQ returned invalid JSON: {e}") from e
+        except LLMError as e:
+            self._record(started, ok=False, error=e)
+            raise
+        self._record(started, ok=True, usage=body.get('usage') if isinstance(body, dict) else None)
+        return body
+
+    def stream_chat(self, payload):
+        """Yield content tokens from a streamed chat completion.
+
+        Retries only cover establishing the stream; once tokens have been
+        yielded a failure is raised to the caller.
+        """
+        started = time.monotonic()
+        try:
+            response = self._send(dict(payload, stream=True), stream=True, started=started)
+        except LLMError as e:
+            self._record(started, ok=False, error=e)
+            raise
+
+        ok = False
+        error = None
+        usage = None
+        try:
+            # GROQ streams OpenAI-style SSE lines: "data: {...}" ... "data: [DONE]"
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
+                data = line[len('data:'):].strip()
+                if data == '[DONE]':
+                    break
+                chunk = json.loads(data)
+                # Usage rides on the last chunk (GROQ puts it under x_groq)
+                usage = chunk.get('usage') or (chunk.get('x_groq') or {}).get('usage') or usage
+                if not chunk.get('choices'):
+                    continue
+                delta = chunk['choices'][0].get('delta', {})
+                token = delta.get('content')
+                if token:
+                    yield token
+            ok = True
+        except requests.exceptions.Timeout as e:
+            error = LLMTimeoutError(f"GROQ stream timed out: {e}")
+            raise error from e
+        except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+            error = LLMError(f"GROQ stream failed: {e}")
+            raise error from e
+        finally:
+            response.close()
+            self._record(started, ok=ok, usage=usage, error=error)
+
+    def stats(self):
+        """Return call counters, latency percentiles and breaker state"""
+        with self.stats_lock:
+            samples = sorted(self.latencies)
+            calls, failures, retries = self.calls, self.failures, self.retries
+        return {
+            'calls': calls,
+            'failures': failures,
+            'retries': retries,
+            'circuit': self.breaker.state,
+            'last_latency': self.last_latency,
+            'p50_latency': percentile(samples, 50),
+            'p95_latency': percentile(samples, 95),
+        }
+
+    def close(self):
+        self.session.close()
+
+    # ==================== INTERNALS ====================
+
+    def _connect(self, api_key, pool_size):
+        """Keep-alive session shared by every call"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({
+            'Authorization': f'Bearer {api_key}',
+            'Content-Type': 'application/json'
+        })
+        return session
+
+    def _send(self, payload, stream, started):
+        """Send one request with retries inside the total timeout budget"""
+        if not self.breaker.allow():
+            raise CircuitOpenError("GROQ circuit breaker is open")
+
+        deadline = started + self.total_timeout
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.breaker.record_failure()
+                raise LLMTimeoutError("GROQ timeout budget exhausted")
+
+            retry_after = None
+            try:
+                response = self.session.post(
+                    self.base_url,
+                    json=payload,
+                    timeout=(min(self.connect_timeout, remaining), min(self.read_timeout, remaining)),
+                    stream=stream
+                )
+            except requests.exceptions.Timeout as e:
+                error = LLMTimeoutError(f"GROQ request timed out: {e}")
+            except requests.exceptions.RequestException as e:
+                error = LLMError(f"GROQ request failed: {e}")
+            else:
+                if response.status_code == 200:
+                    self.breaker.record_success()
+                    return response
+                body = _safe_json(response)
+                error = LLMError(f"GROQ API error: {response.status_code}",
+                                 status_code=response.status_code, body=body)
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                response.close()
+                if response.status_code not in RETRYABLE_STATUS:
+                    # Client errors (bad key, bad payload) are not GROQ outages
+                    self.breaker.record_success()
+                    raise error
+
+            if attempt >= self.max_retries:
+                self.breaker.record_failure()
+                raise error
+
+            delay = retry_after if retry_after is not None else self._backoff(attempt)
+            if time.monotonic() + delay >= deadline:
+                self.breaker.record_failure()
+                raise error
+
+            attempt += 1
+            with self.stats_lock:
+                self.retries += 1
+            time.sleep(delay)
+
+    def _backoff(self, attempt):
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _record(self, started, ok, usage=None, error=None):
+        latency = time.monotonic() - started
+        with self.stats_lock:
+            self.calls += 1
+            if not ok:
+                self.failures += 1
+            self.latencies.append(latency)
+            self.last_latency = latency
+
+        if self.metrics is not None:
+            self.metrics.groq_calls.inc(outcome='ok' if ok else 'error')
+            self.metrics.record_usage(usage)
+            if not ok:
+                self.metrics.groq_errors.inc(**error_labels(error))
+
+
+# ==================== ASYNC CLIENT ====================
+
+class AsyncGroqClient(GroqClient):
+    """asyncio twin of GroqClient for the ASGI entry point (asgi.py).
+
+    One pooled httpx.AsyncClient lets hundreds of completions wait on GROQ at
+    once without each pinning a worker thread. Retries, the timeout budget,
+    the circuit breaker, stats and metrics are shared with GroqClient.
+    """
+
+    def __init__(self, api_key, pool_size=100, **kwargs):
+        super().__init__(api_key, pool_size=pool_size, **kwargs)
+
+    async def chat(self, payload):
+        """POST a chat completion and return the decoded JSON body"""
+        started = time.monotonic()
+        try:
+            response = await self._send(dict(payload, stream=False), stream=False, started=started)
+            try:
+                body = response.json()
+            except ValueError as e:
+                raise LLMError(f"GROQ returned invalid JSON: {e}") from e
+        except LLMError as e:
+            self._record(started, ok=False, error=e)
+            raise
+        self._record(started, ok=True, usage=body.get('usage') if isinstance(body, dict) else None)
+        return body
+
+    async def stream_chat(self, payload):
+        """Async-iterate content tokens from a streamed chat completion"""
+        started = time.monotonic()
+        try:
+            response = await self._send(dict(payload, stream=True), stream=True, started=started)
+        except LLMError as e:
+            self._record(started, ok=False, error=e)
+            raise
+
+        ok = False
+        error = None
+        usage = None
+        try:
+            async for line in response.aiter_lines():
+                if not line or not line.startswith('data:'):
+                    continue
+                data = line[len('data:'):].strip()
+                if data == '[DONE]':
+                    break
+                chunk = json.loads(data)
+                usage = chunk.get('usage') or (chunk.get('x_groq') or {}).get('usage') or usage
+                if not chunk.get('choices'):
+                    continue
+                token = chunk['choices'][0].get('delta', {}).get('content')
+                if token:
+                    yield token
+            ok = True
+        except self.httpx.TimeoutException as e:
+            error = LLMTimeoutError(f"GROQ stream timed out: {e}")
+            raise error from e
+        except (self.httpx.HTTPError, ValueError, KeyError) as e:
+            error = LLMError(f"GROQ stream failed: {e}")
+            raise error from e
+        finally:
+            await response.aclose()
+            self._record(started, ok=ok, usage=usage, error=error)
+
+    async def close(self):
+        await self.session.aclose()
+
+    def _connect(self, api_key, pool_size):
+        # httpx is only needed when serving through asgi.py
+        import httpx
+        self.httpx = httpx
+        return httpx.AsyncClient(
+            headers={'Authorization': f'Bearer {api_key}', 'Content-Type': 'application/json'},
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    async def _send(self, payload, stream, started):
+        """Send one request with retries inside the total timeout budget"""
+        if not self.breaker.allow():
+            raise CircuitOpenError("GROQ circuit breaker is open")
+
+        deadline = started + self.total_timeout
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.breaker.record_failure()
+                raise LLMTimeoutError("GROQ timeout budget exhausted")
+
+            retry_after = None
+            timeout = self.httpx.Timeout(min(self.read_timeout, remaining),
+                                         connect=min(self.connect_timeout, remaining))
+            try:
+                request = self.session.build_request('POST', self.base_url, json=payload, timeout=timeout)
+                response = await self.session.send(request, stream=stream)
+            except self.httpx.TimeoutException as e:
+                error = LLMTimeoutError(f"GROQ request timed out: {e}")
+            except self.httpx.HTTPError as e:
+                error = LLMError(f"GROQ request failed: {e}")
+            else:
+                if response.status_code == 200:
+                    self.breaker.record_success()
+                    return response
+                await response.aread()
+                body = _safe_json(response)
+                error = LLMError(f"GROQ API error: {response.status_code}",
+                                 status_code=response.status_code, body=body)
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                await response.aclose()
+                if response.status_code not in RETRYABLE_STATUS:
+                    self.breaker.record_success()
+                    raise error
+
+            if attempt >= self.max_retries:
+                self.breaker.record_failure()
+                raise error
+
+            delay = retry_after if retry_after is not None else self._backoff(attempt)
+            if time.monotonic() + delay >= deadline:
+                self.breaker.record_failure()
+                raise error
+
+            attempt += 1
+            with self.stats_lock:
+                self.retries += 1
+            await asyncio.sleep(delay)
+
+
+def error_labels(error):
+    """Metric labels for a failed call, preferring the error code in the body"""
+    if isinstance(error, CircuitOpenError):
+        return {'reason': 'circuit_open'}
+    if isinstance(error, LLMTimeoutError):
+        return {'reason': 'timeout'}
+    if error is None:
+        # A stream abandoned by the caller before it finished
+        return {'reason': 'incomplete'}
+    labels = {'reason': 'error'}
+    details = error.body.get('error') if isinstance(error.body, dict) else None
+    if isinstance(details, dict):
+        labels['reason'] = str(details.get('code') or details.get('type') or 'error')
+    if error.status_code:
+        labels['status'] = str(error.status_code)
+    return labels
+
+
+def _safe_json(response):
+    try:
+        return response.json()
+    except ValueError:
+        return None
@@ -0,0 +1,278 @@
+"""Answer latency tracking and Prometheus-style metrics.
+
+LatencyRecorder keeps exact recent percentiles per answer tier for the admin
+stats page. ChatMetrics holds counters and histograms for answer tiers,
+answering stages and GROQ calls; /metrics renders them in the Prometheus text
+format. Both are per process, so each worker reports its own numbers.
+"""
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+TIERS = ('help', 'learned', 'resume', 'cache', 'ai', 'shed')
+
+
+def percentile(sorted_samples, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_samples:
+        return None
+    rank = max(0, min(len(sorted_samples) - 1, math.ceil(pct / 100.0 * len(sorted_samples)) - 1))
+    return sorted_samples[rank]
+
+
+class LatencyRecorder:
+    """Keeps the most recent answer latencies per tier in bounded windows"""
+
+    def __init__(self, window=1000):
+        self.window = window
+        self.samples = {tier: deque(maxlen=window) for tier in TIERS}
+        self.counts = {tier: 0 for tier in TIERS}
+        self.lock = threading.Lock()
+
+    def record(self, tier, seconds):
+        with self.lock:
+            if tier not in self.samples:
+                self.samples[tier] = deque(maxlen=self.window)
+                self.counts[tier] = 0
+            self.samples[tier].append(seconds)
+            self.counts[tier] += 1
+
+    def summary(self):
+        """{tier: {count, p50, p95, p99}} in milliseconds"""
+        with self.lock:
+            snapshot = {tier: (self.counts[tier], sorted(samples)) for tier, samples in self.samples.items()}
+        summary = {}
+        for tier, (count, samples) in snapshot.items():
+            summary[tier] = {'count': count}
+            for pct in (50, 95, 99):
+                value = percentile(samples, pct)
+                summary[tier][f'p{pct}'] = value * 1000 if value is not None else None
+        return summary
+
+
+# ==================== PROMETHEUS METRICS ====================
+
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PROMPT_TOKEN_BUCKETS = (250, 500, 750, 1000, 1500, 2000, 3000, 4000, 6000, 8000)
+
+
+def format_labels(labels):
+    """Render a label tuple as {name="value",...} in exposition format"""
+    if not labels:
+        return ''
+    escaped = []
+    for name, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{name}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+def format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return f"{value:g}" if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    kind = 'counter'
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def totals(self):
+        """{label tuple: value}"""
+        with self.lock:
+            return dict(self.values)
+
+    def render(self):
+        return [f"{self.name}{format_labels(key)} {format_value(value)}"
+                for key, value in sorted(self.totals().items())]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][i] += 1
+                    break
+            series['sum'] += value
+            series['count'] += 1
+
+    def snapshot(self):
+        """{label tuple: {'buckets': cumulative counts, 'sum', 'count'}}"""
+        with self.lock:
+            series = {key: dict(s, buckets=list(s['buckets'])) for key, s in self.series.items()}
+        for s in series.values():
+            running = 0
+            for i, count in enumerate(s['buckets']):
+                running += count
+                s['buckets'][i] = running
+        return series
+
+    def quantile(self, q, cumulative, count):
+        """Estimate a quantile from cumulative buckets, like histogram_quantile()"""
+        if not count:
+            return None
+        rank = q * count
+        lower, below = 0.0, 0
+        for bound, running in zip(self.buckets, cumulative):
+            if running >= rank:
+                if bound == math.inf:
+                    return lower
+                in_bucket = running - below
+                return lower + (bound - lower) * ((rank - below) / in_bucket if in_bucket else 0)
+            lower, below = bound, running
+        return lower
+
+    def summary(self):
+        """{label tuple: {count, mean, p50, p95}} with times in milliseconds"""
+        summary = {}
+        for key, s in self.snapshot().items():
+            p50, p95 = (self.quantile(q, s['buckets'], s['count']) for q in (0.5, 0.95))
+            summary[key] = {
+                'count': s['count'],
+                'mean': s['sum'] / s['count'] * 1000 if s['count'] else None,
+                'p50': p50 * 1000 if p50 is not None else None,
+                'p95': p95 * 1000 if p95 is not None else None,
+            }
+        return summary
+
+    def render(self):
+        lines = []
+        for key, s in sorted(self.snapshot().items()):
+            for bound, running in zip(self.buckets, s['buckets']):
+                lines.append(f"{self.name}_bucket{format_labels(key + (('le', format_value(bound)),))} {running}")
+            lines.append(f"{self.name}_sum{format_labels(key)} {s['sum']:g}")
+            lines.append(f"{self.name}_count{format_labels(key)} {s['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named counters and histograms rendered in Prometheus text format"""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def counter(self, name, help_text):
+        return self.metrics.setdefault(name, Counter(name, help_text))
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self.metrics.setdefault(name, Histogram(name, help_text, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class ChatMetrics(MetricsRegistry):
+    """The chatbot's answer, stage and GROQ metrics"""
+
+    def __init__(self):
+        super().__init__()
+        self.answers = self.histogram('chatbot_answer_seconds', "Time to answer a question, by answer tier")
+        self.stages = self.histogram('chatbot_stage_seconds', "Time spent in each answering stage")
+        self.requests = self.histogram('chatbot_request_seconds', "Time spent in the chat route, by response mode")
+        self.groq_calls = self.counter('groq_requests_total', "GROQ chat completions, by outcome")
+        self.groq_tokens = self.counter('groq_tokens_total', "GROQ tokens reported in response bodies, by kind")
+        self.groq_errors = self.counter('groq_errors_total', "Failed GROQ calls, by reason")
+        self.prompt_tokens = self.histogram('chatbot_prompt_tokens', "Estimated tokens in each AI prompt",
+                                            buckets=PROMPT_TOKEN_BUCKETS)
+        self.coalesced = self.counter('chatbot_coalesced_total', "AI questions answered by an identical in-flight call")
+        self.limited = self.counter('chatbot_limited_total', "AI questions refused by the rate limiter, by bucket")
+        self.shed = self.counter('chatbot_shed_total', "Refused AI questions answered without GROQ, by fallback")
+        self.answer_gets = self.counter('chatbot_answer_get_total', "GET /api/answer requests, by result")
+        self.model_routes = self.counter('chatbot_model_routes_total', "AI questions routed to each model, by reason")
+        self.model_fallbacks = self.counter('chatbot_model_fallbacks_total',
+                                            "AI calls that also asked the other model, by cause")
+        self.model_seconds = self.histogram('chatbot_model_seconds',
+                                            "Time until the winning model answered (or sent its first token)")
+
+    @contextmanager
+    def span(self, stage):
+        """Time a block of work as one answering stage"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.observe(time.perf_counter() - started, stage=stage)
+
+    def record_usage(self, usage):
+        """Count token usage from a GROQ response body"""
+        for kind in ('prompt', 'completion'):
+            tokens = (usage or {}).get(f'{kind}_tokens')
+            if tokens:
+                self.groq_tokens.inc(tokens, kind=kind)
+
+    def summary(self):
+        """Plain dicts for the admin stats page"""
+        answers = {dict(key).get('tier'): value for key, value in self.answers.summary().items()}
+        answered = sum(value['count'] for value in answers.values())
+        for value in answers.values():
+            value['ratio'] = value['count'] / answered if answered else 0
+
+        calls = {dict(key).get('outcome'): value for key, value in self.groq_calls.totals().items()}
+        total_calls = sum(calls.values())
+        tokens = {dict(key).get('kind'): value for key, value in self.groq_tokens.totals().items()}
+        prompt = self.prompt_tokens.snapshot().get((), {'sum': 0, 'count': 0})
+        errors = {}
+        for key, value in self.groq_errors.totals().items():
+            reason = dict(key).get('reason', 'error')
+            errors[reason] = errors.get(reason, 0) + value
+
+        return {
+            'answers': answers,
+            'stages': {dict(key).get('stage'): value for key, value in self.stages.summary().items()},
+            'groq': {
+                'calls': total_calls,
+                'error_rate': calls.get('error', 0) / total_calls if total_calls else 0,
+                'prompt_tokens': tokens.get('prompt', 0),
+                'completion_tokens': tokens.get('completion', 0),
+                'errors': errors,
+                'coalesced': sum(self.coalesced.totals().values()),
+                'prompt_estimate': prompt['sum'] / prompt['count'] if prompt['count'] else None,
+            },
+            'admission': {
+                'limited': {dict(key).get('scope'): value for key, value in self.limited.totals().items()},
+                'shed': {dict(key).get('fallback'): value for key, value in self.shed.totals().items()},
+            },
+            'answer_get': {dict(key).get('result'): value for key, value in self.answer_gets.totals().items()},
+            'models': {
+                'routes': {f"{dict(key).get('model')} ({dict(key).get('reason')})": value
+                           for key, value in sorted(self.model_routes.totals().items())},
+                'fallbacks': {dict(key).get('cause'): value for key, value in self.model_fallbacks.totals().items()},
+                'latency': {f"{dict(key).get('model')} {dict(key).get('mode')}": value
+                            for key, value in sorted(self.model_seconds.summary().items())},
+            },
+        }
@@ -0,0 +1,302 @@
+"""Picks the GROQ model for each AI question and hedges slow calls.
+
+Every AI question used to go to llama-3.3-70b-versatile, including short
+fact questions whose answer is already in the retrieved context. ModelRouter
+sends those to a small, fast model and keeps the large one for long
+questions, tasks (write, design, explain...) and anything the resume and
+learned answers don't cover. It uses only cheap features: word count, task
+words, the intent router's best keyword match and the top BM25 score.
+
+The large model then gets a latency budget. If it hasn't answered (or, when
+streaming, sent its first token) by then, the same prompt goes to the fast
+model as well and the first one to answer wins. An error before the first
+token fails over to the other model straight away.
+
+What happens to the loser depends on the call. Async calls are cancelled
+outright, and a losing stream is closed at its next chunk. A blocking
+non-stream chat in a worker thread cannot be interrupted, so the losing call
+runs to completion in the background (its tokens are still billed) and its
+answer is dropped.
+"""
+import asyncio
+import os
+import queue
+import threading
+import time
+
+from llm_client import LLMError
+
+FAST_MODEL = 'llama-3.1-8b-instant'
+LARGE_MODEL = 'llama-3.3-70b-versatile'
+MODES = ('auto', 'fast', 'large')
+# Words that ask for work rather than a fact
+TASK_WORDS = {'write', 'code', 'implement', 'design', 'explain', 'compare', 'debug', 'function', 'algorithm',
+              'architecture', 'optimize', 'essay', 'poem', 'translate', 'review', 'plan'}
+# Lowest intent router score (2*len(keyword)/(len(question)+len(keyword))) that marks a fact question
+INTENT_MIN_SCORE = 0.2
+
+
+def question_words(question):
+    return [word.strip("?!.,;:'\"()") for word in question.lower().split()]
+
+
+class ModelRouter:
+    """Chooses fast or large per question and races the other model when one is slow or fails"""
+
+    def __init__(self, fast_model=FAST_MODEL, large_model=LARGE_MODEL, mode='auto', latency_budget=4.0,
+                 first_token_budget=1.5, fast_max_words=20, short_words=6, fast_min_score=6.0, metrics=None):
+        self.fast_model = fast_model
+        self.large_model = large_model
+        self.mode = mode if mode in MODES else 'auto'
+        # Seconds the large model gets before the fast one is asked too (0 turns hedging off)
+        self.latency_budget = latency_budget
+        self.first_token_budget = first_token_budget
+        self.fast_max_words = fast_max_words
+        self.short_words = short_words
+        self.fast_min_score = fast_min_score
+        self.metrics = metrics
+
+    @classmethod
+    def from_env(cls, metrics=None):
+        return cls(
+            fast_model=os.getenv('GROQ_FAST_MODEL', FAST_MODEL),
+            large_model=os.getenv('GROQ_LARGE_MODEL', LARGE_MODEL),
+            mode=os.getenv('MODEL_ROUTING', 'auto').lower(),
+            latency_budget=float(os.getenv('MODEL_LATENCY_BUDGET', '4')),
+            first_token_budget=float(os.getenv('MODEL_FIRST_TOKEN_BUDGET', '1.5')),
+            fast_max_words=int(os.getenv('MODEL_FAST_MAX_WORDS', '20')),
+            fast_min_score=float(os.getenv('MODEL_FAST_MIN_SCORE', '6.0')),
+            metrics=metrics,
+        )
+
+    def choose(self, question, intent_score=0.0, retrieval_score=0.0):
+        """(model, reason) for a question from its length, wording and match scores"""
+        if self.mode == 'fast':
+            return self.fast_model, 'forced'
+        if self.mode == 'large':
+            return self.large_model, 'forced'
+        words = question_words(question)
+        if len(words) > self.fast_max_words:
+            return self.large_model, 'long'
+        if TASK_WORDS.intersection(words):
+            return self.large_model, 'task'
+        if intent_score >= INTENT_MIN_SCORE:
+            return self.fast_model, 'intent'
+        if retrieval_score >= self.fast_min_score:
+            return self.fast_model, 'retrieval'
+        if len(words) <= self.short_words:
+            return self.fast_model, 'short'
+        return self.large_model, 'default'
+
+    def record_route(self, model, reason):
+        if self.metrics is not None:
+            self.metrics.model_routes.inc(model=model, reason=reason)
+
+    def plan(self, payload, stream):
+        """[(model, payload)] in the order to try, and the budget before hedging"""
+        model = payload['model']
+        other = self.fast_model if model == self.large_model else self.large_model
+        calls = [(model, payload)]
+        if other != model:
+            calls.append((other, dict(payload, model=other)))
+        # Only a slow large model is worth a second call; a slow fast model would be slower still
+        budget = self.first_token_budget if stream else self.latency_budget
+        return calls, budget if model == self.large_model and budget > 0 else None
+
+    def race(self, start, payload, stream=False):
+        """ModelRace over start(payload), e.g. GroqClient.chat or stream_chat"""
+        calls, budget = self.plan(payload, stream)
+        return ModelRace(self, start, calls, budget, stream)
+
+    def race_async(self, start, payload, stream=False):
+        calls, budget = self.plan(payload, stream)
+        return AsyncModelRace(self, start, calls, budget, stream)
+
+
+class ModelRace:
+    """Iterates the chunks of whichever model answers first
+
+    chat calls yield one item (the response body), stream calls yield tokens.
+    model, hedged and latency (to the first item) are set once a model wins.
+    The loser's thread is not waited for: a stream stops at its next chunk,
+    a non-stream call finishes its request and the body is dropped.
+    """
+
+    def __init__(self, router, start, calls, budget, stream):
+        self.router = router
+        self.start = start
+        self.calls = calls
+        self.budget = budget
+        self.stream = stream
+        self.model = None
+        self.hedged = None
+        self.latency = None
+        self.started = None
+        self.running = []
+        self.errors = {}
+        self.cancelled = [threading.Event() for _ in calls]
+        self.results = queue.Queue()
+
+    def __iter__(self):
+        self.started = time.monotonic()
+        self.launch()
+        try:
+            winner = None
+            while winner is None:
+                try:
+                    index, kind, value = self.results.get(timeout=self.wait_time())
+                except queue.Empty:
+                    self.launch('budget')
+                    continue
+                if self.take(index, kind, value):
+                    winner = index
+            while True:
+                if index == winner:
+                    if kind == 'done':
+                        return
+                    if kind == 'error':
+                        raise value
+                    yield value
+                index, kind, value = self.results.get()
+        finally:
+            for event in self.cancelled:
+                event.set()
+
+    def result(self):
+        """The winning chat response body"""
+        chunks = iter(self)
+        try:
+            for body in chunks:
+                return body
+        finally:
+            chunks.close()
+        raise LLMError("GROQ returned no response")
+
+    # ==================== INTERNALS ====================
+
+    def spawn(self, index):
+        threading.Thread(target=self.run, args=(index,), name=f"model-{self.calls[index][0]}", daemon=True).start()
+
+    def run(self, index):
+        """Thread body: push every chunk from one model onto the shared queue
+
+        cancel() is only seen between chunks, so a chat call that lost the
+        race still blocks here until its response arrives.
+        """
+        chunks = None
+        try:
+            result = self.start(self.calls[index][1])
+            chunks = result if self.stream else [result]
+            for chunk in chunks:
+                if self.cancelled[index].is_set():
+                    return
+                self.results.put((index, 'chunk', chunk))
+            self.results.put((index, 'done', None))
+        except Exception as e:
+            self.results.put((index, 'error', e))
+        finally:
+            if hasattr(chunks, 'close'):
+                # Releases the losing model's connection
+                chunks.close()
+
+    def launch(self, cause=None):
+        """Start the next model in the plan; cause is 'budget' or 'error' for the second one"""
+        index = len(self.running)
+        if cause:
+            self.hedged = cause
+            print(f"🔀 {self.calls[0][0]} {'too slow' if cause == 'budget' else 'failed'}, "
+                  f"also asking {self.calls[index][0]}")
+            if self.router.metrics is not None:
+                self.router.metrics.model_fallbacks.inc(cause=cause)
+        self.running.append(index)
+        self.spawn(index)
+
+    def wait_time(self):
+        """Seconds to wait for a result before hedging, or None to wait for good"""
+        if self.budget is None or len(self.running) == len(self.calls):
+            return None
+        return max(0.0, self.started + self.budget - time.monotonic())
+
+    def take(self, index, kind, value):
+        """Handle a result that arrived before any model won; True if this one wins"""
+        if kind == 'error':
+            self.errors[index] = value
+            if len(self.running) < len(self.calls):
+                self.launch('error')
+            elif len(self.errors) == len(self.running):
+                raise self.errors[0]
+            return False
+        self.model = self.calls[index][0]
+        self.latency = time.monotonic() - self.started
+        if self.router.metrics is not None:
+            self.router.metrics.model_seconds.observe(self.latency, model=self.model,
+                                                      mode='first_token' if self.stream else 'chat')
+        for other in self.running:
+            if other != index:
+                self.cancel(other)
+        return True
+
+    def cancel(self, index):
+        self.cancelled[index].set()
+
+
+class AsyncModelRace(ModelRace):
+    """asyncio twin of ModelRace: each model runs as a task and the losers are cancelled"""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.results = asyncio.Queue()
+        self.tasks = {}
+
+    async def __aiter__(self):
+        self.started = time.monotonic()
+        self.launch()
+        try:
+            winner = None
+            while winner is None:
+                try:
+                    index, kind, value = await asyncio.wait_for(self.results.get(), self.wait_time())
+                except asyncio.TimeoutError:
+                    self.launch('budget')
+                    continue
+                if self.take(index, kind, value):
+                    winner = index
+            while True:
+                if index == winner:
+                    if kind == 'done':
+                        return
+                    if kind == 'error':
+                        raise value
+                    yield value
+                index, kind, value = await self.results.get()
+        finally:
+            for index in self.tasks:
+                self.cancel(index)
+
+    async def result(self):
+        chunks = self.__aiter__()
+        try:
+            async for body in chunks:
+                return body
+        finally:
+            await chunks.aclose()
+        raise LLMError("GROQ returned no response")
+
+    def spawn(self, index):
+        self.tasks[index] = asyncio.ensure_future(self.run_async(index))
+
+    async def run_async(self, index):
+        try:
+            if self.stream:
+                async for chunk in self.start(self.calls[index][1]):
+                    await self.results.put((index, 'chunk', chunk))
+            else:
+                await self.results.put((index, 'chunk', await self.start(self.calls[index][1])))
+            await self.results.put((index, 'done', None))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await self.results.put((index, 'error', e))
+
+    def cancel(self, index):
+        self.tasks[index].cancel()
@@ -0,0 +1,242 @@
+"""Relevance-selected, token-budgeted context for the AI prompt.
+
+generate_ai_response used to send the 25 most recent learned pairs and the
+top-5 project dump with every question, relevant or not. PromptContext
+instead keeps a BM25 index over resume.yaml chunks (projects, experience,
+education, achievements, skill groups, facts, goals, interests) and learned
+Q&A pairs, and picks the best-scoring pieces for a question until the token
+budget is spent.
+
+The index is built once and updated as pairs are saved, edited or deleted,
+so a lookup only touches the postings of the question's own terms.
+"""
+import heapq
+import math
+import re
+from collections import defaultdict
+
+# BM25 parameters (the usual Okapi defaults)
+K1 = 1.2
+B = 0.75
+
+# Words that say nothing about which chunk is relevant
+STOPWORDS = {
+    'a', 'about', 'adarsh', 'all', 'am', 'an', 'and', 'any', 'are', 'as', 'at', 'be', 'been', 'but', 'by',
+    'can', 'could', 'did', 'do', 'does', 'for', 'from', 'had', 'has', 'have', 'he', 'his', 'how', 'i', 'if',
+    'in', 'into', 'is', 'it', 'its', 'me', 'my', 'of', 'on', 'or', 'our', 'so', 'tell', 'than', 'that', 'the',
+    'their', 'them', 'then', 'there', 'these', 'they', 'this', 'to', 'us', 'was', 'we', 'were', 'what',
+    'when', 'where', 'which', 'who', 'why', 'will', 'with', 'would', 'you', 'your',
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+
+
+def tokenize(text):
+    """Lowercase terms without stopwords; plurals folded onto the singular"""
+    terms = []
+    for term in TOKEN_PATTERN.findall(text.lower()):
+        if term in STOPWORDS:
+            continue
+        if len(term) > 3 and term.endswith('s') and not term.endswith('ss'):
+            term = term[:-1]
+        terms.append(term)
+    return terms
+
+
+def estimate_tokens(text):
+    """Rough LLM token count (~4 characters per token for English)"""
+    return (len(text) + 3) // 4
+
+
+def label(key):
+    return key.replace('_', ' ').title()
+
+
+def clean(text):
+    return " ".join(str(text).split())
+
+
+def resume_chunks(resume):
+    """(chunk_id, text) pieces of resume.yaml small enough to select individually"""
+    chunks = []
+    for project in resume.get('projects') or []:
+        text = f"Project {project.get('name')} ({project.get('category', 'project')}): {clean(project.get('description', ''))}"
+        if project.get('technologies'):
+            text += f" Tech: {', '.join(project['technologies'])}."
+        if project.get('impact'):
+            text += f" Impact: {project['impact']}."
+        if project.get('live'):
+            text += f" Live: {project['live']}"
+        chunks.append((f"project:{project.get('name')}", text))
+
+    for i, job in enumerate(resume.get('experience') or []):
+        details = (job.get('responsibilities') or []) + (job.get('achievements') or [])
+        chunks.append((f"experience:{i}", f"Experience: {job.get('role')} at {job.get('company')} "
+                                          f"({job.get('duration')}, {job.get('location')}). {' '.join(details)}"))
+
+    for i, school in enumerate(resume.get('education') or []):
+        text = f"Education: {school.get('degree')} at {school.get('university')} ({school.get('year')})"
+        if school.get('gpa'):
+            text += f", GPA {school['gpa']}"
+        if school.get('scholarship'):
+            text += f". {school['scholarship']}"
+        chunks.append((f"education:{i}", f"{text}. {clean(school.get('description', ''))}".strip()))
+
+    for i, achievement in enumerate(resume.get('achievements') or []):
+        chunks.append((f"achievement:{i}", f"Achievement: {achievement}"))
+
+    for category, items in (resume.get('skills') or {}).items():
+        items = ', '.join(map(str, items)) if isinstance(items, list) else items
+        chunks.append((f"skills:{category}", f"{label(category)} skills: {items}"))
+
+    for key, value in (resume.get('personal_facts') or {}).items():
+        chunks.append((f"fact:{key}", f"{label(key)}: {value}"))
+
+    for key, value in (resume.get('career_goals') or {}).items():
+        chunks.append((f"goal:{key}", f"Career goal - {label(key)}: {value}"))
+
+    interests = resume.get('interests') or {}
+    if isinstance(interests, list):
+        # validate_resume also accepts a plain list of interests
+        interests = {'general': interests}
+    for kind, items in interests.items():
+        chunks.append((f"interests:{kind}", f"{label(kind)} interests: {', '.join(map(str, items or []))}"))
+
+    if resume.get('languages'):
+        chunks.append(("languages", f"Spoken languages: {', '.join(map(str, resume['languages']))}"))
+    return chunks
+
+
+def qa_document(qa_data):
+    """Indexed text of a learned pair: questions carry the intent, answers add the vocabulary"""
+    question = qa_data.get('question', '')
+    return f"{question} {question} {qa_data.get('answer', '')}"
+
+
+def qa_text(qa_data):
+    """Prompt text of a learned pair"""
+    return f"Q: {qa_data.get('question', '')}\nA: {qa_data.get('answer', '')}"
+
+
+def idf(count, df):
+    return math.log(1 + (count - df + 0.5) / (df + 0.5))
+
+
+def term_weight(idf_value, tf, length, average):
+    return idf_value * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / average))
+
+
+class BM25Index:
+    """Okapi BM25 over short documents, updated incrementally"""
+
+    def __init__(self):
+        self.postings = defaultdict(dict)
+        self.doc_terms = {}
+        self.lengths = {}
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def add(self, doc_id, text):
+        self.remove(doc_id)
+        counts = defaultdict(int)
+        terms = tokenize(text)
+        for term in terms:
+            counts[term] += 1
+        for term, count in counts.items():
+            self.postings[term][doc_id] = count
+        self.doc_terms[doc_id] = tuple(counts)
+        self.lengths[doc_id] = len(terms)
+        self.total_length += len(terms)
+
+    def remove(self, doc_id):
+        length = self.lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self.total_length -= length
+        for term in self.doc_terms.pop(doc_id):
+            docs = self.postings[term]
+            docs.pop(doc_id, None)
+            if not docs:
+                del self.postings[term]
+
+    def search(self, query, limit=10):
+        """Best (score, doc_id) pairs for a query, highest first"""
+        if not self.lengths:
+            return []
+        count = len(self.lengths)
+        average = self.total_length / count or 1
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            weight = idf(count, len(docs))
+            for doc_id, tf in docs.items():
+                scores[doc_id] += term_weight(weight, tf, self.lengths[doc_id], average)
+        return heapq.nlargest(limit, ((score, doc_id) for doc_id, score in scores.items()))
+
+
+class PromptContext:
+    """Resume chunks and learned pairs, selected per question under a token budget"""
+
+    def __init__(self, resume, learned_qa=None, token_budget=500, max_pieces=8, index=None, texts=None, chunks=None):
+        self.token_budget = token_budget
+        self.max_pieces = max_pieces
+        # shared_snapshot passes an index and texts that also cover the mapped snapshot's pairs
+        self.index = index if index is not None else BM25Index()
+        self.texts = texts if texts is not None else {}
+        self.default_ids = []
+        self.set_resume(resume, chunks)
+        for qa_id, qa_data in (learned_qa or {}).items():
+            self.add_qa(qa_id, qa_data)
+
+    def set_resume(self, resume, chunks=None):
+        """Replace the resume chunks after resume.yaml changed (chunks: precompiled resume_chunks)"""
+        for chunk_id in [key for key in self.texts if key.startswith('resume:')]:
+            self.index.remove(chunk_id)
+            del self.texts[chunk_id]
+        for chunk_id, text in resume_chunks(resume) if chunks is None else chunks:
+            self.texts[f"resume:{chunk_id}"] = text
+            self.index.add(f"resume:{chunk_id}", text)
+        # Shown when nothing in the resume matches, so answers can still steer to the work
+        projects = [key for key in self.texts if key.startswith('resume:project:')]
+        skills = [key for key in self.texts if key.startswith('resume:skills:')]
+        self.default_ids = projects[:2] + skills[:1]
+
+    def add_qa(self, qa_id, qa_data):
+        self.texts[f"qa:{qa_id}"] = qa_text(qa_data)
+        self.index.add(f"qa:{qa_id}", qa_document(qa_data))
+
+    def remove_qa(self, qa_id):
+        self.index.remove(f"qa:{qa_id}")
+        self.texts.pop(f"qa:{qa_id}", None)
+
+    def select(self, question):
+        """Chunk ids for a question, best first, within the token budget"""
+        ranked = [doc_id for _, doc_id in self.index.search(question, limit=self.max_pieces * 3)]
+        if not any(doc_id.startswith('resume:') for doc_id in ranked):
+            ranked += self.default_ids
+
+        selected, used = [], 0
+        for doc_id in ranked:
+            cost = estimate_tokens(self.texts[doc_id])
+            if doc_id in selected or used + cost > self.token_budget:
+                continue
+            selected.append(doc_id)
+            used += cost
+            if len(selected) >= self.max_pieces:
+                break
+        return selected
+
+    def render(self, question):
+        """(prompt text, number of pieces) for the selected context"""
+        selected = self.select(question)
+        background = [f"- {self.texts[doc_id]}" for doc_id in selected if doc_id.startswith('resume:')]
+        past = [self.texts[doc_id] for doc_id in selected if doc_id.startswith('qa:')]
+
+        sections = ["RELEVANT BACKGROUND:\n" + ("\n".join(background) or "- (nothing specific)")]
+        if past:
+            sections.append("RELATED PAST ANSWERS:\n" + "\n\n".join(past))
+        return "\n\n".join(sections), len(selected)
@@ -0,0 +1,158 @@
+"""Maintained totals for the learned_qa collection.
+
+The admin stats page used to stream every document just to count them. The
+totals now live in a single counters document that every write path adjusts
+with Firestore Increment transforms in the same transaction as the pair
+itself, working out each change from the document as it is at commit time.
+reconcile_counters() recomputes them from scratch with count aggregation
+queries whenever they may have drifted.
+
+firebase_admin is imported inside the helpers so importing this module does
+not load the Firestore client on a cold start.
+"""
+from qa_dedupe import add_aliases
+
+COUNTERS_COLLECTION = 'meta'
+COUNTERS_DOC = 'learned_qa_stats'
+COUNTER_FIELDS = ('total', 'ai_generated', 'reviewed')
+
+
+def counters_ref(db):
+    return db.collection(COUNTERS_COLLECTION).document(COUNTERS_DOC)
+
+
+def counter_delta(before, after):
+    """Counter changes implied by replacing pair `before` with `after` (either may be None)"""
+    def values(qa):
+        if qa is None:
+            return {'total': 0, 'ai_generated': 0, 'reviewed': 0}
+        return {
+            'total': 1,
+            'ai_generated': 1 if qa.get('ai_generated') else 0,
+            'reviewed': 1 if qa.get('reviewed') else 0,
+        }
+
+    old, new = values(before), values(after)
+    return {field: new[field] - old[field] for field in COUNTER_FIELDS if new[field] != old[field]}
+
+
+def merge_deltas(deltas):
+    """Sum several counter deltas, dropping fields that cancel out"""
+    total = {}
+    for delta in deltas:
+        for field, value in (delta or {}).items():
+            total[field] = total.get(field, 0) + value
+    return {field: value for field, value in total.items() if value}
+
+
+def add_counter_update(writer, db, delta):
+    """Queue Increment transforms for `delta` on a batch or transaction"""
+    if delta:
+        from firebase_admin import firestore
+        writer.set(counters_ref(db), {field: firestore.Increment(value) for field, value in delta.items()},
+                   merge=True)
+
+
+def pair_after(before, op, data):
+    """The pair once one write is applied to `before` (None if deleted, or an update finds nothing).
+
+    'alias' is an update whose aliases are added to the stored ones rather
+    than replacing them.
+    """
+    if op == 'delete':
+        return None
+    if op == 'set':
+        return data
+    if before is None:
+        return None
+    if op == 'alias':
+        return {**before, **data, 'aliases': add_aliases(before.get('aliases'), data.get('aliases'))}
+    return {**before, **data}
+
+
+def commit_qa(db, writes, collection='learned_qa'):
+    """Apply {qa_id: (op, data)} and the counter changes they imply in one transaction.
+
+    The deltas come from the documents as they are at commit time, not from a
+    worker's memory, so two workers saving the same new pair count it once.
+    Updates of missing pairs are skipped. Returns {qa_id: pair afterwards}.
+    """
+    from firebase_admin import firestore
+    refs = {qa_id: db.collection(collection).document(qa_id) for qa_id in writes}
+
+    @firestore.transactional
+    def run(transaction):
+        stored = {snapshot.id: snapshot.to_dict()
+                  for snapshot in transaction.get_all(list(refs.values())) if snapshot.exists}
+        results, deltas = {}, []
+        for qa_id, (op, data) in writes.items():
+            before = stored.get(qa_id)
+            after = pair_after(before, op, data)
+            if op == 'delete':
+                transaction.delete(refs[qa_id])
+            elif after is None:
+                pass
+            elif op == 'set':
+                transaction.set(refs[qa_id], data)
+            else:
+                # Only the fields this write touches, as merged with the stored pair
+                transaction.update(refs[qa_id], {field: after[field] for field in data})
+            deltas.append(counter_delta(before, after))
+            results[qa_id] = after
+        add_counter_update(transaction, db, merge_deltas(deltas))
+        return results
+
+    return run(db.transaction())
+
+
+def write_qa(db, qa_id, data=None, op='set', collection='learned_qa'):
+    """Set, update or delete a pair and adjust the counters in one transaction.
+
+    Returns the pair as stored afterwards (None after a delete).
+    """
+    after = commit_qa(db, {qa_id: (op, data)}, collection=collection)[qa_id]
+    if after is None and op != 'delete':
+        raise KeyError(f"Q&A pair {qa_id} not found")
+    return after
+
+
+def stats_from_counters(counters):
+    """Shape raw counter values into the dict the admin templates render"""
+    total = max(0, counters.get('total', 0))
+    ai_generated = max(0, counters.get('ai_generated', 0))
+    reviewed = max(0, counters.get('reviewed', 0))
+    return {
+        'total_qa': total,
+        'ai_generated': ai_generated,
+        'manual': total - ai_generated,
+        'reviewed': reviewed,
+        'unreviewed': total - reviewed
+    }
+
+
+def read_counters(db):
+    """Return stats from the counters document, reconciling it if missing"""
+    snapshot = counters_ref(db).get()
+    if not snapshot.exists:
+        return reconcile_counters(db)
+    return stats_from_counters(snapshot.to_dict())
+
+
+def count_where(query):
+    """Run a count aggregation query"""
+    result = query.count(alias='count').get()
+    return int(result[0][0].value)
+
+
+def reconcile_counters(db, collection='learned_qa'):
+    """Recompute the counters from scratch and overwrite the counters document"""
+    from firebase_admin import firestore
+    ref = db.collection(collection)
+    counters = {
+        'total': count_where(ref),
+        'ai_generated': count_where(ref.where('ai_generated', '==', True)),
+        'reviewed': count_where(ref.where('reviewed', '==', True)),
+    }
+    counters_ref(db).set(dict(counters, reconciled_at=firestore.SERVER_TIMESTAMP))
+    print(f"🧮 Reconciled learned Q&A counters: {counters}")
+    return stats_from_counters(counters)
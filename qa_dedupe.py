@@ -0,0 +1,321 @@
+"""Near-duplicate detection and compaction for learned Q&A pairs.
+
+Every AI miss is saved, so learned_qa collects near-identical questions
+("tell me about yourself", "Tell me about urself!!"). NearDuplicateIndex
+finds them with MinHash signatures over character trigrams and LSH banding:
+only questions that share a band bucket are compared, and a candidate counts
+as a duplicate when its trigram Jaccard similarity clears the threshold and
+every content word has a close match on the other side, so "built with
+React" and "built with Vue" stay apart.
+
+The chatbot uses the index at ingest time (a new question close to a stored
+pair becomes an alias of that pair instead of a new document) and as a
+fallback in the learned lookup. compact() clusters an existing store, keeps
+one canonical pair per cluster (reviewed first, then manual, then the most
+recently updated) and folds the rest into its aliases. It also moves pairs
+onto content-hash ids:
+
+    python qa_dedupe.py            # show the clusters
+    python qa_dedupe.py --apply    # merge them and re-key the store
+"""
+import argparse
+import hashlib
+import os
+import struct
+from collections import defaultdict
+from datetime import datetime
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+from answer_cache import normalize_question
+from prompt_context import tokenize
+
+# LSH banding: 16 bands of 4 rows catch pairs from roughly 0.5 Jaccard up
+BANDS = 16
+ROWS = 4
+# Trigram Jaccard a verified near-duplicate must reach
+THRESHOLD = 0.6
+# How close two content words must be to count as the same word ("favourite"/"favorite")
+TERM_SIMILARITY = 0.75
+# Aliases kept per pair; the oldest are dropped first
+MAX_ALIASES = 50
+# Writes per store commit during compaction (Firestore allows 500)
+COMPACT_CHUNK = 400
+
+# Chat shorthand (and contractions typed without an apostrophe) expanded before comparing
+SHORTHAND = {
+    'u': 'you', 'ya': 'you', 'ur': 'your', 'r': 'are', 'urself': 'yourself', 'abt': 'about',
+    'pls': 'please', 'plz': 'please', 'thx': 'thanks', 'fav': 'favorite', 'fave': 'favorite',
+    'whats': 'what is', 'wheres': 'where is', 'hows': 'how is', 'im': 'i am', 'dont': 'do not',
+}
+# Words that never make two questions different
+FILLER = {'please', 'thanks', 'thank', 'hey', 'hi', 'hello', 'ok', 'okay', 'just', 'actually', 'really'}
+
+# One 64-bit hash per MinHash function, all read from a single SHAKE-128 digest
+HASHES = struct.Struct(f"<{BANDS * ROWS}Q")
+
+
+def qa_id_for(question):
+    """Collision-free document id: a hash of the normalized question"""
+    return hashlib.sha1(normalize_question(question).encode('utf-8')).hexdigest()[:24]
+
+
+def dedupe_text(question):
+    words = normalize_question(question).split()
+    return " ".join(SHORTHAND.get(word, word) for word in words)
+
+
+@lru_cache(maxsize=8192)
+def shingle_digest(shingle):
+    """Independent hash values of a trigram for every MinHash function (packed)"""
+    return hashlib.shake_128(shingle.encode('utf-8')).digest(HASHES.size)
+
+
+class Sketch:
+    """Trigrams, content words and MinHash signature of one question"""
+
+    __slots__ = ('text', 'shingles', 'terms', 'signature')
+
+    def __init__(self, question, signature=True):
+        self.text = dedupe_text(question)
+        padded = f" {self.text} "
+        self.shingles = frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+        self.terms = frozenset(tokenize(self.text)) - FILLER
+        # Column-wise minimum over the trigrams' hash values (not needed to verify a stored candidate)
+        self.signature = tuple(map(min, zip(*(HASHES.unpack(shingle_digest(shingle)) for shingle in self.shingles)))) \
+            if signature else None
+
+    def band_keys(self):
+        return [(band, self.signature[band * ROWS:(band + 1) * ROWS]) for band in range(BANDS)]
+
+
+@lru_cache(maxsize=65536)
+def close_terms(term, other):
+    # SequenceMatcher can never beat 2 * shorter / total
+    if 2 * min(len(term), len(other)) < TERM_SIMILARITY * (len(term) + len(other)):
+        return False
+    return SequenceMatcher(None, term, other).ratio() >= TERM_SIMILARITY
+
+
+def terms_covered(terms, others):
+    """True if every word in `terms` has the same or a close word in `others`"""
+    for term in terms - others:
+        if not any(close_terms(term, other) for other in others):
+            return False
+    return True
+
+
+def similarity(a, b, threshold=THRESHOLD):
+    """Trigram Jaccard of two sketches, or 0.0 if they are not near-duplicates"""
+    union = len(a.shingles | b.shingles)
+    score = len(a.shingles & b.shingles) / union if union else 1.0
+    if score < threshold:
+        return 0.0
+    if not (terms_covered(a.terms, b.terms) and terms_covered(b.terms, a.terms)):
+        return 0.0
+    return score
+
+
+def pair_questions(qa_data):
+    """The pair's question followed by its aliases"""
+    return [qa_data.get('question', '')] + list(qa_data.get('aliases') or [])
+
+
+class NearDuplicateIndex:
+    """LSH buckets over the questions and aliases of learned pairs"""
+
+    def __init__(self, threshold=THRESHOLD):
+        self.threshold = threshold
+        self.buckets = defaultdict(set)
+        # (qa_id, n) -> Sketch of the pair's n-th question
+        self.sketches = {}
+        self.keys = defaultdict(list)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def rebuild(self, learned_qa):
+        self.buckets = defaultdict(set)
+        self.sketches = {}
+        self.keys = defaultdict(list)
+        for qa_id, qa_data in learned_qa.items():
+            self.add(qa_id, qa_data)
+
+    def add(self, qa_id, qa_data):
+        """Add or replace a pair's questions"""
+        self.remove(qa_id)
+        for n, question in enumerate(pair_questions(qa_data)):
+            key = (qa_id, n)
+            sketch = self.sketches[key] = Sketch(question)
+            self.keys[qa_id].append(key)
+            for band_key in sketch.band_keys():
+                self.buckets[band_key].add(key)
+
+    def remove(self, qa_id):
+        for key in self.keys.pop(qa_id, ()):
+            sketch = self.sketches.pop(key)
+            for band_key in sketch.band_keys():
+                keys = self.buckets.get(band_key)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self.buckets[band_key]
+
+    def matches(self, sketch, exclude=None):
+        """{qa_id: best similarity} for verified near-duplicates of a sketch"""
+        found = {}
+        seen = set()
+        for band_key in sketch.band_keys():
+            for key in self.buckets.get(band_key, ()):
+                if key in seen or key[0] == exclude:
+                    continue
+                seen.add(key)
+                score = similarity(sketch, self.sketches[key], self.threshold)
+                if score > found.get(key[0], 0.0):
+                    found[key[0]] = score
+        return found
+
+    def find(self, question, exclude=None):
+        """(qa_id, similarity) of the closest near-duplicate pair, or (None, 0.0)"""
+        found = self.matches(Sketch(question), exclude)
+        if not found:
+            return None, 0.0
+        qa_id = max(found, key=found.get)
+        return qa_id, found[qa_id]
+
+
+# ==================== COMPACTION ====================
+
+def canonical_rank(item):
+    """Sort key: reviewed first, then manual, then most recently updated"""
+    _, qa_data = item
+    updated_at = qa_data.get('updated_at')
+    timestamp = updated_at.timestamp() if isinstance(updated_at, datetime) else 0
+    return (not qa_data.get('reviewed'), bool(qa_data.get('ai_generated')), -timestamp)
+
+
+def find_clusters(learned_qa, threshold=THRESHOLD):
+    """Lists of pair ids whose questions are near-duplicates (transitively)"""
+    parent = {qa_id: qa_id for qa_id in learned_qa}
+
+    def root(qa_id):
+        while parent[qa_id] != qa_id:
+            parent[qa_id] = parent[parent[qa_id]]
+            qa_id = parent[qa_id]
+        return qa_id
+
+    # Each pair is compared with the pairs indexed before it, skipping ones already in its cluster
+    index = NearDuplicateIndex(threshold)
+    for qa_id, qa_data in learned_qa.items():
+        for question in pair_questions(qa_data):
+            sketch = Sketch(question)
+            checked = set()
+            for band_key in sketch.band_keys():
+                for other, n in index.buckets.get(band_key, ()):
+                    if other in checked or root(other) == root(qa_id):
+                        continue
+                    checked.add(other)
+                    if similarity(sketch, index.sketches[(other, n)], threshold):
+                        parent[root(other)] = root(qa_id)
+        index.add(qa_id, qa_data)
+
+    clusters = defaultdict(list)
+    for qa_id in learned_qa:
+        clusters[root(qa_id)].append(qa_id)
+    return [ids for ids in clusters.values() if len(ids) > 1]
+
+
+def merge_aliases(canonical, others):
+    """Alias list for a canonical pair absorbing `others`, without repeats"""
+    seen = {dedupe_text(canonical.get('question', ''))}
+    aliases = []
+    for qa_data in [canonical] + others:
+        questions = pair_questions(qa_data)
+        for question in (questions[1:] if qa_data is canonical else questions):
+            text = dedupe_text(question)
+            if text not in seen:
+                seen.add(text)
+                aliases.append(question)
+    return aliases[-MAX_ALIASES:]
+
+
+def add_aliases(aliases, new):
+    """An alias list with `new` questions appended, skipping repeats and keeping the newest"""
+    aliases = list(aliases or [])
+    seen = {dedupe_text(question) for question in aliases}
+    for question in new or []:
+        text = dedupe_text(question)
+        if text not in seen:
+            seen.add(text)
+            aliases.append(question)
+    return aliases[-MAX_ALIASES:]
+
+
+def compaction_plan(learned_qa, threshold=THRESHOLD):
+    """Writes ({qa_id: (op, data)}) that merge near-duplicates and move pairs to content-hash ids.
+
+    Returns (writes, clusters), clusters being (canonical id, merged ids) tuples.
+    """
+    now = datetime.now()
+    survivors = dict(learned_qa)
+    writes = {}
+    clusters = []
+    for ids in find_clusters(learned_qa, threshold):
+        ranked = sorted(((qa_id, learned_qa[qa_id]) for qa_id in ids), key=canonical_rank)
+        canonical_id, canonical = ranked[0]
+        merged = [qa_id for qa_id, _ in ranked[1:]]
+        survivors[canonical_id] = dict(canonical, aliases=merge_aliases(canonical, [qa for _, qa in ranked[1:]]),
+                                       updated_at=now)
+        writes[canonical_id] = ('set', survivors[canonical_id])
+        for qa_id in merged:
+            del survivors[qa_id]
+            writes[qa_id] = ('delete', None)
+        clusters.append((canonical_id, merged))
+
+    for qa_id, qa_data in survivors.items():
+        new_id = qa_id_for(qa_data.get('question', ''))
+        if new_id != qa_id:
+            writes[qa_id] = ('delete', None)
+            writes[new_id] = ('set', qa_data)
+    return writes, clusters
+
+
+def apply_writes(store, writes, chunk_size=COMPACT_CHUNK):
+    """Commit compaction writes in chunks; each commit adjusts the counters"""
+    items = list(writes.items())
+    # Sets before deletes: an interrupted run leaves duplicates behind but never loses a pair
+    items.sort(key=lambda item: item[1][0] == 'delete')
+    for start in range(0, len(items), chunk_size):
+        store.commit(dict(items[start:start + chunk_size]))
+
+
+def compact(store, apply=False, threshold=THRESHOLD):
+    """Cluster the store's pairs and (with apply) merge them; returns (writes, clusters)"""
+    learned_qa = store.load_all()
+    writes, clusters = compaction_plan(learned_qa, threshold)
+    if apply and writes:
+        apply_writes(store, writes)
+    merged = sum(len(ids) for _, ids in clusters)
+    print(f"🧹 {len(clusters)} near-duplicate clusters ({merged} pairs merged), {len(writes)} writes"
+          f"{'' if apply else ' planned'}")
+    return writes, clusters
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--apply', action='store_true', help="merge clusters and re-key the store")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD, help="trigram Jaccard for a duplicate")
+    args = parser.parse_args()
+
+    # One-off job: no sync thread or write-behind queue needed
+    os.environ['QA_SYNC_MODE'] = 'off'
+    os.environ['QA_WRITE_BEHIND'] = 'false'
+    from chatbot import chatbot
+    if not chatbot.qa_store:
+        raise SystemExit("No learned Q&A store - set up Firebase or QA_STORE=sqlite")
+    learned_qa = chatbot.qa_store.load_all()
+    writes, clusters = compact(chatbot.qa_store, apply=args.apply, threshold=args.threshold)
+    for canonical_id, merged in clusters:
+        print(f"\n✅ {learned_qa[canonical_id].get('question')}")
+        for qa_id in merged:
+            print(f"   ↳ {learned_qa[qa_id].get('question')}")
@@ -0,0 +1,139 @@
+"""Character-trigram index over learned Q&A questions.
+
+search_learned_qa used to run SequenceMatcher against every stored question.
+This index shortlists the few questions that can plausibly clear the 0.7
+similarity threshold so the exact scoring only runs on those.
+
+The shortlist is capped at the MAX_CANDIDATES best trigram overlaps, so on a
+large, repetitive set a pair that would win the full scan can (rarely) be
+ranked out. Pass max_candidates=None for a shortlist that never drops a pair
+able to clear the threshold.
+"""
+from collections import defaultdict
+
+# Candidates below this trigram Dice overlap are never worth scoring exactly
+MIN_OVERLAP = 0.15
+# Minimum SequenceMatcher score a pair must be able to reach to be kept
+MATCH_THRESHOLD = 0.7
+SUBSTRING_BOOST = 0.3
+# Non-substring candidates scored exactly per query (None: no cap)
+MAX_CANDIDATES = 64
+
+
+def question_trigrams(text):
+    """Return the set of padded character trigrams for a question"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def max_ratio(len_a, len_b):
+    """Upper bound of SequenceMatcher.ratio() for strings of these lengths"""
+    total = len_a + len_b
+    return 2.0 * min(len_a, len_b) / total if total else 1.0
+
+
+def shortlist(question, query_grams, overlap, stored, max_candidates):
+    """Keys from {key: shared trigrams} that may score above the threshold.
+
+    `stored(key)` returns the key's lowercased question and trigram count.
+    Substring pairs are always kept; the rest are ranked by trigram Dice and
+    cut at max_candidates, which makes the result an approximation of a full
+    scan (None keeps every pair that can reach the threshold).
+    """
+    query_len = len(question)
+    selected = set()
+    ranked = []
+    for key, shared in overlap.items():
+        text, stored_grams = stored(key)
+        bound = max_ratio(query_len, len(text))
+
+        # Substring pairs get a +0.3 boost, so they survive much looser
+        # length ratios. Every interior trigram of the shorter string must
+        # then appear in the longer one (only the 3 padded edges may miss).
+        if bound + SUBSTRING_BOOST > MATCH_THRESHOLD:
+            shorter_grams = min(len(query_grams), stored_grams)
+            if shared >= shorter_grams - 3 and (question in text or text in question):
+                selected.add(key)
+                continue
+
+        if bound <= MATCH_THRESHOLD:
+            continue
+        dice = 2.0 * shared / (len(query_grams) + stored_grams)
+        if dice >= MIN_OVERLAP:
+            ranked.append((dice, key))
+
+    ranked.sort(key=lambda item: item[0], reverse=True)
+    selected.update(key for _, key in ranked[:max_candidates])
+    return selected
+
+
+class QAIndex:
+    """In-memory trigram postings over learned questions, updated incrementally"""
+
+    def __init__(self, max_candidates=MAX_CANDIDATES):
+        self.max_candidates = max_candidates
+        self.postings = defaultdict(set)
+        self.questions = {}
+        self.grams = {}
+        self.exact = defaultdict(set)
+
+    def __len__(self):
+        return len(self.questions)
+
+    def rebuild(self, learned_qa):
+        """Index every pair in a learned_qa dict from scratch"""
+        self.postings = defaultdict(set)
+        self.questions = {}
+        self.grams = {}
+        self.exact = defaultdict(set)
+        for qa_id, qa_data in learned_qa.items():
+            self.add(qa_id, getattr(qa_data, 'text', None) or qa_data.get('question', ''))
+
+    def add(self, qa_id, question):
+        """Add or replace the indexed question for a pair"""
+        if qa_id in self.questions:
+            self.remove(qa_id)
+
+        text = question.lower()
+        if text == question:
+            # Keep the caller's copy (a QARecord's lowered text) instead of a second one
+            text = question
+        grams = question_trigrams(text)
+        self.questions[qa_id] = text
+        self.grams[qa_id] = grams
+        self.exact[text].add(qa_id)
+        for gram in grams:
+            self.postings[gram].add(qa_id)
+
+    def remove(self, qa_id):
+        """Drop a pair from the index if present"""
+        text = self.questions.pop(qa_id, None)
+        if text is None:
+            return
+        for gram in self.grams.pop(qa_id, ()):
+            ids = self.postings.get(gram)
+            if ids is not None:
+                ids.discard(qa_id)
+                if not ids:
+                    del self.postings[gram]
+        ids = self.exact.get(text)
+        if ids is not None:
+            ids.discard(qa_id)
+            if not ids:
+                del self.exact[text]
+
+    def candidates(self, question):
+        """Shortlist pair ids whose questions may score above the threshold.
+
+        `question` is expected to be lowercased and stripped, the same form
+        search_learned_qa compares against.
+        """
+        query_grams = question_trigrams(question)
+        overlap = defaultdict(int)
+        for gram in query_grams:
+            for qa_id in self.postings.get(gram, ()):
+                overlap[qa_id] += 1
+
+        selected = shortlist(question, query_grams, overlap,
+                             lambda qa_id: (self.questions[qa_id], len(self.grams[qa_id])), self.max_candidates)
+        return selected | self.exact.get(question, set())
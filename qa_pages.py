@@ -0,0 +1,81 @@
+"""Cursor-paginated, server-filtered queries over the learned_qa collection.
+
+The admin dashboard used to stream every document and sort in Python. These
+helpers push filtering, ordering and paging down to Firestore so each page
+load reads at most one page (plus the cursor document).
+
+Equality filters combined with an order_by need composite indexes; see
+firestore.indexes.json.
+"""
+PAGE_SIZE = 25
+
+
+def qa_row(doc):
+    """Flatten a Firestore snapshot into the dict the dashboard renders"""
+    data = doc.to_dict() or {}
+    return {
+        'id': doc.id,
+        'question': data.get('question', ''),
+        'answer': data.get('answer', ''),
+        'ai_generated': data.get('ai_generated', False),
+        'reviewed': data.get('reviewed', False),
+        'created_at': data.get('created_at'),
+        'updated_at': data.get('updated_at')
+    }
+
+
+def fetch_qa_page(db, after=None, before=None, reviewed=None, ai_generated=None, prefix='',
+                  page_size=PAGE_SIZE, collection='learned_qa'):
+    """Return one page of Q&A rows plus cursors for the neighbouring pages.
+
+    `after` / `before` are document ids of the last / first row of the page
+    the user navigated from. Without a prefix rows are newest first; with a
+    prefix they are ordered by question, since Firestore range filters must
+    order on the filtered field first.
+    """
+    from firebase_admin import firestore
+    ref = db.collection(collection)
+    query = ref
+    if reviewed is not None:
+        query = query.where('reviewed', '==', reviewed)
+    if ai_generated is not None:
+        query = query.where('ai_generated', '==', ai_generated)
+
+    if prefix:
+        query = query.where('question', '>=', prefix).where('question', '<', prefix + '\uf8ff')
+        order_field, direction = 'question', firestore.Query.ASCENDING
+    else:
+        order_field, direction = 'created_at', firestore.Query.DESCENDING
+
+    backwards = before is not None and after is None
+    if backwards:
+        direction = (firestore.Query.ASCENDING if direction == firestore.Query.DESCENDING
+                     else firestore.Query.DESCENDING)
+    query = query.order_by(order_field, direction=direction)
+
+    cursor_id = before if backwards else after
+    if cursor_id:
+        cursor = ref.document(cursor_id).get()
+        if not cursor.exists:
+            # The cursor row was deleted; start again from the first page
+            return fetch_qa_page(db, reviewed=reviewed, ai_generated=ai_generated, prefix=prefix,
+                                 page_size=page_size, collection=collection)
+        query = query.start_after(cursor)
+
+    docs = list(query.limit(page_size + 1).stream())
+    has_more = len(docs) > page_size
+    docs = docs[:page_size]
+    if backwards:
+        docs.reverse()
+
+    rows = [qa_row(doc) for doc in docs]
+    if backwards:
+        has_prev, has_next = has_more, True
+    else:
+        has_prev, has_next = bool(cursor_id), has_more
+
+    return {
+        'rows': rows,
+        'next_cursor': rows[-1]['id'] if rows and has_next else None,
+        'prev_cursor': rows[0]['id'] if rows and has_prev else None,
+    }
@@ -0,0 +1,104 @@
+"""Compact in-memory form of a learned Q&A pair.
+
+The store hands back one dict per pair: six keys, two datetime objects and
+two booleans. At tens of thousands of pairs those dicts and datetimes are
+most of the learned Q&A memory, and search_learned_qa lowered every
+candidate's question again on each lookup. A QARecord keeps the same fields
+in slots: the question lowered once at load, both flags in one small int and
+the timestamps as integer microseconds since the epoch.
+
+It still reads like the dict (record['answer'], record.get(...), dict(record),
+{**record}), so the write paths and stores see the same data as before.
+"""
+from collections.abc import Mapping
+from datetime import datetime, timedelta, timezone
+
+# Bits of QARecord.flags
+AI_GENERATED = 1
+REVIEWED = 2
+CREATED_AWARE = 4
+UPDATED_AWARE = 8
+
+EPOCH = datetime(1970, 1, 1)
+EPOCH_UTC = EPOCH.replace(tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+FIELDS = ('question', 'answer', 'ai_generated', 'reviewed', 'created_at', 'updated_at')
+
+
+def to_epoch(value):
+    """(microseconds since the epoch, tz-aware) for a datetime"""
+    if value.tzinfo is not None:
+        return (value - EPOCH_UTC) // MICROSECOND, True
+    return (value - EPOCH) // MICROSECOND, False
+
+
+def from_epoch(micros, aware):
+    return (EPOCH_UTC if aware else EPOCH) + timedelta(microseconds=micros)
+
+
+class QARecord(Mapping):
+    """One learned pair; read-only, replaced as a whole when the pair changes"""
+
+    __slots__ = ('question', 'text', 'answer', 'flags', 'created', 'updated', 'extra')
+
+    def __init__(self, data):
+        self.question = data.get('question') or ''
+        # What search_learned_qa compares against
+        self.text = self.question.lower()
+        self.answer = data.get('answer') or ''
+        flags = (AI_GENERATED if data.get('ai_generated') else 0) | (REVIEWED if data.get('reviewed') else 0)
+        self.created = self.updated = None
+        extra = {}
+        for key, value in data.items():
+            if key not in FIELDS:
+                extra[key] = value
+            elif key == 'created_at' and isinstance(value, datetime):
+                self.created, aware = to_epoch(value)
+                flags |= CREATED_AWARE if aware else 0
+            elif key == 'updated_at' and isinstance(value, datetime):
+                self.updated, aware = to_epoch(value)
+                flags |= UPDATED_AWARE if aware else 0
+            elif key in ('created_at', 'updated_at') and value is not None:
+                # e.g. a timestamp sentinel that was never resolved
+                extra[key] = value
+        self.flags = flags
+        self.extra = extra or None
+
+    def __getitem__(self, key):
+        if key == 'question':
+            return self.question
+        if key == 'answer':
+            return self.answer
+        if key == 'ai_generated':
+            return bool(self.flags & AI_GENERATED)
+        if key == 'reviewed':
+            return bool(self.flags & REVIEWED)
+        if key == 'created_at' and self.created is not None:
+            return from_epoch(self.created, self.flags & CREATED_AWARE)
+        if key == 'updated_at' and self.updated is not None:
+            return from_epoch(self.updated, self.flags & UPDATED_AWARE)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __iter__(self):
+        yield from ('question', 'answer', 'ai_generated', 'reviewed')
+        if self.created is not None:
+            yield 'created_at'
+        if self.updated is not None:
+            yield 'updated_at'
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self):
+        return 4 + (self.created is not None) + (self.updated is not None) + len(self.extra or ())
+
+    def __repr__(self):
+        return f"QARecord({dict(self)!r})"
+
+
+def records(learned_qa):
+    """{qa_id: QARecord} for a {qa_id: dict} load"""
+    return {qa_id: qa_data if isinstance(qa_data, QARecord) else QARecord(qa_data)
+            for qa_id, qa_data in learned_qa.items()}
+
@@ -0,0 +1,391 @@
+"""Storage backends for learned Q&A pairs.
+
+The chatbot, the write-behind queue, the sync thread and the admin routes
+all talk to a store instead of the Firestore client, so the pairs can live
+in either of two places:
+
+- FirestoreStore: the learned_qa collection, with the counters document,
+  cursor pagination and snapshot listener from qa_counters, qa_pages and
+  qa_sync.
+- SQLiteStore: a local database file in WAL mode, so readers never block
+  the writer, with an FTS5 index on questions. Lookups, pages, counts and
+  search run in-process at disk speed and the bot keeps learning without
+  Firebase credentials. Workers on one host share the file.
+
+Choose one with QA_STORE=firestore|sqlite. Move pairs between them with:
+
+    python qa_store.py firestore learned_qa.db    # Firestore -> SQLite
+    python qa_store.py learned_qa.db firestore    # SQLite -> Firestore
+"""
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+
+from qa_counters import commit_qa, pair_after, write_qa, read_counters, reconcile_counters, stats_from_counters
+from qa_pages import PAGE_SIZE, fetch_qa_page
+
+# Firestore batches are limited to 500 operations
+MIGRATE_CHUNK = 400
+
+
+class FirestoreStore:
+    """learned_qa collection in Firestore"""
+
+    name = 'firestore'
+    label = 'Firebase'
+    # Network round trips: worth a write-behind queue and a change listener
+    remote = True
+    search_hint = "Question starts with..."
+
+    def __init__(self, db, collection='learned_qa'):
+        self.db = db
+        self.collection = collection
+
+    def ref(self):
+        return self.db.collection(self.collection)
+
+    def load_all(self):
+        """Every pair as {qa_id: data}"""
+        return {doc.id: doc.to_dict() for doc in self.ref().stream()}
+
+    def get(self, qa_id):
+        doc = self.ref().document(qa_id).get()
+        return doc.to_dict() if doc.exists else None
+
+    def write(self, qa_id, data=None, op='set'):
+        """Set, update or delete one pair with its counters; returns the pair afterwards"""
+        return write_qa(self.db, qa_id, data, op=op, collection=self.collection)
+
+    def commit(self, writes):
+        """Apply {qa_id: (op, data)} and their counter changes in one transaction; returns {qa_id: pair}"""
+        return commit_qa(self.db, writes, collection=self.collection)
+
+    def page(self, after=None, before=None, reviewed=None, ai_generated=None, prefix='', page_size=PAGE_SIZE):
+        return fetch_qa_page(self.db, after=after, before=before, reviewed=reviewed, ai_generated=ai_generated,
+                             prefix=prefix, page_size=page_size, collection=self.collection)
+
+    def counts(self):
+        return read_counters(self.db)
+
+    def reconcile(self):
+        return reconcile_counters(self.db, collection=self.collection)
+
+    def watch(self, callback):
+        """Start a snapshot listener; returns the watch to unsubscribe"""
+        return self.ref().on_snapshot(callback)
+
+    def changed_since(self, updated_at):
+        """{qa_id: data} for pairs whose updated_at is later (all pairs when None)"""
+        query = self.ref()
+        if updated_at is not None:
+            query = query.where('updated_at', '>', updated_at)
+        return {doc.id: doc.to_dict() for doc in query.stream()}
+
+    def ids(self):
+        return {doc.id for doc in self.ref().select(['updated_at']).stream()}
+
+    def close(self):
+        pass
+
+
+# ==================== SQLITE ====================
+
+FIELDS = ('question', 'answer', 'ai_generated', 'reviewed', 'created_at', 'updated_at')
+
+# seq is an explicit rowid so VACUUM cannot renumber rows under the FTS index
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS learned_qa (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    question TEXT NOT NULL DEFAULT '',
+    answer TEXT NOT NULL DEFAULT '',
+    ai_generated INTEGER NOT NULL DEFAULT 0,
+    reviewed INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL DEFAULT '',
+    updated_at TEXT NOT NULL DEFAULT '',
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS learned_qa_created ON learned_qa (created_at, id);
+CREATE INDEX IF NOT EXISTS learned_qa_updated ON learned_qa (updated_at);
+CREATE INDEX IF NOT EXISTS learned_qa_question ON learned_qa (question, id);
+CREATE VIRTUAL TABLE IF NOT EXISTS learned_qa_fts USING fts5(
+    question, content='learned_qa', content_rowid='seq'
+);
+CREATE TRIGGER IF NOT EXISTS learned_qa_insert AFTER INSERT ON learned_qa BEGIN
+    INSERT INTO learned_qa_fts (rowid, question) VALUES (new.seq, new.question);
+END;
+CREATE TRIGGER IF NOT EXISTS learned_qa_delete AFTER DELETE ON learned_qa BEGIN
+    INSERT INTO learned_qa_fts (learned_qa_fts, rowid, question) VALUES ('delete', old.seq, old.question);
+END;
+CREATE TRIGGER IF NOT EXISTS learned_qa_update AFTER UPDATE OF question ON learned_qa BEGIN
+    INSERT INTO learned_qa_fts (learned_qa_fts, rowid, question) VALUES ('delete', old.seq, old.question);
+    INSERT INTO learned_qa_fts (rowid, question) VALUES (new.seq, new.question);
+END;
+"""
+
+UPSERT = """
+INSERT INTO learned_qa (id, question, answer, ai_generated, reviewed, created_at, updated_at, extra)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    question = excluded.question, answer = excluded.answer, ai_generated = excluded.ai_generated,
+    reviewed = excluded.reviewed, created_at = excluded.created_at, updated_at = excluded.updated_at,
+    extra = excluded.extra
+"""
+
+COLUMNS = "id, question, answer, ai_generated, reviewed, created_at, updated_at, extra"
+
+
+def to_text(value):
+    """Datetimes as ISO text, which sorts in time order"""
+    return value.isoformat() if isinstance(value, datetime) else (value or '')
+
+
+def from_text(value):
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except ValueError:
+        return value
+
+
+def row_values(qa_id, data):
+    extra = {key: value for key, value in data.items() if key not in FIELDS}
+    return (
+        qa_id,
+        data.get('question', ''),
+        data.get('answer', ''),
+        1 if data.get('ai_generated') else 0,
+        1 if data.get('reviewed') else 0,
+        to_text(data.get('created_at')),
+        to_text(data.get('updated_at')),
+        json.dumps(extra, default=str) if extra else None,
+    )
+
+
+def row_data(row):
+    """Rebuild the pair dict (as Firestore would return it) from a row"""
+    data = json.loads(row['extra']) if row['extra'] else {}
+    data.update(
+        question=row['question'],
+        answer=row['answer'],
+        ai_generated=bool(row['ai_generated']),
+        reviewed=bool(row['reviewed']),
+    )
+    for field in ('created_at', 'updated_at'):
+        if row[field]:
+            data[field] = from_text(row[field])
+    return data
+
+
+def fts_query(text):
+    """FTS5 query matching questions containing words that start with each term"""
+    return " ".join(f'"{term}"*' for term in re.findall(r"\w+", text.lower()))
+
+
+class SQLiteStore:
+    """learned_qa table in a local SQLite file with an FTS5 question index"""
+
+    name = 'sqlite'
+    label = 'SQLite'
+    # No change listener (no watch()): QASync polls it
+    remote = False
+    search_hint = "Search questions..."
+
+    def __init__(self, path='learned_qa.db', busy_timeout=5.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.local = threading.local()
+        self.connections = []
+        self.lock = threading.Lock()
+        conn = self.connect()
+        # WAL is a property of the file, so this only has to happen once
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+
+    def connect(self):
+        """This thread's connection; sqlite3 connections must not be shared between threads"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                                   check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            # Durable at checkpoints rather than on every commit; WAL keeps the file consistent
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+            with self.lock:
+                self.connections.append(conn)
+        return conn
+
+    def transaction(self, func):
+        """Run func(conn) inside one write transaction"""
+        conn = self.connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = func(conn)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return result
+
+    def load_all(self):
+        rows = self.connect().execute(f"SELECT {COLUMNS} FROM learned_qa")
+        return {row['id']: row_data(row) for row in rows}
+
+    def get(self, qa_id):
+        row = self.connect().execute(f"SELECT {COLUMNS} FROM learned_qa WHERE id = ?", (qa_id,)).fetchone()
+        return row_data(row) if row else None
+
+    def apply(self, conn, qa_id, op, data):
+        """One write inside a transaction; returns the pair afterwards (None if deleted or missing)"""
+        if op == 'delete':
+            conn.execute("DELETE FROM learned_qa WHERE id = ?", (qa_id,))
+            return None
+        before = None
+        if op != 'set':
+            row = conn.execute(f"SELECT {COLUMNS} FROM learned_qa WHERE id = ?", (qa_id,)).fetchone()
+            before = row_data(row) if row else None
+        data = pair_after(before, op, data)
+        if data is not None:
+            conn.execute(UPSERT, row_values(qa_id, data))
+        return data
+
+    def write(self, qa_id, data=None, op='set'):
+        after = self.transaction(lambda conn: self.apply(conn, qa_id, op, data))
+        if after is None and op != 'delete':
+            raise KeyError(f"Q&A pair {qa_id} not found")
+        return after
+
+    def commit(self, writes):
+        """Apply {qa_id: (op, data)} in one transaction; counts are computed from the table"""
+        return self.transaction(lambda conn: {qa_id: self.apply(conn, qa_id, op, data)
+                                              for qa_id, (op, data) in writes.items()})
+
+    def page(self, after=None, before=None, reviewed=None, ai_generated=None, prefix='', page_size=PAGE_SIZE):
+        """One page of rows with keyset cursors, matching fetch_qa_page's result.
+
+        Without a search term rows are newest first; with one, the FTS5 index
+        finds questions containing words that start with each term and rows
+        are ordered by question.
+        """
+        where, params = [], []
+        if reviewed is not None:
+            where.append("reviewed = ?")
+            params.append(1 if reviewed else 0)
+        if ai_generated is not None:
+            where.append("ai_generated = ?")
+            params.append(1 if ai_generated else 0)
+
+        match = fts_query(prefix) if prefix else ''
+        if match:
+            where.append("seq IN (SELECT rowid FROM learned_qa_fts WHERE learned_qa_fts MATCH ?)")
+            params.append(match)
+            order_field, descending = 'question', False
+        else:
+            order_field, descending = 'created_at', True
+
+        backwards = before is not None and after is None
+        if backwards:
+            descending = not descending
+
+        conn = self.connect()
+        cursor_id = before if backwards else after
+        if cursor_id:
+            cursor = conn.execute(f"SELECT {order_field}, id FROM learned_qa WHERE id = ?", (cursor_id,)).fetchone()
+            if cursor is None:
+                # The cursor row was deleted; start again from the first page
+                return self.page(reviewed=reviewed, ai_generated=ai_generated, prefix=prefix, page_size=page_size)
+            where.append(f"({order_field}, id) {'<' if descending else '>'} (?, ?)")
+            params.extend(cursor)
+
+        direction = 'DESC' if descending else 'ASC'
+        sql = f"SELECT {COLUMNS} FROM learned_qa"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {order_field} {direction}, id {direction} LIMIT ?"
+        rows = conn.execute(sql, params + [page_size + 1]).fetchall()
+
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if backwards:
+            rows.reverse()
+        rows = [dict(row_data(row), id=row['id']) for row in rows]
+        if backwards:
+            has_prev, has_next = has_more, True
+        else:
+            has_prev, has_next = bool(cursor_id), has_more
+
+        return {
+            'rows': rows,
+            'next_cursor': rows[-1]['id'] if rows and has_next else None,
+            'prev_cursor': rows[0]['id'] if rows and has_prev else None,
+        }
+
+    def counts(self):
+        row = self.connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(ai_generated), 0), COALESCE(SUM(reviewed), 0) FROM learned_qa"
+        ).fetchone()
+        return stats_from_counters({'total': row[0], 'ai_generated': row[1], 'reviewed': row[2]})
+
+    def reconcile(self):
+        """Rebuild the FTS index; counts are always computed from the table"""
+        self.transaction(lambda conn: conn.execute("INSERT INTO learned_qa_fts (learned_qa_fts) VALUES ('rebuild')"))
+        stats = self.counts()
+        print(f"🧮 Rebuilt the learned Q&A search index ({stats['total_qa']} pairs)")
+        return stats
+
+    def changed_since(self, updated_at):
+        conn = self.connect()
+        if updated_at is None:
+            rows = conn.execute(f"SELECT {COLUMNS} FROM learned_qa")
+        else:
+            rows = conn.execute(f"SELECT {COLUMNS} FROM learned_qa WHERE updated_at > ?", (to_text(updated_at),))
+        return {row['id']: row_data(row) for row in rows}
+
+    def ids(self):
+        return {row[0] for row in self.connect().execute("SELECT id FROM learned_qa")}
+
+    def close(self):
+        with self.lock:
+            connections, self.connections = self.connections, []
+        for conn in connections:
+            conn.close()
+        self.local = threading.local()
+
+
+# ==================== MIGRATION ====================
+
+def migrate(source, destination, chunk_size=MIGRATE_CHUNK):
+    """Copy every pair from one store to another; returns the number copied"""
+    pairs = list(source.load_all().items())
+    for start in range(0, len(pairs), chunk_size):
+        destination.commit({qa_id: ('set', data) for qa_id, data in pairs[start:start + chunk_size]})
+        print(f"📦 Copied {min(start + chunk_size, len(pairs))}/{len(pairs)} Q&A pairs")
+    # Pairs already at the destination were overwritten; recompute its counters from scratch
+    destination.reconcile()
+    return len(pairs)
+
+
+def open_store(spec):
+    """'firestore' or the path of a SQLite file"""
+    if spec != 'firestore':
+        return SQLiteStore(spec)
+    from chatbot import chatbot
+    db = chatbot.init_firebase()
+    if not db:
+        raise SystemExit("Firebase unavailable - check the Firebase credentials in .env")
+    return FirestoreStore(db)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python qa_store.py SOURCE DESTINATION  (each 'firestore' or a SQLite file path)")
+        sys.exit(2)
+    source_spec, destination_spec = sys.argv[1:]
+    if source_spec != 'firestore' and not os.path.exists(source_spec):
+        raise SystemExit(f"No SQLite database at {source_spec}")
+    copied = migrate(open_store(source_spec), open_store(destination_spec))
+    print(f"✅ Migrated {copied} Q&A pairs from {source_spec} to {destination_spec}")
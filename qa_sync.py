@@ -0,0 +1,158 @@
+"""Incremental sync of the learned Q&A store into the running chatbot.
+
+After one initial load, changes made by admin routes, other workers or the
+Firebase console are applied as deltas instead of waiting for a restart:
+
+- "listen": a Firestore on_snapshot listener pushes added/modified/removed
+  documents. Its first snapshot doubles as the initial load.
+- "poll": for environments without listeners (and the SQLite store),
+  periodically query pairs whose updated_at moved past the last seen value,
+  and reconcile ids every few polls to pick up deletions.
+
+updated_at is stamped by the worker that saved the pair, and a write-behind
+commit can land after another worker's newer pair has already been polled.
+Each poll therefore reaches back poll_margin seconds before the last seen
+value and skips the pairs it has already applied at that updated_at. The id
+reconcile also fetches ids it has never seen, for commits later than that.
+"""
+import threading
+from datetime import datetime, timedelta
+
+
+class QASync:
+    """Keeps the in-memory learned_qa dict in step with a qa_store backend"""
+
+    def __init__(self, store, on_change, on_remove, mode='listen',
+                 poll_interval=30.0, reconcile_every=10, initial_timeout=30.0, on_load=None, poll_margin=60.0):
+        self.store = store
+        self.on_change = on_change
+        self.on_remove = on_remove
+        # Called with the initial load before any change is delivered
+        self.on_load = on_load
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self.reconcile_every = reconcile_every
+        self.initial_timeout = initial_timeout
+        # How far before the last seen updated_at each poll looks again
+        self.poll_margin = poll_margin
+
+        self.watch = None
+        self.initial = None
+        self.initial_loaded = threading.Event()
+        self.known_ids = set()
+        self.last_seen = None
+        # updated_at (as a timestamp) of each pair applied inside the overlap window
+        self.seen = {}
+        self.stopping = threading.Event()
+        self.thread = None
+        self.applied = 0
+
+    def start(self):
+        """Load the collection once and begin syncing; returns {doc_id: data}"""
+        if self.mode == 'listen':
+            try:
+                self.watch = self.store.watch(self._on_snapshot)
+                if self.initial_loaded.wait(self.initial_timeout):
+                    print("👂 Listening for learned Q&A changes")
+                    return self.initial
+                print("⚠️ Snapshot listener did not deliver in time - falling back to polling")
+                self.watch.unsubscribe()
+            except Exception as e:
+                print(f"⚠️ Snapshot listener unavailable ({e}) - falling back to polling")
+            self.watch = None
+            self.mode = 'poll'
+
+        docs = self.store.load_all()
+        for doc_id, data in docs.items():
+            self._track(doc_id, data)
+        if self.on_load:
+            self.on_load(docs)
+        self.thread = threading.Thread(target=self._poll_loop, name="qa-sync-poll", daemon=True)
+        self.thread.start()
+        print(f"🔁 Polling learned Q&A for changes every {self.poll_interval:g}s")
+        return docs
+
+    def stop(self):
+        self.stopping.set()
+        if self.watch is not None:
+            self.watch.unsubscribe()
+            self.watch = None
+
+    # ==================== LISTENER ====================
+
+    def _on_snapshot(self, col_snapshot, changes, read_time):
+        if not self.initial_loaded.is_set():
+            self.initial = {doc.id: doc.to_dict() for doc in col_snapshot}
+            if self.on_load:
+                self.on_load(self.initial)
+            self.initial_loaded.set()
+            return
+
+        for change in changes:
+            kind = change.type.name
+            doc = change.document
+            try:
+                if kind == 'REMOVED':
+                    self.on_remove(doc.id)
+                else:
+                    self.on_change(doc.id, doc.to_dict())
+                self.applied += 1
+            except Exception as e:
+                print(f"⚠️ Error applying learned Q&A change for {doc.id}: {e}")
+
+    # ==================== POLLING ====================
+
+    def _track(self, doc_id, data):
+        self.known_ids.add(doc_id)
+        stamp = updated_stamp(data)
+        if stamp is None:
+            return
+        self.seen[doc_id] = stamp
+        if self.last_seen is None or stamp > self.last_seen.timestamp():
+            self.last_seen = data['updated_at']
+
+    def _poll_loop(self):
+        polls = 0
+        while not self.stopping.wait(self.poll_interval):
+            polls += 1
+            try:
+                self.poll_once(reconcile=self.reconcile_every and polls % self.reconcile_every == 0)
+            except Exception as e:
+                print(f"⚠️ Learned Q&A poll failed: {e}")
+
+    def poll_once(self, reconcile=False):
+        """Apply documents updated since the last poll, optionally reconciling ids"""
+        since = None if self.last_seen is None else self.last_seen - timedelta(seconds=self.poll_margin)
+        for doc_id, data in self.store.changed_since(since).items():
+            if doc_id in self.seen and self.seen[doc_id] == updated_stamp(data):
+                continue
+            self._apply(doc_id, data)
+
+        if self.last_seen is not None:
+            # Older pairs can only come back with a newer updated_at
+            horizon = self.last_seen.timestamp() - self.poll_margin
+            self.seen = {doc_id: stamp for doc_id, stamp in self.seen.items() if stamp >= horizon}
+
+        if reconcile:
+            # Deletions leave no updated_at trail, so compare the id sets
+            current = self.store.ids()
+            for doc_id in self.known_ids - current:
+                self.on_remove(doc_id)
+                self.seen.pop(doc_id, None)
+                self.applied += 1
+            for doc_id in current - self.known_ids:
+                data = self.store.get(doc_id)
+                if data is not None:
+                    self._apply(doc_id, data)
+            self.known_ids = current
+
+    def _apply(self, doc_id, data):
+        self.on_change(doc_id, data)
+        self._track(doc_id, data)
+        self.applied += 1
+
+
+def updated_stamp(data):
+    """A pair's updated_at as a POSIX timestamp, or None"""
+    updated_at = data.get('updated_at') if data else None
+    return updated_at.timestamp() if isinstance(updated_at, datetime) else None
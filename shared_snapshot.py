@@ -0,0 +1,628 @@
+"""Learned Q&A shared between gunicorn workers through one memory-mapped file.
+
+Without it every worker streams the whole learned_qa collection at boot and
+builds its own trigram, near-duplicate and BM25 indexes, so memory grows with
+workers x collection size. With QA_SHARED_SNAPSHOT set, one worker (whoever
+holds the file's flock) loads the store, keeps it synced and publishes a
+compact read-only snapshot: pickled records plus the precomputed match
+features (trigram postings, MinHash band buckets, BM25 postings) in
+open-addressing tables. Every worker memory-maps it, so the pages are shared
+through the page cache, and queries read postings straight from the map.
+
+Republishing writes a new file and renames it over the old one; workers
+notice the new inode and swap to it in one step, replaying any local change
+the new file does not have yet. Changes made between publishes live in small
+in-memory layers on top of the snapshot (the regular index classes).
+
+Publish one ahead of time with:
+    python shared_snapshot.py [path]
+"""
+import mmap
+import os
+import pickle
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import defaultdict, Counter
+from collections.abc import MutableMapping
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: no publisher election
+    fcntl = None
+
+from prompt_context import BM25Index, tokenize, qa_document, qa_text, idf, term_weight
+from qa_dedupe import NearDuplicateIndex, Sketch, pair_questions, similarity, ROWS, THRESHOLD
+from qa_index import QAIndex, question_trigrams, shortlist, MAX_CANDIDATES
+from qa_record import QARecord
+from startup_snapshot import plain_value
+
+MAGIC = b'QASNAP\x00\x00'
+FORMAT_VERSION = 1
+
+# magic, format, pairs, sketches, generation, created_at, BM25 total length
+HEADER = struct.Struct('<8sIIIQdQ')
+SECTIONS = ('records', 'lengths', 'sketches', 'strings', 'ids', 'grams', 'terms', 'bands')
+SECTION_TABLE = struct.Struct(f'<{len(SECTIONS) * 2}Q')
+# pickled record (offset, length), lowercased question (offset, length), trigram count
+RECORD = struct.Struct('<QIQII')
+# pair index, question number (0 = question, then aliases), question (offset, length)
+SKETCH = struct.Struct('<IIQI')
+BAND_KEY = struct.Struct(f'<B{ROWS}Q')
+# Hash table: slot count, value count, then slots of (key offset, key length, value offset, value count)
+TABLE_HEADER = struct.Struct('<QQ')
+SLOT = struct.Struct('<QIQI')
+
+
+def align(buffer, size=8):
+    buffer.extend(b'\0' * (-len(buffer) % size))
+
+
+def stamp(qa_data):
+    """updated_at as seconds, for ordering a local change against a published one"""
+    updated_at = (qa_data or {}).get('updated_at')
+    return updated_at.timestamp() if isinstance(updated_at, datetime) else 0.0
+
+
+# ==================== FILE FORMAT ====================
+
+def pack_table(entries):
+    """Open-addressing table of {bytes key: [uint32, ...]}"""
+    slots = 2
+    while slots < len(entries) * 2:
+        slots *= 2
+    table = [None] * slots
+    for key in entries:
+        i = zlib.crc32(key) & (slots - 1)
+        while table[i] is not None:
+            i = (i + 1) & (slots - 1)
+        table[i] = key
+
+    keys, values = bytearray(), []
+    slot_bytes = bytearray()
+    for key in table:
+        if key is None:
+            slot_bytes += SLOT.pack(0, 0, 0, 0)
+            continue
+        slot_bytes += SLOT.pack(len(keys), len(key), len(values), len(entries[key]))
+        keys += key
+        values.extend(entries[key])
+    blob = bytearray(TABLE_HEADER.pack(slots, len(values)))
+    blob += slot_bytes
+    blob += struct.pack(f'<{len(values)}I', *values)
+    blob += keys
+    return blob
+
+
+def write_snapshot(path, learned_qa, generation=1):
+    """Atomically publish learned_qa and its match features at `path`"""
+    records = sorted(learned_qa.items())
+    strings = bytearray()
+
+    def put(text):
+        data = text.encode('utf-8')
+        strings.extend(data)
+        return len(strings) - len(data), len(data)
+
+    rows, lengths, sketches = bytearray(), [], bytearray()
+    ids, grams, terms, bands = {}, defaultdict(list), defaultdict(list), defaultdict(list)
+    total_length = 0
+    sketch_count = 0
+    for index, (qa_id, qa_data) in enumerate(records):
+        record = pickle.dumps({key: plain_value(value) for key, value in qa_data.items()},
+                              protocol=pickle.HIGHEST_PROTOCOL)
+        record_at = len(strings)
+        strings.extend(record)
+        text = qa_data.get('question', '').lower()
+        question_grams = question_trigrams(text)
+        rows += RECORD.pack(record_at, len(record), *put(text), len(question_grams))
+        ids[qa_id.encode('utf-8')] = [index]
+        for gram in question_grams:
+            grams[gram.encode('utf-8')].append(index)
+
+        counts = Counter(tokenize(qa_document(qa_data)))
+        for term, tf in counts.items():
+            terms[term.encode('utf-8')] += (index, tf)
+        lengths.append(sum(counts.values()))
+        total_length += lengths[-1]
+
+        for n, question in enumerate(pair_questions(qa_data)):
+            sketches += SKETCH.pack(index, n, *put(question))
+            for band, rows_ in Sketch(question).band_keys():
+                bands[BAND_KEY.pack(band, *rows_)].append(sketch_count)
+            sketch_count += 1
+
+    sections = {
+        'records': rows,
+        'lengths': struct.pack(f'<{len(lengths)}I', *lengths),
+        'sketches': sketches,
+        'strings': strings,
+        'ids': pack_table(ids),
+        'grams': pack_table(grams),
+        'terms': pack_table(terms),
+        'bands': pack_table(bands),
+    }
+    body = bytearray(HEADER.pack(MAGIC, FORMAT_VERSION, len(records), sketch_count, generation,
+                                 time.time(), total_length))
+    body += b'\0' * SECTION_TABLE.size
+    offsets = []
+    for name in SECTIONS:
+        align(body)
+        offsets += (len(body), len(sections[name]))
+        body += sections[name]
+    SECTION_TABLE.pack_into(body, HEADER.size, *offsets)
+
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as file:
+            file.write(body)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return len(body)
+
+
+class Table:
+    """Read side of pack_table over a mapped buffer"""
+
+    def __init__(self, buffer, offset):
+        self.buffer = buffer
+        self.slots, count = TABLE_HEADER.unpack_from(buffer, offset)
+        self.slots_at = offset + TABLE_HEADER.size
+        values_at = self.slots_at + self.slots * SLOT.size
+        self.values = memoryview(buffer)[values_at:values_at + count * 4].cast('I')
+        self.keys_at = values_at + count * 4
+
+    def get(self, key):
+        """The key's uint32 values (an empty view if absent)"""
+        mask = self.slots - 1
+        i = zlib.crc32(key) & mask
+        while True:
+            key_at, key_len, value_at, value_count = SLOT.unpack_from(self.buffer, self.slots_at + i * SLOT.size)
+            if not key_len:
+                return self.values[0:0]
+            start = self.keys_at + key_at
+            if key_len == len(key) and self.buffer[start:start + key_len] == key:
+                return self.values[value_at:value_at + value_count]
+            i = (i + 1) & mask
+
+
+class Snapshot:
+    """A published snapshot file, memory-mapped read-only"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            stat = os.fstat(file.fileno())
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.identity = (stat.st_ino, stat.st_mtime_ns)
+        magic, version, self.count, self.sketch_count, self.generation, self.created_at, self.total_length = \
+            HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} Q&A snapshot")
+        offsets = SECTION_TABLE.unpack_from(self.buffer, HEADER.size)
+        self.sections = {name: offsets[i * 2] for i, name in enumerate(SECTIONS)}
+        self.strings_at = self.sections['strings']
+        lengths_at = self.sections['lengths']
+        self.lengths = memoryview(self.buffer)[lengths_at:lengths_at + self.count * 4].cast('I')
+        self.ids = Table(self.buffer, self.sections['ids'])
+        self.grams = Table(self.buffer, self.sections['grams'])
+        self.terms = Table(self.buffer, self.sections['terms'])
+        self.bands = Table(self.buffer, self.sections['bands'])
+
+    def string(self, offset, length):
+        start = self.strings_at + offset
+        return self.buffer[start:start + length]
+
+    def record(self, index):
+        """(record offset, record length, question offset, question length, trigram count)"""
+        return RECORD.unpack_from(self.buffer, self.sections['records'] + index * RECORD.size)
+
+    def qa_data(self, index):
+        record_at, record_len = self.record(index)[:2]
+        return pickle.loads(self.string(record_at, record_len))
+
+    def question_text(self, index):
+        """Lowercased question and its trigram count"""
+        _, _, text_at, text_len, gram_count = self.record(index)
+        return self.string(text_at, text_len).decode('utf-8'), gram_count
+
+    def index_of(self, qa_id):
+        found = self.ids.get(qa_id.encode('utf-8'))
+        return found[0] if len(found) else None
+
+    def qa_ids(self):
+        """Pair ids in index order (the ids table is the only copy)"""
+        ids = [None] * self.count
+        table = self.ids
+        for i in range(table.slots):
+            key_at, key_len, value_at, value_count = SLOT.unpack_from(table.buffer, table.slots_at + i * SLOT.size)
+            if key_len:
+                start = table.keys_at + key_at
+                ids[table.values[value_at]] = table.buffer[start:start + key_len].decode('utf-8')
+        return ids
+
+    def sketch(self, number):
+        """(pair index, question) of a sketch"""
+        index, _, text_at, text_len = SKETCH.unpack_from(self.buffer, self.sections['sketches'] + number * SKETCH.size)
+        return index, self.string(text_at, text_len).decode('utf-8')
+
+
+# ==================== LAYERED VIEWS ====================
+# Each view answers from the snapshot plus a local layer of pairs saved,
+# edited or deleted since it was published. `hidden` holds the snapshot
+# indexes those changes replaced or removed.
+
+class SharedLearnedQA(MutableMapping):
+    """learned_qa dict over a snapshot"""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.ids = snapshot.qa_ids()
+        self.hidden = set()
+        self.live = {}
+        # qa_id -> updated_at seconds of snapshot pairs deleted locally
+        self.deleted = {}
+
+    def base_index(self, qa_id):
+        index = self.snapshot.index_of(qa_id)
+        return None if index is None or index in self.hidden else index
+
+    def __getitem__(self, qa_id):
+        if qa_id in self.live:
+            return self.live[qa_id]
+        index = self.base_index(qa_id)
+        if index is None:
+            raise KeyError(qa_id)
+        return QARecord(self.snapshot.qa_data(index))
+
+    def __setitem__(self, qa_id, qa_data):
+        index = self.base_index(qa_id)
+        if index is not None:
+            self.hidden.add(index)
+        self.deleted.pop(qa_id, None)
+        self.live[qa_id] = qa_data
+
+    def __delitem__(self, qa_id):
+        if qa_id in self.live:
+            previous = self.live.pop(qa_id)
+        else:
+            index = self.base_index(qa_id)
+            if index is None:
+                raise KeyError(qa_id)
+            previous = self.snapshot.qa_data(index)
+            self.hidden.add(index)
+        self.deleted[qa_id] = stamp(previous)
+
+    def __iter__(self):
+        yield from list(self.live)
+        for index, qa_id in enumerate(self.ids):
+            if index not in self.hidden:
+                yield qa_id
+
+    def __len__(self):
+        return self.snapshot.count - len(self.hidden) + len(self.live)
+
+    def pending(self, snapshot):
+        """Local changes `snapshot` does not include yet: ([(qa_id, data)], [qa_id])"""
+        changed = [(qa_id, qa_data) for qa_id, qa_data in self.live.items()
+                   if stamp(qa_data) > self.published_stamp(snapshot, qa_id)]
+        removed = []
+        for qa_id, updated in self.deleted.items():
+            index = snapshot.index_of(qa_id)
+            if index is not None and stamp(snapshot.qa_data(index)) <= updated:
+                removed.append(qa_id)
+        return changed, removed
+
+    @staticmethod
+    def published_stamp(snapshot, qa_id):
+        index = snapshot.index_of(qa_id)
+        return -1.0 if index is None else stamp(snapshot.qa_data(index))
+
+
+class SharedQAIndex(QAIndex):
+    """Trigram candidates from the snapshot's postings plus a local QAIndex"""
+
+    def __init__(self, snapshot, ids, max_candidates=MAX_CANDIDATES):
+        super().__init__(max_candidates)
+        self.snapshot = snapshot
+        self.ids = ids
+        self.hidden = set()
+
+    def __len__(self):
+        return super().__len__() + self.snapshot.count - len(self.hidden)
+
+    def add(self, qa_id, question):
+        self.hide(qa_id)
+        super().add(qa_id, question)
+
+    def remove(self, qa_id):
+        super().remove(qa_id)
+        self.hide(qa_id)
+
+    def hide(self, qa_id):
+        index = self.snapshot.index_of(qa_id)
+        if index is not None:
+            self.hidden.add(index)
+
+    def candidates(self, question):
+        query_grams = question_trigrams(question)
+        overlap = defaultdict(int)
+        for gram in query_grams:
+            for index in self.snapshot.grams.get(gram.encode('utf-8')):
+                overlap[index] += 1
+        for index in self.hidden.intersection(overlap):
+            del overlap[index]
+        selected = shortlist(question, query_grams, overlap, self.snapshot.question_text, self.max_candidates)
+        return super().candidates(question) | {self.ids[index] for index in selected}
+
+
+class SharedNearDuplicates(NearDuplicateIndex):
+    """LSH buckets from the snapshot plus a local NearDuplicateIndex"""
+
+    def __init__(self, snapshot, ids, threshold=THRESHOLD):
+        super().__init__(threshold)
+        self.snapshot = snapshot
+        self.ids = ids
+        self.hidden = set()
+
+    def __len__(self):
+        return super().__len__() + self.snapshot.count - len(self.hidden)
+
+    def add(self, qa_id, qa_data):
+        self.hide(qa_id)
+        super().add(qa_id, qa_data)
+
+    def remove(self, qa_id):
+        super().remove(qa_id)
+        self.hide(qa_id)
+
+    def hide(self, qa_id):
+        index = self.snapshot.index_of(qa_id)
+        if index is not None:
+            self.hidden.add(index)
+
+    def matches(self, sketch, exclude=None):
+        found = super().matches(sketch, exclude)
+        seen = set()
+        for band, rows in sketch.band_keys():
+            for number in self.snapshot.bands.get(BAND_KEY.pack(band, *rows)):
+                if number in seen:
+                    continue
+                seen.add(number)
+                index, question = self.snapshot.sketch(number)
+                qa_id = self.ids[index]
+                if index in self.hidden or qa_id == exclude:
+                    continue
+                score = similarity(sketch, Sketch(question, signature=False), self.threshold)
+                if score > found.get(qa_id, 0.0):
+                    found[qa_id] = score
+        return found
+
+
+class SharedBM25(BM25Index):
+    """BM25 over the snapshot's pairs plus a local index (resume chunks and changed pairs)"""
+
+    def __init__(self, snapshot, ids):
+        super().__init__()
+        self.snapshot = snapshot
+        self.ids = ids
+        self.hidden = set()
+        # Document frequency and length of hidden snapshot pairs, taken out of the stats
+        self.hidden_df = Counter()
+        self.hidden_length = 0
+
+    def __len__(self):
+        return super().__len__() + self.snapshot.count - len(self.hidden)
+
+    def add(self, doc_id, text):
+        self.hide(doc_id)
+        super().add(doc_id, text)
+
+    def remove(self, doc_id):
+        super().remove(doc_id)
+        self.hide(doc_id)
+
+    def hide(self, doc_id):
+        if not doc_id.startswith('qa:'):
+            return
+        index = self.snapshot.index_of(doc_id[3:])
+        if index is None or index in self.hidden:
+            return
+        self.hidden.add(index)
+        self.hidden_df.update(set(tokenize(qa_document(self.snapshot.qa_data(index)))))
+        self.hidden_length += self.snapshot.lengths[index]
+
+    def search(self, query, limit=10):
+        count = len(self)
+        if not count:
+            return []
+        average = (self.total_length + self.snapshot.total_length - self.hidden_length) / count or 1
+        scores = defaultdict(float)
+        base_scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term, {})
+            base = self.snapshot.terms.get(term.encode('utf-8'))
+            df = len(docs) + len(base) // 2 - self.hidden_df[term]
+            if df <= 0:
+                continue
+            weight = idf(count, df)
+            for doc_id, tf in docs.items():
+                scores[doc_id] += term_weight(weight, tf, self.lengths[doc_id], average)
+            for i in range(0, len(base), 2):
+                index = base[i]
+                if index not in self.hidden:
+                    base_scores[index] += term_weight(weight, base[i + 1], self.snapshot.lengths[index], average)
+        # Only the best snapshot pairs get their ids decoded
+        for score, index in sorted(((score, index) for index, score in base_scores.items()), reverse=True)[:limit]:
+            scores[f"qa:{self.ids[index]}"] = score
+        return sorted(((score, doc_id) for doc_id, score in scores.items()), reverse=True)[:limit]
+
+
+class SharedTexts(dict):
+    """Prompt texts: local entries, falling back to the snapshot's pairs"""
+
+    def __init__(self, snapshot, hidden):
+        super().__init__()
+        self.snapshot = snapshot
+        self.hidden = hidden
+
+    def __missing__(self, doc_id):
+        index = self.snapshot.index_of(doc_id[3:]) if doc_id.startswith('qa:') else None
+        if index is None or index in self.hidden:
+            raise KeyError(doc_id)
+        return qa_text(self.snapshot.qa_data(index))
+
+
+def shared_views(snapshot):
+    """(learned_qa, qa_index, near_duplicates, BM25 index, prompt texts) over a snapshot"""
+    learned_qa = SharedLearnedQA(snapshot)
+    ids = learned_qa.ids
+    bm25 = SharedBM25(snapshot, ids)
+    return (learned_qa, SharedQAIndex(snapshot, ids), SharedNearDuplicates(snapshot, ids),
+            bm25, SharedTexts(snapshot, bm25.hidden))
+
+
+# ==================== PUBLISHER / FOLLOWERS ====================
+
+class SnapshotCoordinator:
+    """Elects the publishing worker and swaps every worker to new snapshots.
+
+    The publisher is whichever process holds an exclusive flock on
+    `<path>.lock`; when it exits the lock is released and the next worker to
+    check takes over. Callbacks: on_lead() once this worker becomes the
+    publisher, on_swap(snapshot) for every newly published file, and
+    publish() when the publisher has unpublished changes.
+    """
+
+    def __init__(self, path, on_lead, on_swap, publish, check_interval=2.0, publish_delay=2.0):
+        self.path = path
+        self.on_lead = on_lead
+        self.on_swap = on_swap
+        self.publish = publish
+        self.check_interval = check_interval
+        self.publish_delay = publish_delay
+
+        self.leader = False
+        self.lock_fd = None
+        self.identity = None
+        self.generation = 0
+        self.dirty_since = None
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stopping = threading.Event()
+
+    @classmethod
+    def from_env(cls, path, **callbacks):
+        return cls(path, check_interval=float(os.getenv('QA_SHARED_CHECK_INTERVAL', '2')),
+                   publish_delay=float(os.getenv('QA_SHARED_PUBLISH_DELAY', '2')), **callbacks)
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._loop, name="qa-shared-snapshot", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.stopping.set()
+
+    def try_lead(self):
+        """Take the publisher lock if nobody holds it; True if this worker now publishes"""
+        if self.leader:
+            return True
+        if fcntl is None:
+            raise OSError("file locks are not available on this platform")
+        fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self.lock_fd = fd
+        self.leader = True
+        return True
+
+    def mark_dirty(self):
+        """The publisher applied a change the published file does not have"""
+        if self.leader:
+            with self.lock:
+                if self.dirty_since is None:
+                    self.dirty_since = time.monotonic()
+
+    def write(self, learned_qa):
+        """Publish learned_qa (publisher only) and return the mapped result"""
+        with self.lock:
+            self.dirty_since = None
+            self.generation += 1
+            generation = self.generation
+        started = time.perf_counter()
+        size = write_snapshot(self.path, learned_qa, generation)
+        print(f"🗺️ Published shared Q&A snapshot #{generation}: {len(learned_qa)} pairs, "
+              f"{size / 1e6:.1f} MB in {time.perf_counter() - started:.2f}s")
+        return self.load()
+
+    def load(self):
+        """Map the current file; None if there is none yet"""
+        try:
+            snapshot = Snapshot(self.path)
+        except FileNotFoundError:
+            return None
+        with self.lock:
+            self.identity = snapshot.identity
+            self.generation = max(self.generation, snapshot.generation)
+        return snapshot
+
+    def wait_for_file(self, timeout):
+        """Map the first published file, waiting up to `timeout` seconds for it"""
+        deadline = time.monotonic() + timeout
+        while True:
+            snapshot = self.load()
+            if snapshot is not None or time.monotonic() >= deadline or self.leader:
+                return snapshot
+            time.sleep(0.05)
+
+    def check(self):
+        """One round: take over if the publisher is gone, then republish or pick up a new file"""
+        if not self.leader and self.try_lead():
+            print("🗺️ Took over publishing the shared Q&A snapshot")
+            self.on_lead()
+        if self.leader:
+            with self.lock:
+                due = self.dirty_since is not None and time.monotonic() - self.dirty_since >= self.publish_delay
+            if due:
+                self.publish()
+            return
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if (stat.st_ino, stat.st_mtime_ns) != self.identity:
+            snapshot = self.load()
+            if snapshot is not None:
+                self.on_swap(snapshot)
+
+    def _loop(self):
+        while not self.stopping.wait(self.check_interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"⚠️ Shared Q&A snapshot check failed: {e}")
+
+
+if __name__ == "__main__":
+    # Load everything from the store and publish the file workers will map
+    path = sys.argv[1] if len(sys.argv) > 1 else os.getenv('QA_SHARED_SNAPSHOT', 'learned_qa.snap')
+    os.environ['QA_SHARED_SNAPSHOT'] = ''
+    os.environ['QA_SYNC_MODE'] = 'off'
+    os.environ['QA_WRITE_BEHIND'] = 'false'
+
+    from chatbot import chatbot
+    if not chatbot.qa_store:
+        raise SystemExit("No learned Q&A store - set up Firebase or QA_STORE=sqlite")
+    size = write_snapshot(path, dict(chatbot.learned_qa))
+    print(f"🗺️ Wrote {len(chatbot.learned_qa)} pairs ({size / 1e6:.1f} MB) to {path}")
@@ -0,0 +1,266 @@
+"""Single-flight coalescing of identical in-flight AI questions.
+
+When a shared link sends a burst of visitors with the same starter question,
+every request misses the learned Q&A and the answer cache at once and fires
+its own GROQ call. SingleFlight lets the first request for a normalized
+question generate the answer while concurrent duplicates wait for it.
+
+Within a worker, duplicates wait on the leader's Flight. When SINGLE_FLIGHT_DIR
+is set, workers sharing a host also coordinate: the leader holds an flock on
+<dir>/<sha1>.lock while it generates, then leaves the answer in
+<dir>/<sha1>.json for workers that were waiting on the lock. The file only
+has to bridge that hand-off, so it expires after a few seconds; later askers
+are answered by the learned Q&A the leader saved.
+
+Waiters that time out, or whose leader produced nothing, fall back to
+generating the answer themselves, so coalescing never turns a slow answer
+into no answer.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process coalescing only
+    fcntl = None
+
+
+class Flight:
+    """One in-flight generation that duplicates can wait on"""
+
+    def __init__(self, key):
+        self.key = key
+        self.result = None
+        self.waiters = 0
+        self.lock_file = None
+        self.done = threading.Event()
+        self.callbacks = []
+        self.lock = threading.Lock()
+
+    def wait(self, timeout=None):
+        """Block until the leader finishes; returns its result or None"""
+        self.done.wait(timeout)
+        return self.result
+
+    async def wait_async(self, timeout=None):
+        """Event-loop friendly wait for asgi.py"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        with self.lock:
+            if self.done.is_set():
+                return self.result
+            self.callbacks.append(wake)
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.result
+
+    def resolve(self, result):
+        with self.lock:
+            self.result = result
+            self.done.set()
+            callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback()
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key.
+
+    Callers use join/finish rather than a wrapped function so a streaming
+    leader can publish its answer once the stream is complete:
+
+        flight, leader = flights.join(key)
+        if not leader:
+            result = flight.wait(flights.wait_timeout)
+        ...
+        flights.finish(flight, result)  # leaders only, always
+    """
+
+    def __init__(self, lock_dir=None, wait_timeout=35.0, result_ttl=5.0, poll_interval=0.05):
+        self.wait_timeout = wait_timeout
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self.lock_dir = lock_dir if lock_dir and fcntl else None
+        if lock_dir and not fcntl:
+            print("⚠️ File locks unavailable - coalescing AI questions within this worker only")
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+
+        self.flights = {}
+        self.lock = threading.Lock()
+        self.leaders = 0
+        self.joined = 0
+        self.shared = 0
+
+    @classmethod
+    def from_env(cls):
+        """Build from SINGLE_FLIGHT_* environment overrides"""
+        return cls(
+            lock_dir=os.getenv('SINGLE_FLIGHT_DIR') or None,
+            wait_timeout=float(os.getenv('SINGLE_FLIGHT_TIMEOUT', '35')),
+            result_ttl=float(os.getenv('SINGLE_FLIGHT_RESULT_TTL', '5')),
+        )
+
+    # ==================== PUBLIC API ====================
+
+    def join(self, key):
+        """Return (flight, leader).
+
+        Non-leaders read the answer from the flight: it is either already
+        resolved (another worker's result file) or resolved by the leader.
+        """
+        with self.lock:
+            flight = self.flights.get(key)
+            if flight is not None:
+                flight.waiters += 1
+                self.joined += 1
+                return flight, False
+            flight = self.flights[key] = Flight(key)
+            self.leaders += 1
+
+        if self.lock_dir:
+            result = self.claim_host(flight)
+            if result is not None:
+                with self.lock:
+                    self.shared += 1
+                self.finish(flight, result)
+                return flight, False
+        return flight, True
+
+    def in_flight(self, key):
+        """True if this worker is already answering key"""
+        with self.lock:
+            return key in self.flights
+
+    def finish(self, flight, result):
+        """Publish the leader's result (None if it failed) and release the key"""
+        if flight.lock_file is not None:
+            if result is not None:
+                self.write_result(flight.key, result)
+            self.release_host(flight)
+        with self.lock:
+            if self.flights.get(flight.key) is flight:
+                del self.flights[flight.key]
+        flight.resolve(result)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'in_flight': len(self.flights),
+                'leaders': self.leaders,
+                'joined': self.joined,
+                'shared': self.shared,
+            }
+
+    # ==================== CROSS-WORKER ====================
+
+    def path(self, key, suffix):
+        return os.path.join(self.lock_dir, hashlib.sha1(key.encode()).hexdigest() + suffix)
+
+    def claim_host(self, flight):
+        """Take the host-wide lock for a key; returns another worker's fresh result if there is one"""
+        path = self.path(flight.key, '.lock')
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            try:
+                handle = open(path, 'a+')
+            except OSError as e:
+                print(f"⚠️ Single-flight lock unavailable: {e}")
+                return None
+            if not self.lock_until(handle, deadline):
+                # The other worker is stuck; answer without the lock
+                handle.close()
+                return None
+            if same_file(handle, path):
+                break
+            # sweep() unlinked the file while this worker waited on it; lock the one at the path now
+            handle.close()
+
+        flight.lock_file = handle
+        return self.read_result(flight.key)
+
+    def lock_until(self, handle, deadline):
+        """Poll for an exclusive flock until the deadline; True once held"""
+        while True:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    return False
+                time.sleep(self.poll_interval)
+
+    def release_host(self, flight):
+        try:
+            fcntl.flock(flight.lock_file, fcntl.LOCK_UN)
+            flight.lock_file.close()
+        except OSError:
+            pass
+        flight.lock_file = None
+
+    def read_result(self, key):
+        """Answer another worker left for this key, if still fresh"""
+        try:
+            with open(self.path(key, '.json')) as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if entry.get('key') != key or time.time() - entry.get('created_at', 0) > self.result_ttl:
+            return None
+        return entry.get('result')
+
+    def write_result(self, key, result):
+        path = self.path(key, '.json')
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w') as file:
+                json.dump({'key': key, 'result': result, 'created_at': time.time()}, file)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError) as e:
+            print(f"⚠️ Could not share single-flight result: {e}")
+        self.sweep()
+
+    def sweep(self):
+        """Remove expired result files, orphaned temp files and idle lock files nobody holds"""
+        now = time.time()
+        try:
+            entries = list(os.scandir(self.lock_dir))
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                age = now - entry.stat().st_mtime
+                if entry.name.endswith(('.json', '.tmp')) and age > self.result_ttl:
+                    os.remove(entry.path)
+                elif entry.name.endswith('.lock') and age > self.result_ttl + self.wait_timeout:
+                    self.remove_lock(entry.path)
+            except OSError:
+                pass
+
+    def remove_lock(self, path):
+        """Unlink a lock file only while holding its lock, so no leader loses the file it holds"""
+        with open(path) as handle:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return
+            # A waiter that opened it earlier sees the unlink in claim_host and reopens the path
+            os.remove(path)
+
+
+def same_file(handle, path):
+    """True if an open file is still the one linked at path"""
+    try:
+        return os.path.samestat(os.fstat(handle.fileno()), os.stat(path))
+    except OSError:
+        return False
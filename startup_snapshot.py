@@ -0,0 +1,99 @@
+"""On-disk startup snapshot of resume data and learned Q&A pairs.
+
+A cold start used to parse resume.yaml and stream the whole learned_qa
+collection before the first request could be answered. When
+STARTUP_SNAPSHOT_PATH is set the chatbot instead unpickles the last snapshot
+(a few milliseconds), answers from it immediately and refreshes from
+Firestore in the background, writing a new snapshot once the live load is in.
+
+Snapshots are only ever read from a path this app writes itself; pickle is
+used because it round-trips dicts of datetimes far faster than JSON or YAML.
+
+Build one ahead of a deploy with:
+    python startup_snapshot.py [path]
+"""
+import hashlib
+import os
+import pickle
+import sys
+import threading
+import time
+from datetime import datetime
+
+SNAPSHOT_VERSION = 1
+
+
+def resume_digest(path):
+    """Content hash of resume.yaml, so a stale snapshot is never served"""
+    try:
+        with open(path, 'rb') as file:
+            return hashlib.sha1(file.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def plain_value(value):
+    """Replace Firestore datetime subclasses with plain datetimes"""
+    if isinstance(value, datetime) and type(value) is not datetime:
+        return datetime(value.year, value.month, value.day, value.hour, value.minute,
+                        value.second, value.microsecond, value.tzinfo)
+    return value
+
+
+def load_snapshot(path):
+    """Return the snapshot dict at `path`, or None if missing or unreadable"""
+    try:
+        with open(path, 'rb') as file:
+            snapshot = pickle.load(file)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"⚠️ Ignoring unreadable startup snapshot {path}: {e}")
+        return None
+
+    if not isinstance(snapshot, dict) or snapshot.get('version') != SNAPSHOT_VERSION:
+        print(f"⚠️ Ignoring startup snapshot {path} from another version")
+        return None
+    return snapshot
+
+
+def save_snapshot(path, resume, resume_hash, learned_qa):
+    """Atomically write a snapshot so readers never see a partial file"""
+    snapshot = {
+        'version': SNAPSHOT_VERSION,
+        'created_at': time.time(),
+        'resume': resume,
+        'resume_digest': resume_hash,
+        'learned_qa': {
+            qa_id: {key: plain_value(value) for key, value in qa_data.items()}
+            for qa_id, qa_data in learned_qa.items()
+        },
+    }
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as file:
+            pickle.dump(snapshot, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        print(f"📸 Wrote startup snapshot with {len(learned_qa)} Q&A pairs to {path}")
+        return True
+    except Exception as e:
+        print(f"⚠️ Could not write startup snapshot {path}: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
+
+
+if __name__ == "__main__":
+    # Load everything live, then write the snapshot the next cold start will use
+    if len(sys.argv) > 1:
+        os.environ['STARTUP_SNAPSHOT_PATH'] = sys.argv[1]
+    os.environ.setdefault('STARTUP_SNAPSHOT_PATH', 'startup_snapshot.pickle')
+    os.environ['QA_SYNC_MODE'] = 'off'
+    os.environ['QA_WRITE_BEHIND'] = 'false'
+
+    from chatbot import chatbot
+    if not chatbot.qa_store:
+        print("⚠️ Q&A store unavailable - snapshot will only contain resume data")
+    chatbot.write_snapshot()
@@ -0,0 +1,46 @@
+from admission import AdmissionControl, client_key
+from groq_stub import GroqStub
+from llm_client import GroqClient
+
+
+def test_client_and_global_buckets(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('admission.time.time', lambda: now[0])
+    limits = AdmissionControl(client_rate=1.0, client_burst=2, global_rate=1.0, global_burst=3)
+
+    assert [limits.admit('a') for _ in range(3)] == [None, None, 'client']
+    # A refused client doesn't spend a global token, so b gets the last one
+    assert [limits.admit('b') for _ in range(2)] == [None, 'global']
+
+    now[0] += 1.0
+    assert limits.admit('c') is None
+    assert limits.admit('a') == 'global'
+
+
+def test_workers_share_buckets_through_file(tmp_path, monkeypatch):
+    monkeypatch.setattr('admission.time.time', lambda: 1000.0)
+    # Two instances stand in for two gunicorn workers
+    path = str(tmp_path / 'ratelimit')
+    first, second = (AdmissionControl(client_rate=1.0, client_burst=2, global_rate=0, shared_path=path)
+                     for _ in range(2))
+    assert [first.admit('a'), second.admit('a'), first.admit('a')] == [None, None, 'client']
+    assert second.admit('b') is None
+
+
+def test_client_key_uses_last_proxy_hop():
+    assert client_key("1.1.1.1, 2.2.2.2", "10.0.0.1") == "2.2.2.2"
+    assert client_key(None, "10.0.0.1") == "10.0.0.1"
+
+
+def test_chatbot_sheds_when_over_budget(patch_chatbot):
+    from chatbot import BUSY_MESSAGE
+
+    with GroqStub() as stub:
+        chatbot = patch_chatbot(llm=GroqClient('test-key', base_url=stub.url),
+                                admission=AdmissionControl(client_rate=0.001, client_burst=1, global_rate=0))
+        first = chatbot.get_response("Which harbor lantern compass would you pick?", client='t')
+        busy = chatbot.get_response("Which velvet teapot orbit would you pick?", client='t')
+        unlimited = chatbot.get_response("Which velvet teapot orbit would you pick?")
+        assert first.startswith(stub.answer) and unlimited.startswith(stub.answer)
+        assert busy == BUSY_MESSAGE and len(stub.requests) == 2
+        assert chatbot.metrics.summary()['admission']['limited'].get('client', 0) >= 1
@@ -0,0 +1,78 @@
+from answer_cache import AnswerCache, normalize_question
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_rewordings_share_one_entry():
+    assert normalize_question("what's your tech stack?") == normalize_question("What is your tech stack") \
+        == "what is your tech stack"
+    cache = AnswerCache(clock=FakeClock())
+    cache.set("what's your tech stack?", "Python and React")
+    assert cache.get("What is your tech stack") == "Python and React"
+    assert cache.stats()['size'] == 1
+
+    cache.invalidate("WHAT IS YOUR TECH STACK!!", None, "")
+    assert cache.get("what's your tech stack?") is None and cache.stats()['size'] == 0
+    cache.set("?!", "nothing to key on")
+    assert cache.stats()['size'] == 0
+
+
+def test_evicts_least_recently_used_at_capacity():
+    cache = AnswerCache(max_size=2, clock=FakeClock())
+    cache.set("first", 1)
+    cache.set("second", 2)
+    # Reading "first" makes "second" the oldest
+    assert cache.get("first") == 1
+    cache.set("third", 3)
+    assert cache.get("second") is None
+    assert (cache.get("first"), cache.get("third")) == (1, 3)
+
+    # Rewriting an entry refreshes it instead of taking a second slot
+    cache.set("first", "one")
+    cache.set("fourth", 4)
+    assert cache.get("third") is None and cache.get("first") == "one"
+    assert cache.stats()['evictions'] == 2
+
+    assert AnswerCache(max_size=0).get("first") is None
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = AnswerCache(ttl=60, clock=clock)
+    cache.set("where are you based", "Texas")
+    clock.now += 59.9
+    assert cache.get("where are you based") == "Texas"
+    # Reads do not extend an entry's life
+    clock.now += 0.1
+    assert cache.get("where are you based") is None
+    assert cache.stats()['size'] == 0
+
+    cache.set("where are you based", "Seattle")
+    clock.now += 30
+    assert cache.get("where are you based") == "Seattle"
+
+
+def test_stats_counts_hits_misses_and_evictions():
+    clock = FakeClock()
+    cache = AnswerCache(max_size=1, ttl=10, clock=clock)
+    assert cache.stats() == {'size': 0, 'max_size': 1, 'ttl': 10, 'hits': 0, 'misses': 0, 'evictions': 0,
+                             'hit_rate': 0.0}
+    cache.get("a")
+    cache.set("a", "answer a")
+    cache.get("a")
+    cache.set("b", "answer b")
+    cache.get("b")
+    cache.get("b")
+    clock.now += 10
+    cache.get("b")
+    assert cache.stats() == {'size': 0, 'max_size': 1, 'ttl': 10, 'hits': 3, 'misses': 2, 'evictions': 1,
+                             'hit_rate': 60.0}
+
+    cache.clear()
+    assert cache.stats()['hits'] == 3
@@ -0,0 +1,61 @@
+from datetime import datetime
+
+from answer_cache import canonical_question
+from app import app, HELP_MESSAGE
+from chatbot import chatbot
+
+
+def test_canonical_question():
+    assert canonical_question("  What's your   GitHub?? ") == "what's your github"
+    assert canonical_question("?!") == ""
+
+
+def test_help_is_cacheable_and_revalidates():
+    client = app.test_client()
+    first = client.get("/api/answer?q=help")
+    assert first.status_code == 200 and first.json['response'] == HELP_MESSAGE
+    assert "s-maxage=" in first.headers['Cache-Control'] and "stale-while-revalidate=" in first.headers['Cache-Control']
+    assert first.headers['ETag'].startswith('"help-')
+
+    again = client.get("/api/answer?q=help", headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304 and not again.data
+
+    redirected = client.get("/api/answer?q=Help%3F")
+    assert redirected.status_code == 308 and redirected.location.endswith("/api/answer?q=help")
+    assert client.get("/api/answer?q=").status_code == 400
+
+
+def test_learned_answers_are_cached_once_reviewed():
+    client = app.test_client()
+    question = "which lighthouse keeper teapot do you prefer"
+    pair = {'question': question, 'answer': "The brass one.", 'ai_generated': True, 'reviewed': False,
+            'created_at': datetime(2024, 1, 1), 'updated_at': datetime(2024, 1, 1)}
+    chatbot.start_store()
+    try:
+        chatbot.record_qa('etag_test', pair, replace=True)
+        # Unreviewed AI answers may still change, and anything else goes to /api/chat
+        assert client.get(f"/api/answer?q={question}").status_code == 204
+        assert client.get("/api/answer?q=which velvet harbor orbit is best").status_code == 204
+
+        chatbot.record_qa('etag_test', dict(pair, reviewed=True, updated_at=datetime(2024, 1, 2)), replace=True)
+        reviewed = client.get(f"/api/answer?q={question}")
+        assert reviewed.status_code == 200 and reviewed.json == {
+            'response': "The brass one.", 'tier': 'learned', 'status': 'success'}
+        etag = reviewed.headers['ETag']
+        assert client.get(f"/api/answer?q={question}", headers={'If-None-Match': etag}).status_code == 304
+
+        # An edit changes the tag, so caches holding the old answer refetch it
+        chatbot.record_qa('etag_test', dict(pair, answer="The copper one.", reviewed=True,
+                                            updated_at=datetime(2024, 1, 3)), replace=True)
+        edited = client.get(f"/api/answer?q={question}", headers={'If-None-Match': etag})
+        assert edited.status_code == 200 and edited.headers['ETag'] != etag
+        assert edited.json['response'] == "The copper one."
+    finally:
+        chatbot.forget_qa('etag_test')
+
+
+def test_resume_answers_are_tagged_with_the_resume_version():
+    client = app.test_client()
+    response = client.get("/api/answer?q=what are your skills")
+    assert response.status_code == 200 and response.json['tier'] == 'resume'
+    assert response.headers['ETag'].startswith(f'"resume-{chatbot.compiled_resume.digest[:16]}-')
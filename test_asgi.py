@@ -0,0 +1,102 @@
+import asyncio
+import json
+
+import httpx
+
+from app import HELP_MESSAGE
+from asgi import app
+from fake_firestore import FakeFirestore
+from groq_stub import GroqStub
+from llm_client import AsyncGroqClient
+from model_router import ModelRouter
+from qa_store import FirestoreStore
+
+
+def sse_events(text):
+    """[(event, data)] from a Server-Sent Events body"""
+    events = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields.get('event', 'message'), json.loads(fields['data'])))
+    return events
+
+
+def run(requests):
+    """Send requests(client) to the ASGI app and return what it returns"""
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await requests(client)
+    return asyncio.run(main())
+
+
+def test_chat_answers_json_and_streams(patch_chatbot):
+    db = FakeFirestore()
+
+    async def requests(client):
+        chatbot = patch_chatbot(async_llm=AsyncGroqClient('test-key', base_url=stub.url, max_retries=0),
+                                models=ModelRouter(mode='fast'), qa_store=FirestoreStore(db), qa_writer=None)
+        try:
+            answered = await client.post("/api/chat", json={'message': "Which harbor lantern compass would you pick?"})
+            streamed = await client.post("/api/chat", json={'message': "Which velvet teapot orbit is best?",
+                                                            'stream': True})
+            helped = await client.post("/chat", json={'question': "help"}, headers={'Accept': "text/event-stream"})
+        finally:
+            await chatbot.async_llm.close()
+        return answered, streamed, helped
+
+    with GroqStub(answer="Stub answer.") as stub:
+        answered, streamed, helped = run(requests)
+
+    assert answered.status_code == 200 and answered.headers['access-control-allow-origin'] == "*"
+    assert answered.json()['status'] == "success" and answered.json()['response'].startswith("Stub answer.")
+
+    assert streamed.headers['content-type'].startswith("text/event-stream")
+    events = sse_events(streamed.text)
+    assert events[-1] == ('done', {'status': 'success'})
+    tokens = "".join(data['token'] for event, data in events if event == 'message')
+    assert tokens.startswith("Stub answer.")
+    assert events[0][1]['token'] != tokens
+
+    assert sse_events(helped.text) == [('message', {'token': HELP_MESSAGE}), ('done', {'status': 'success'})]
+    assert len(stub.requests) == 2 and len(db.collections['learned_qa']) == 2
+
+
+def test_chat_error_paths(patch_chatbot):
+    async def broken(question, client=None):
+        raise RuntimeError("GROQ exploded")
+
+    async def broken_stream(question, client=None):
+        yield "Half"
+        raise RuntimeError("connection reset")
+
+    patch_chatbot(get_response_async=broken, get_response_stream_async=broken_stream)
+
+    async def requests(client):
+        return (await client.post("/api/chat", content=b"{not json"),
+                await client.post("/api/chat", json={'message': ""}),
+                await client.post("/api/chat", json={'message': "Which harbor lantern compass?"}),
+                await client.post("/api/chat", json={'message': "Which harbor lantern compass?", 'stream': True}))
+
+    invalid, empty, failed, failed_stream = run(requests)
+    assert (invalid.status_code, invalid.json()) == (400, {'error': "Invalid JSON body"})
+    assert (empty.status_code, empty.json()) == (400, {'error': "No message provided"})
+    assert failed.status_code == 500 and failed.json()['error'] == "GROQ exploded"
+    assert sse_events(failed_stream.text) == [
+        ('message', {'token': "Half"}),
+        ('error', {'error': "connection reset", 'message': "Failed to generate AI response."}),
+    ]
+
+
+def test_other_routes_go_to_flask():
+    async def requests(client):
+        answer = await client.get("/api/answer", params={'q': "help"})
+        revalidated = await client.get("/api/answer", params={'q': "help"},
+                                       headers={'If-None-Match': answer.headers['ETag']})
+        return answer, revalidated, await client.get("/api/chat"), await client.get("/metrics")
+
+    answer, revalidated, chat_get, metrics = run(requests)
+    assert answer.status_code == 200 and answer.json()['response'] == HELP_MESSAGE
+    assert revalidated.status_code == 304
+    # Only POST takes the async route; anything else is Flask's to answer
+    assert chat_get.status_code == 405
+    assert "# TYPE chatbot_answer_seconds histogram" in metrics.text
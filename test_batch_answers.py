@@ -0,0 +1,35 @@
+import time
+
+from batch_answers import answer_batch, parse_questions
+from fake_firestore import FakeFirestore
+from groq_stub import GroqStub
+from llm_client import GroqClient
+from qa_store import FirestoreStore
+
+
+def test_parse_questions():
+    items = parse_questions(['{"question": "What is RAG?", "id": 7}', '"plain string"', '', '{bad', '{"message": ""}'])
+    assert items == [
+        {'index': 0, 'id': 7, 'question': "What is RAG?"},
+        {'index': 1, 'question': "plain string"},
+        {'index': 2, 'error': "Invalid JSON line"},
+        {'index': 3, 'error': "No question provided"},
+    ]
+
+
+def test_fans_out_misses_and_saves_in_one_commit(patch_chatbot):
+    questions = [f"harbor lantern {i}?" for i in range(12)] + ["Harbor lantern 3", "what are your skills"]
+    db = FakeFirestore()
+    with GroqStub(latency=0.3) as stub:
+        chatbot = patch_chatbot(llm=GroqClient('test-key', base_url=stub.url), qa_store=FirestoreStore(db),
+                                qa_writer=None)
+        started = time.monotonic()
+        results = list(answer_batch(chatbot, parse_questions(f'"{q}"' for q in questions), concurrency=6))
+        elapsed = time.monotonic() - started
+
+        assert sorted(result['index'] for result in results) == list(range(len(questions)))
+        assert [result['tier'] for result in results if result['index'] == 13] == ['resume']
+        # 12 distinct misses in two waves of 6, the repeat shares its call
+        assert len(stub.requests) == 12
+        assert elapsed < 1.5
+        assert db.commits == [13]
@@ -0,0 +1,45 @@
+from chatbot import FallbackAnswer
+from fake_firestore import FakeFirestore
+from llm_client import LLMError
+from qa_store import FirestoreStore
+from single_flight import SingleFlight
+
+
+class BrokenLLM:
+    """Streams half an answer, then loses the connection; plain chat calls fail outright"""
+
+    def stream_chat(self, payload):
+        yield "Half of"
+        yield " an answer"
+        raise LLMError("connection reset mid-stream")
+
+    def chat(self, payload):
+        raise LLMError("GROQ unavailable")
+
+
+class RecordingFlights(SingleFlight):
+    def __init__(self):
+        super().__init__()
+        self.published = []
+
+    def finish(self, flight, result):
+        self.published.append(result)
+        super().finish(flight, result)
+
+
+def test_failed_answers_are_not_saved_or_shared(patch_chatbot):
+    db = FakeFirestore()
+    flights = RecordingFlights()
+    chatbot = patch_chatbot(llm=BrokenLLM(), flights=flights, qa_store=FirestoreStore(db), qa_writer=None)
+    question = "Which lighthouse lens polish do you recommend?"
+    chunks = list(chatbot.get_response_stream(question))
+    assert chunks[:2] == ["Half of", " an answer"]
+    assert isinstance(chunks[2], FallbackAnswer) and chunks[2].startswith("That's a great question")
+
+    response = chatbot.get_response(question)
+    assert response.startswith("That's a great question")
+
+    # Waiters answer on their own instead of repeating the apology, and nothing is learned
+    assert flights.published == [None, None]
+    assert not db.collections.get('learned_qa')
+    assert chatbot.answer_cache.get(question) is None
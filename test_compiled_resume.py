@@ -0,0 +1,103 @@
+import os
+
+import pytest
+import yaml
+
+from compiled_resume import CompiledResume, ResumeError, ResumeLoader
+
+RESUME = {
+    'personal': {'name': 'Adarsh Gella', 'location': 'Richardson, Texas', 'email': 'a@example.com'},
+    'projects': [{'name': 'Rahify', 'description': 'AI travel planner', 'technologies': ['React', 'Groq']}],
+    'skills': {'languages': ['Python', 'TypeScript']},
+}
+
+
+def write_resume(path, resume, bump=0):
+    with open(path, 'w') as file:
+        if isinstance(resume, str):
+            file.write(resume)
+        else:
+            yaml.safe_dump(resume, file)
+    # Two writes inside one mtime tick must still look like an edit
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + bump * 1_000_000_000))
+
+
+def test_compiled_resume_is_read_only_and_prerendered():
+    compiled = CompiledResume(RESUME, 'digest')
+    assert len(compiled.router.rendered) == len(compiled.router)
+    assert compiled.answer("tell me about rahify").startswith("**Rahify**")
+    assert compiled.prompt_prefix and any(chunk_id == 'project:Rahify' for chunk_id, _ in compiled.chunks)
+    with pytest.raises(AttributeError):
+        compiled.data = {}
+    with pytest.raises(ResumeError):
+        CompiledResume(dict(RESUME, projects=[{'description': 'no name'}], skills=['Python']))
+
+
+def test_loader_swaps_new_versions_and_keeps_the_last_good_one(tmp_path):
+    path = str(tmp_path / 'resume.yaml')
+    write_resume(path, RESUME)
+    swapped = []
+    loader = ResumeLoader(path, check_interval=0, on_swap=swapped.append)
+    first = loader.load()
+    assert loader.check() is first and not swapped
+
+    write_resume(path, dict(RESUME, personal=dict(RESUME['personal'], location='Seattle')), bump=1)
+    second = loader.check()
+    assert swapped == [second] and second.version == 2
+    assert second.answer("where are you based?") == "I'm based in Seattle"
+    assert first.answer("where are you based?") == "I'm based in Richardson, Texas"
+
+    # A broken edit is reported once and the previous version keeps serving
+    write_resume(path, "personal: [unclosed", bump=2)
+    assert loader.check() is second and loader.last_error
+    with pytest.raises(ResumeError):
+        loader.reload()
+    write_resume(path, "", bump=3)
+    assert loader.check() is second
+
+    write_resume(path, RESUME, bump=4)
+    assert loader.check().version == 3 and loader.last_error is None
+    assert loader.reload() == (loader.current, False)
+
+
+def test_reloads_every_shape_the_validator_accepts(tmp_path):
+    path = str(tmp_path / 'resume.yaml')
+    write_resume(path, RESUME)
+    loader = ResumeLoader(path, check_interval=0)
+    loader.load()
+
+    relaxed = dict(RESUME, interests=["Sailing", "Chess"], projects=None, achievements=None,
+                   experience=[{'company': 'Quinbay', 'role': 'Intern', 'responsibilities': None}])
+    write_resume(path, relaxed, bump=1)
+    compiled, changed = loader.reload()
+    assert changed and loader.last_error is None
+    assert ('interests:general', "General interests: Sailing, Chess") in compiled.chunks
+    assert not any(chunk_id.startswith('project:') for chunk_id, _ in compiled.chunks)
+    assert compiled.answer("what are your hobbies?") == "I'm into Sailing and Chess."
+
+
+def test_chatbot_serves_reloaded_resume(tmp_path):
+    from chatbot import chatbot
+
+    path = str(tmp_path / 'resume.yaml')
+    write_resume(path, RESUME)
+    original = chatbot.resume_loader
+    chatbot.resume_loader = ResumeLoader(path, check_interval=0, on_swap=chatbot.install_resume,
+                                         swap_lock=chatbot.qa_lock)
+    try:
+        chatbot.resume_loader.load()
+        chatbot.install_resume(chatbot.compiled_resume)
+        chatbot.answer_cache.set("what is your favourite boat?", "A canoe")
+
+        write_resume(path, dict(RESUME, projects=[{'name': 'Harborlight', 'description': 'Lighthouse tracker'}]),
+                     bump=1)
+        compiled, changed = chatbot.reload_resume()
+        assert changed and chatbot.compiled_resume is compiled
+        assert chatbot.get_resume_response("tell me about harborlight").startswith("**Harborlight**")
+        assert "Lighthouse tracker" in chatbot.build_ai_prompt("what is harborlight?")
+        assert "Rahify" not in chatbot.build_ai_prompt("what is rahify?")
+        assert chatbot.answer_cache.get("what is your favourite boat?") is None
+    finally:
+        chatbot.resume_loader = original
+        chatbot.install_resume(original.current)
@@ -1,5 +1,4 @@
 from chatbot import chatbot
-if chatbot.firebase_db:
-    docs = chatbot.firebase_db.collection('learned_qa').stream()
-    for doc in docs:
-        print(doc.id, doc.to_dict().get('answer')[:30])
+if chatbot.qa_store:
+    for qa_id, qa_data in chatbot.qa_store.load_all().items():
+        print(qa_id, qa_data.get('answer')[:30])
@@ -0,0 +1,64 @@
+from intent_router import IntentRouter, KeywordAutomaton, name_variants
+
+RESUME = {
+    'personal': {'name': "Ada", 'email': "ada@example.com", 'github': "github.com/ada"},
+    'keywords': ["Java", "JavaScript", "C++", "Node.js"],
+    'skills': {'frameworks': ["React", "Supabase (PostgreSQL)"]},
+    'personal_facts': {'current_pets': "Two cats", 'favorite_food': "Dosa"},
+    'projects': [{'name': "Lighthouse", 'description': "A harbour light tracker", 'technologies': ["React"]}],
+    'experience': [{'company': "Quinbay Technologies", 'role': "SDE Intern", 'duration': "2023"}],
+}
+
+
+def test_automaton_matches_whole_words_only():
+    automaton = KeywordAutomaton([(keyword, keyword) for keyword in ("java", "javascript", "script", "c++", "node.js")])
+    found = [(start, keyword) for start, _, keyword, _ in automaton.find("javascript, java or c++ on node.js?")]
+    # "java" and "script" inside "javascript" are not words of their own
+    assert found == [(0, "javascript"), (12, "java"), (20, "c++"), (27, "node.js")]
+    assert list(automaton.find("javas scripting")) == []
+    assert [keyword for _, _, keyword, _ in automaton.find("java")] == ["java"]
+
+
+def test_routes_by_whole_word():
+    router = IntentRouter(RESUME)
+    # The old substring check answered JavaScript questions with the Java reply
+    assert router.route("do you know javascript?")[0] == "tech:JavaScript"
+    assert router.route("do you know java?")[0] == "tech:Java"
+    assert router.route("any pets?")[0] == "personal_facts:current_pets"
+    assert router.route("competitive?")[0] is None
+    assert router.route("your emails?")[0] is None
+    assert router.route("your email?")[0] == "email"
+    assert router.route("favourite food?")[0] == "personal_facts:favorite_food"
+    assert router.route("worked at quinbay?")[0] == "company:Quinbay Technologies"
+    assert router.route("used postgresql?")[0] == "tech:Supabase (PostgreSQL)"
+
+
+def test_definitions_of_technologies_go_to_the_ai():
+    router = IntentRouter(RESUME)
+    assert router.route("what is react") == (None, 0)
+    assert router.route("what is react?", threshold=0) == (None, 0)
+    assert router.route("explain node.js")[0] is None
+    assert router.answer("what is java") is None
+    assert router.route("have you worked with react?")[0] == "tech:React"
+    assert router.answer("do you use react").startswith("Yes! React is part of my toolkit")
+
+
+def test_specific_matches_beat_sections_and_long_questions_go_to_the_ai():
+    router = IntentRouter(RESUME)
+    assert router.route("projects with react")[0] == "tech:React"
+    assert router.route("your projects")[0] == "projects"
+    question = "could you walk me through how you have used react to build an app for millions of users"
+    assert router.route(question) == (None, 0)
+    assert router.route(question, threshold=0)[0] == "tech:React"
+
+
+def test_answers_are_rendered_once():
+    router = IntentRouter(RESUME)
+    calls = []
+    render = router.renderers['email']
+    router.renderers['email'] = lambda: calls.append(1) or render()
+    assert router.answer("email?") == "You can reach me at ada@example.com"
+    assert router.answer("your email") == "You can reach me at ada@example.com"
+    assert calls == [1] and router.answer("what is the weather like on mars today?") is None
+    assert name_variants("Supabase (PostgreSQL)") == ["supabase (postgresql)", "supabase", "postgresql"]
+    assert name_variants("Node.js") == ["node.js", "node"]
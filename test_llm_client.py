@@ -0,0 +1,145 @@
+import asyncio
+import time
+
+from groq_stub import GroqStub
+from llm_client import GroqClient, AsyncGroqClient, CircuitBreaker, LLMError, CircuitOpenError
+
+PAYLOAD = {'model': 'llama-3.3-70b-versatile', 'messages': [{'role': 'system', 'content': 'hello'}]}
+
+
+def make_client(stub, **kwargs):
+    kwargs.setdefault('backoff_base', 0.01)
+    return GroqClient('test-key', base_url=stub.url, **kwargs)
+
+
+def test_reuses_connection():
+    with GroqStub() as stub:
+        client = make_client(stub)
+        for _ in range(5):
+            body = client.chat(PAYLOAD)
+            assert body['choices'][0]['message']['content'] == stub.answer
+        assert len(stub.requests) == 5
+        assert len(stub.client_ports) == 1
+        assert client.stats()['calls'] == 5
+        assert client.last_latency is not None
+
+
+def test_retries_transient_errors():
+    with GroqStub() as stub:
+        stub.failures = [503, 502]
+        client = make_client(stub, max_retries=2)
+        body = client.chat(PAYLOAD)
+        assert body['choices'][0]['message']['content'] == stub.answer
+        assert len(stub.requests) == 3
+        assert client.stats()['retries'] == 2
+
+
+def test_respects_retry_after():
+    with GroqStub() as stub:
+        stub.failures = [429]
+        stub.retry_after = 0.3
+        client = make_client(stub)
+        started = time.monotonic()
+        client.chat(PAYLOAD)
+        assert time.monotonic() - started >= 0.3
+
+
+def test_does_not_retry_client_errors():
+    with GroqStub() as stub:
+        stub.failures = [401]
+        client = make_client(stub)
+        try:
+            client.chat(PAYLOAD)
+            assert False, "expected LLMError"
+        except LLMError as e:
+            assert e.status_code == 401
+        assert len(stub.requests) == 1
+
+
+def test_circuit_breaker_fails_fast():
+    with GroqStub() as stub:
+        stub.failures = [503] * 10
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        client = make_client(stub, max_retries=0, breaker=breaker)
+        for _ in range(2):
+            try:
+                client.chat(PAYLOAD)
+            except LLMError:
+                pass
+        sent = len(stub.requests)
+        try:
+            client.chat(PAYLOAD)
+            assert False, "expected CircuitOpenError"
+        except CircuitOpenError:
+            pass
+        assert len(stub.requests) == sent
+        assert client.stats()['circuit'] == CircuitBreaker.OPEN
+
+
+def test_circuit_breaker_half_open_recovers():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    assert not breaker.allow()
+    now[0] = 11
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_total_timeout_budget():
+    with GroqStub(latency=0.5) as stub:
+        client = make_client(stub, total_timeout=0.2, max_retries=3)
+        started = time.monotonic()
+        try:
+            client.chat(PAYLOAD)
+            assert False, "expected LLMError"
+        except LLMError:
+            pass
+        assert time.monotonic() - started < 0.5
+
+
+def test_stream_chat():
+    with GroqStub(answer="one two three") as stub:
+        client = make_client(stub)
+        tokens = list(client.stream_chat(PAYLOAD))
+        assert "".join(tokens) == "one two three"
+        assert stub.requests[-1]['stream'] is True
+
+
+def test_async_client_overlaps_slow_calls():
+    async def run(stub):
+        client = AsyncGroqClient('test-key', base_url=stub.url)
+        started = time.monotonic()
+        bodies = await asyncio.gather(*[client.chat(PAYLOAD) for _ in range(10)])
+        elapsed = time.monotonic() - started
+        await client.close()
+        return bodies, elapsed
+
+    with GroqStub(latency=0.3) as stub:
+        bodies, elapsed = asyncio.run(run(stub))
+        assert all(body['choices'][0]['message']['content'] == stub.answer for body in bodies)
+        assert elapsed < 1.5
+
+
+def test_async_client_retries_and_streams():
+    async def run(stub):
+        client = AsyncGroqClient('test-key', base_url=stub.url, backoff_base=0.01)
+        tokens = [token async for token in client.stream_chat(PAYLOAD)]
+        await client.close()
+        return tokens, client.stats()
+
+    with GroqStub(answer="one two three") as stub:
+        stub.failures = [503]
+        tokens, stats = asyncio.run(run(stub))
+        assert "".join(tokens) == "one two three"
+        assert stats['retries'] == 1
+        assert len(stub.requests) == 2
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,101 @@
+import pytest
+
+from app import app
+from metrics import ChatMetrics, Histogram, LatencyRecorder, MetricsRegistry, percentile
+
+
+def test_histogram_quantiles_interpolate_within_buckets():
+    histogram = Histogram('latency_seconds', "Latency", buckets=(0.1, 0.5, 1.0))
+    for value in (0.05, 0.05, 0.3, 0.7):
+        histogram.observe(value)
+    series = histogram.snapshot()[()]
+    assert series['buckets'] == [2, 3, 4, 4] and series['count'] == 4
+
+    # Same estimate as Prometheus' histogram_quantile() over these buckets
+    assert histogram.quantile(0.5, series['buckets'], 4) == pytest.approx(0.1)
+    assert histogram.quantile(0.75, series['buckets'], 4) == pytest.approx(0.5)
+    assert histogram.quantile(0.95, series['buckets'], 4) == pytest.approx(0.9)
+    assert histogram.quantile(0.5, [0, 0, 0, 0], 0) is None
+
+    summary = histogram.summary()[()]
+    assert summary['count'] == 4 and summary['mean'] == pytest.approx(275.0)
+    assert summary['p50'] == pytest.approx(100.0) and summary['p95'] == pytest.approx(900.0)
+
+    # Anything past the last bound only says "more than 1s"
+    histogram.observe(12.0)
+    histogram.observe(15.0)
+    series = histogram.snapshot()[()]
+    assert histogram.quantile(0.99, series['buckets'], series['count']) == 1.0
+
+
+def test_exposition_format():
+    registry = MetricsRegistry()
+    calls = registry.counter('groq_requests_total', "GROQ chat completions, by outcome")
+    seconds = registry.histogram('answer_seconds', "Time to answer", buckets=(0.1, 1.0))
+    assert registry.counter('groq_requests_total', "ignored") is calls
+
+    calls.inc(outcome='ok')
+    calls.inc(2, outcome='ok')
+    calls.inc(outcome='say "hi"\n')
+    seconds.observe(0.25, tier='ai')
+
+    assert registry.render().splitlines() == [
+        '# HELP groq_requests_total GROQ chat completions, by outcome',
+        '# TYPE groq_requests_total counter',
+        'groq_requests_total{outcome="ok"} 3',
+        'groq_requests_total{outcome="say \\"hi\\"\\n"} 1',
+        '# HELP answer_seconds Time to answer',
+        '# TYPE answer_seconds histogram',
+        'answer_seconds_bucket{tier="ai",le="0.1"} 0',
+        'answer_seconds_bucket{tier="ai",le="1"} 1',
+        'answer_seconds_bucket{tier="ai",le="+Inf"} 1',
+        'answer_seconds_sum{tier="ai"} 0.25',
+        'answer_seconds_count{tier="ai"} 1',
+    ]
+
+
+def test_chat_metrics_summary():
+    metrics = ChatMetrics()
+    metrics.answers.observe(0.002, tier='learned')
+    metrics.answers.observe(0.8, tier='ai')
+    metrics.answers.observe(1.2, tier='ai')
+    metrics.groq_calls.inc(outcome='ok')
+    metrics.groq_calls.inc(outcome='error')
+    metrics.groq_errors.inc(reason='timeout', model='fast')
+    metrics.groq_errors.inc(reason='timeout', model='smart')
+    metrics.record_usage({'prompt_tokens': 900, 'completion_tokens': 120})
+    metrics.record_usage(None)
+    with metrics.span('search'):
+        pass
+
+    summary = metrics.summary()
+    assert summary['answers']['ai']['count'] == 2
+    assert summary['answers']['ai']['ratio'] == pytest.approx(2 / 3)
+    assert summary['groq']['error_rate'] == 0.5 and summary['groq']['errors'] == {'timeout': 2}
+    assert (summary['groq']['prompt_tokens'], summary['groq']['completion_tokens']) == (900, 120)
+    assert summary['stages']['search']['count'] == 1
+
+
+def test_latency_recorder_keeps_a_window():
+    assert percentile([1, 2, 3, 4], 50) == 2 and percentile([], 50) is None
+    recorder = LatencyRecorder(window=3)
+    for seconds in (5.0, 0.001, 0.002, 0.003):
+        recorder.record('cache', seconds)
+    summary = recorder.summary()['cache']
+    assert summary['count'] == 4 and summary['p99'] == pytest.approx(3.0)
+
+
+def test_metrics_endpoint(monkeypatch):
+    client = app.test_client()
+    monkeypatch.setenv('METRICS_TOKEN', "scrape-me")
+    assert client.get("/metrics").status_code == 401
+
+    response = client.get("/metrics", headers={'Authorization': "Bearer scrape-me"})
+    assert response.status_code == 200
+    assert response.headers['Content-Type'].startswith("text/plain; version=0.0.4")
+    body = response.get_data(as_text=True)
+    assert "# TYPE chatbot_answer_seconds histogram\n" in body
+    assert "# TYPE groq_requests_total counter\n" in body
+
+    monkeypatch.delenv('METRICS_TOKEN')
+    assert client.get("/metrics").status_code == 200
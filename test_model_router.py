@@ -0,0 +1,156 @@
+import asyncio
+import threading
+import time
+
+from groq_stub import GroqStub
+from llm_client import AsyncGroqClient, GroqClient
+from model_router import FAST_MODEL, LARGE_MODEL, ModelRouter
+
+PAYLOAD = {'model': LARGE_MODEL, 'messages': [{'role': 'system', 'content': 'hello'}]}
+
+
+def two_models(stub, large_latency=0.0):
+    stub.models = {LARGE_MODEL: {'latency': large_latency, 'answer': "large answer"},
+                   FAST_MODEL: {'latency': 0.0, 'answer': "fast answer"}}
+
+
+def answer(body):
+    return body['choices'][0]['message']['content']
+
+
+def test_choose_uses_length_wording_and_match_scores():
+    router = ModelRouter()
+    assert router.choose("what's your favorite color and why do you like it?", intent_score=0.39) == (FAST_MODEL, 'intent')
+    assert router.choose("do you like cricket and watching matches live?", retrieval_score=6.2) == (FAST_MODEL, 'retrieval')
+    assert router.choose("tell me a joke") == (FAST_MODEL, 'short')
+    assert router.choose("write a python function to reverse a list", intent_score=0.22) == (LARGE_MODEL, 'task')
+    assert router.choose("how would you " + "really " * 20 + "scale it?")[1] == 'long'
+    assert router.choose("which harbor lantern compass would you pick today?") == (LARGE_MODEL, 'default')
+    assert ModelRouter(mode='large').choose("tell me a joke") == (LARGE_MODEL, 'forced')
+
+
+def test_slow_large_model_is_hedged_and_errors_fail_over():
+    router = ModelRouter(latency_budget=0.2)
+    with GroqStub() as stub:
+        client = GroqClient('test-key', base_url=stub.url, max_retries=0)
+        two_models(stub)
+        race = router.race(client.chat, PAYLOAD)
+        assert answer(race.result()) == "large answer" and race.hedged is None and len(stub.requests) == 1
+
+        two_models(stub, large_latency=2.0)
+        started = time.monotonic()
+        race = router.race(client.chat, PAYLOAD)
+        assert answer(race.result()) == "fast answer" and race.model == FAST_MODEL
+        assert race.hedged == 'budget' and time.monotonic() - started < 1.5
+
+        two_models(stub)
+        stub.failures = [503]
+        race = router.race(client.chat, PAYLOAD)
+        assert answer(race.result()) == "fast answer" and race.hedged == 'error'
+
+        # Streams race on the first token
+        two_models(stub, large_latency=2.0)
+        race = ModelRouter(first_token_budget=0.2).race(client.stream_chat, PAYLOAD, stream=True)
+        assert "".join(race) == "fast answer" and race.model == FAST_MODEL
+
+
+def test_async_race_cancels_the_slow_model():
+    async def run(stub):
+        client = AsyncGroqClient('test-key', base_url=stub.url, max_retries=0)
+        router = ModelRouter(latency_budget=0.2, first_token_budget=0.2)
+        chat = router.race_async(client.chat, PAYLOAD)
+        body = await chat.result()
+        stream = router.race_async(client.stream_chat, PAYLOAD, stream=True)
+        tokens = [token async for token in stream]
+        await client.close()
+        return answer(body), chat.model, "".join(tokens), stream.hedged
+
+    with GroqStub() as stub:
+        two_models(stub, large_latency=2.0)
+        started = time.monotonic()
+        assert asyncio.run(run(stub)) == ("fast answer", FAST_MODEL, "fast answer", 'budget')
+        assert time.monotonic() - started < 2.0
+
+
+def test_chatbot_routes_short_questions_to_the_fast_model(patch_chatbot):
+    from chatbot import chatbot
+
+    with GroqStub() as stub:
+        two_models(stub)
+        patch_chatbot(llm=GroqClient('test-key', base_url=stub.url), models=ModelRouter(metrics=chatbot.metrics))
+        fast = chatbot.get_response("Which lantern glows best?")
+        large = chatbot.get_response("Which harbor lantern compass would you pick for a long trip?")
+        assert fast.startswith("fast answer") and large.startswith("large answer")
+        assert [request['model'] for request in stub.requests] == [FAST_MODEL, LARGE_MODEL]
+        routes = chatbot.metrics.summary()['models']['routes']
+        assert routes[f"{FAST_MODEL} (short)"] >= 1 and routes[f"{LARGE_MODEL} (default)"] >= 1
+
+
+class ScriptedModels:
+    """start() for a race: the large model waits for `release`, the fast one answers at once"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.events = []
+
+    def chat(self, payload):
+        if payload['model'] == LARGE_MODEL:
+            self.release.wait(5)
+            self.events.append('large finished')
+        return {'choices': [{'message': {'content': f"{payload['model']} answer"}}]}
+
+    def stream_chat(self, payload):
+        try:
+            if payload['model'] == LARGE_MODEL:
+                self.release.wait(5)
+            for token in ("one ", "two"):
+                self.events.append(f"{payload['model']} sent {token.strip()}")
+                yield token
+        finally:
+            self.events.append(f"{payload['model']} closed")
+
+    async def chat_async(self, payload):
+        try:
+            if payload['model'] == LARGE_MODEL:
+                await asyncio.sleep(5)
+            return self.chat(payload)
+        except asyncio.CancelledError:
+            self.events.append(f"{payload['model']} cancelled")
+            raise
+
+
+def test_what_happens_to_the_losing_model():
+    router = ModelRouter(latency_budget=0.05, first_token_budget=0.05)
+    models = ScriptedModels()
+    race = router.race(models.chat, PAYLOAD)
+    assert answer(race.result()) == f"{FAST_MODEL} answer" and race.cancelled[0].is_set()
+    # A blocking chat can't be interrupted: it finishes in the background and its body is dropped
+    assert models.events == []
+    models.release.set()
+    deadline = time.monotonic() + 5
+    while not models.events and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)
+    assert models.events == ['large finished']
+    assert all(index == 1 for index, _, _ in race.results.queue)
+
+    # A losing stream is closed at its next token
+    models = ScriptedModels()
+    race = router.race(models.stream_chat, PAYLOAD, stream=True)
+    assert "".join(race) == "one two" and race.model == FAST_MODEL
+    models.release.set()
+    deadline = time.monotonic() + 5
+    while f"{LARGE_MODEL} closed" not in models.events and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [event for event in models.events if event.startswith(LARGE_MODEL)] == [
+        f"{LARGE_MODEL} sent one", f"{LARGE_MODEL} closed"]
+
+    # Async calls are cancelled outright
+    async def run():
+        models = ScriptedModels()
+        race = router.race_async(models.chat_async, PAYLOAD)
+        body = await race.result()
+        await asyncio.sleep(0)
+        return answer(body), models.events
+
+    assert asyncio.run(run()) == (f"{FAST_MODEL} answer", [f"{LARGE_MODEL} cancelled"])
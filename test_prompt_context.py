@@ -0,0 +1,48 @@
+from prompt_context import BM25Index, PromptContext, estimate_tokens
+
+RESUME = {
+    'projects': [
+        {'name': 'Rahify', 'description': 'AI travel planner with itineraries', 'technologies': ['React', 'FastAPI']},
+        {'name': 'Notepad', 'description': 'Shared notes app', 'technologies': ['Docker', 'Node.js']},
+    ],
+    'skills': {'cloud_and_tools': ['AWS', 'Docker'], 'frontend': ['React.js', 'Vue.js']},
+    'personal_facts': {'favorite_food': 'Biryani'},
+}
+
+
+def test_ranks_relevant_chunks_first():
+    context = PromptContext(RESUME)
+    selected = context.select("Have you shipped anything with Docker?")
+    assert set(selected[:2]) == {'resume:project:Notepad', 'resume:skills:cloud_and_tools'}
+    assert 'resume:fact:favorite_food' not in selected
+
+
+def test_falls_back_to_highlights_when_nothing_matches():
+    context = PromptContext(RESUME)
+    assert context.select("thoughts on pineapple pizza?") == context.default_ids
+
+
+def test_respects_token_budget():
+    learned = {f"q{i}": {'question': f"docker tip {i}", 'answer': "use multi-stage builds " * 20} for i in range(20)}
+    context = PromptContext(RESUME, learned, token_budget=120, max_pieces=8)
+    selected = context.select("any docker tips?")
+    assert sum(estimate_tokens(context.texts[doc_id]) for doc_id in selected) <= 120
+    assert selected
+
+
+def test_learned_pairs_update_incrementally():
+    context = PromptContext(RESUME)
+    context.add_qa('q1', {'question': "What is your kubernetes setup?", 'answer': "k3s on a homelab"})
+    assert context.select("kubernetes")[0] == 'qa:q1'
+    context.remove_qa('q1')
+    assert 'qa:q1' not in context.select("kubernetes")
+    assert 'kubernete' not in context.index.postings
+
+
+def test_bm25_prefers_rarer_terms():
+    index = BM25Index()
+    index.add('a', "react react react hooks")
+    index.add('b', "react redux")
+    index.add('c', "react vue")
+    assert index.search("redux")[0][1] == 'b'
+    assert [doc_id for _, doc_id in index.search("react hooks")][0] == 'a'
@@ -0,0 +1,80 @@
+import threading
+from datetime import datetime
+
+import pytest
+
+from fake_firestore import FakeFirestore
+from qa_counters import counter_delta, merge_deltas, read_counters, reconcile_counters, write_qa
+from qa_store import FirestoreStore
+
+NOW = datetime(2026, 1, 1, 12, 0)
+
+
+def pair(question, ai_generated=True, reviewed=False):
+    return {'question': question, 'answer': "an answer", 'ai_generated': ai_generated, 'reviewed': reviewed,
+            'created_at': NOW, 'updated_at': NOW}
+
+
+def counters(db):
+    return {field: value for field, value in db.collections['meta']['learned_qa_stats'].items()
+            if field in ('total', 'ai_generated', 'reviewed')}
+
+
+def test_counter_delta():
+    assert counter_delta(None, pair("q")) == {'total': 1, 'ai_generated': 1}
+    assert counter_delta(pair("q"), None) == {'total': -1, 'ai_generated': -1}
+    assert counter_delta(pair("q"), pair("q", reviewed=True)) == {'reviewed': 1}
+    assert counter_delta(pair("q"), pair("q", ai_generated=False, reviewed=True)) == {'ai_generated': -1,
+                                                                                       'reviewed': 1}
+    assert counter_delta(pair("q"), pair("other question")) == {}
+    assert counter_delta(None, None) == {}
+    assert merge_deltas([{'total': 1}, {'total': -1, 'reviewed': 1}, None]) == {'reviewed': 1}
+
+
+def test_write_qa_keeps_counters_in_step():
+    db = FakeFirestore()
+    write_qa(db, 'a', pair("a"))
+    write_qa(db, 'b', pair("b", ai_generated=False))
+    assert write_qa(db, 'a', {'reviewed': True}, op='update')['reviewed'] is True
+    # Saving a pair that already exists is not a second pair
+    write_qa(db, 'b', pair("b", ai_generated=False))
+    assert counters(db) == {'total': 2, 'ai_generated': 1, 'reviewed': 1}
+
+    write_qa(db, 'a', op='delete')
+    write_qa(db, 'a', op='delete')
+    with pytest.raises(KeyError):
+        write_qa(db, 'a', {'reviewed': False}, op='update')
+    assert 'a' not in db.collections['learned_qa']
+    assert counters(db) == {'total': 1, 'ai_generated': 0, 'reviewed': 0}
+
+
+def test_commit_counts_from_stored_documents():
+    db = FakeFirestore(latency=0.01)
+    store = FirestoreStore(db)
+    store.commit({'a': ('set', pair("a")), 'b': ('set', pair("b"))})
+
+    # Two workers saving the same new question, each believing it is new
+    workers = [threading.Thread(target=store.commit, args=({'c': ('set', pair("c"))},)) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert counters(db)['total'] == 3
+
+    # A pair deleted elsewhere: its update is skipped rather than counted again
+    store.write('b', op='delete')
+    assert store.commit({'b': ('update', {'reviewed': True}), 'a': ('update', {'reviewed': True})}) == {
+        'b': None, 'a': dict(pair("a"), reviewed=True)}
+    assert 'b' not in db.collections['learned_qa']
+    assert counters(db) == {'total': 2, 'ai_generated': 2, 'reviewed': 1}
+
+
+def test_reconcile_repairs_drifted_counters():
+    db = FakeFirestore()
+    db.load('learned_qa', {'a': pair("a", reviewed=True), 'b': pair("b"), 'c': pair("c", ai_generated=False)})
+    # No counters document yet: the first read computes it
+    assert read_counters(db) == {'total_qa': 3, 'ai_generated': 2, 'manual': 1, 'reviewed': 1, 'unreviewed': 2}
+
+    db.collections['meta']['learned_qa_stats']['total'] = 40
+    assert reconcile_counters(db)['total_qa'] == 3
+    assert counters(db) == {'total': 3, 'ai_generated': 2, 'reviewed': 1}
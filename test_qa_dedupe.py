@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+
+from fake_firestore import FakeFirestore
+from qa_dedupe import NearDuplicateIndex, compaction_plan, find_clusters, qa_id_for
+from qa_store import FirestoreStore, SQLiteStore
+from write_behind import WriteBehindQueue
+
+START = datetime(2026, 1, 1, 12, 0)
+
+
+def pair(question, minutes=0, ai_generated=True, reviewed=False):
+    updated = START + timedelta(minutes=minutes)
+    return {'question': question, 'answer': f"answer to {question}", 'ai_generated': ai_generated,
+            'reviewed': reviewed, 'created_at': updated, 'updated_at': updated}
+
+
+LEARNED = {
+    'a': pair("tell me about yourself", 1),
+    'b': pair("Tell me about urself!!", 2),
+    'c': pair("Tell me about yourself please", 3, ai_generated=False, reviewed=True),
+    'd': pair("What projects have you built with React?"),
+    'e': pair("What projects have you built with Vue?"),
+    'f': pair("what is your favourite food?"),
+    'g': pair("What is your favorite food"),
+}
+
+
+def test_finds_rewordings_but_not_different_questions():
+    index = NearDuplicateIndex()
+    index.rebuild(LEARNED)
+    assert index.find("where's ur favourite food??")[0] in ('f', 'g')
+    assert index.find("What projects have you built with Svelte?") == (None, 0.0)
+    assert sorted(sorted(ids) for ids in find_clusters(LEARNED)) == [['a', 'b', 'c'], ['f', 'g']]
+
+
+def test_compaction_keeps_reviewed_pair_and_rekeys(tmp_path):
+    store = SQLiteStore(str(tmp_path / "qa.db"))
+    store.commit({qa_id: ('set', data) for qa_id, data in LEARNED.items()})
+    writes, clusters = compaction_plan(store.load_all())
+    assert ('c', ['b', 'a']) in clusters
+
+    store.commit(writes)
+    after = store.load_all()
+    assert len(after) == 4
+    assert all(qa_id == qa_id_for(data['question']) for qa_id, data in after.items())
+    kept = after[qa_id_for("Tell me about yourself please")]
+    # "urself" expands to "yourself", so the two merged questions need only one alias
+    assert kept['reviewed'] and kept['aliases'] == ["Tell me about urself!!"]
+
+
+def test_ingest_saves_near_duplicates_as_aliases(patch_chatbot):
+    chatbot = patch_chatbot(qa_store=FirestoreStore(FakeFirestore()), qa_writer=None)
+    first = chatbot.save_learned_qa("What is your favourite lighthouse?", "The Fastnet Rock.")
+    second = chatbot.save_learned_qa("whats ur favorite lighthouse!!", "Another answer.")
+    assert first == second == qa_id_for("What is your favourite lighthouse?")
+    stored = chatbot.qa_store.get(first)
+    assert stored['answer'] == "The Fastnet Rock."
+    assert stored['aliases'] == ["whats ur favorite lighthouse!!"]
+    assert chatbot.search_learned_qa("what's your fav lighthouse")[0]['answer'] == "The Fastnet Rock."
+
+
+def test_alias_writes_keep_edits_made_elsewhere(patch_chatbot):
+    db = FakeFirestore()
+    store = FirestoreStore(db)
+    # Not started yet, so the pair and its first alias land in one batch
+    writer = WriteBehindQueue(store, flush_interval=0.05)
+    chatbot = patch_chatbot(qa_store=store, qa_writer=writer)
+    qa_id = qa_id_for("What is your favourite harbour?")
+    try:
+        chatbot.save_learned_qa("What is your favourite harbour?", "Cobh.")
+        chatbot.save_learned_qa("whats ur favorite harbour", "Another answer.")
+        writer.start()
+        assert writer.flush(5)
+        assert store.get(qa_id)['aliases'] == ["whats ur favorite harbour"]
+
+        # An admin edit on another worker that this one hasn't synced yet
+        store.write(qa_id, {'answer': "Cobh, in Cork.", 'reviewed': True}, op='update')
+        chatbot.save_learned_qa("What's ur favourite harbour?", "Stale answer.")
+        chatbot.save_learned_qa("what is your favorite harbor", "Stale answer.")
+        assert writer.flush(5)
+        stored = store.get(qa_id)
+        assert stored['answer'] == "Cobh, in Cork." and stored['reviewed'] is True
+        assert stored['aliases'] == ["whats ur favorite harbour", "what is your favorite harbor"]
+        assert db.collections['meta']['learned_qa_stats']['total'] == 1
+    finally:
+        writer.stop()
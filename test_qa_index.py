@@ -0,0 +1,73 @@
+import random
+from difflib import SequenceMatcher
+
+from qa_index import QAIndex
+
+WORDS = ("what how why when where do you your have is are did the a to in of for with about python react "
+         "project experience favorite work team build built learn use tools data design api cloud docker "
+         "database internship school hobby music travel language stack frontend backend career goal").split()
+
+
+def seeded_questions(seed, count, queries):
+    """Stored questions plus reworded, misspelt and unrelated queries against them"""
+    rng = random.Random(seed)
+
+    def question():
+        return " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 9)))
+
+    def reword(text):
+        words = text.split()
+        for _ in range(rng.randint(1, 3)):
+            i = rng.randrange(len(words))
+            roll = rng.random()
+            if roll < 0.4:
+                words[i] = rng.choice(WORDS)
+            elif roll < 0.6 and len(words) > 2:
+                del words[i]
+            elif roll < 0.8:
+                words.insert(i, rng.choice(WORDS))
+            elif len(words[i]) > 3:
+                j = rng.randrange(len(words[i]))
+                words[i] = words[i][:j] + words[i][j + 1:]
+        return " ".join(words)
+
+    stored = {f"q{i}": question() for i in range(count)}
+    ids = list(stored)
+    asked = [reword(stored[rng.choice(ids)]) if rng.random() < 0.8 else question() for _ in range(queries)]
+    asked += [stored[ids[0]], stored[ids[1]][:12]]
+    return stored, asked
+
+
+def best_score(question, texts):
+    """search_learned_qa's scoring: best score above 0.7 over the given questions"""
+    best = 0
+    for text in texts:
+        similarity = SequenceMatcher(None, question, text).ratio()
+        if question == text:
+            similarity = 1.0
+        elif question in text or text in question:
+            similarity += 0.3
+        if similarity > best and similarity > 0.7:
+            best = similarity
+    return best
+
+
+def test_shortlist_matches_a_full_scan():
+    stored, asked = seeded_questions(7, 400, 150)
+    capped, uncapped = QAIndex(), QAIndex(max_candidates=None)
+    for index in (capped, uncapped):
+        index.rebuild({qa_id: {'question': text} for qa_id, text in stored.items()})
+
+    for question in asked:
+        expected = best_score(question, stored.values())
+        assert best_score(question, [stored[qa_id] for qa_id in uncapped.candidates(question)]) == expected
+        assert best_score(question, [stored[qa_id] for qa_id in capped.candidates(question)]) == expected
+
+
+def test_uncapped_shortlist_keeps_every_pair_above_the_threshold():
+    stored, asked = seeded_questions(11, 200, 80)
+    index = QAIndex(max_candidates=None)
+    index.rebuild({qa_id: {'question': text} for qa_id, text in stored.items()})
+    for question in asked:
+        above = {qa_id for qa_id, text in stored.items() if best_score(question, [text])}
+        assert above <= index.candidates(question)
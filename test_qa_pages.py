@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+
+from fake_firestore import FakeFirestore
+from qa_pages import fetch_qa_page
+
+START = datetime(2026, 1, 1, 12, 0)
+
+
+def seeded_db(count=7):
+    db = FakeFirestore()
+    db.load('learned_qa', {
+        f"q{i}": {'question': f"question {chr(ord('a') + i)}", 'answer': f"answer {i}", 'ai_generated': i % 2 == 0,
+                  'reviewed': i % 3 == 0, 'created_at': START + timedelta(minutes=i),
+                  'updated_at': START + timedelta(minutes=i)}
+        for i in range(count)
+    })
+    return db
+
+
+def page_ids(page):
+    return [row['id'] for row in page['rows']], page['prev_cursor'], page['next_cursor']
+
+
+def test_pages_forward_newest_first():
+    db = seeded_db()
+    first = fetch_qa_page(db, page_size=3)
+    assert page_ids(first) == (['q6', 'q5', 'q4'], None, 'q4')
+    second = fetch_qa_page(db, after=first['next_cursor'], page_size=3)
+    assert page_ids(second) == (['q3', 'q2', 'q1'], 'q3', 'q1')
+    last = fetch_qa_page(db, after=second['next_cursor'], page_size=3)
+    assert page_ids(last) == (['q0'], 'q0', None)
+    # Each page reads the cursor document plus one page (and one row to see if there is more)
+    assert db.rpc_count == 5
+
+
+def test_prev_page_walks_back_to_the_same_rows():
+    db = seeded_db()
+    back = fetch_qa_page(db, before='q0', page_size=3)
+    assert page_ids(back) == (['q3', 'q2', 'q1'], 'q3', 'q1')
+    assert page_ids(fetch_qa_page(db, before=back['prev_cursor'], page_size=3)) == (['q6', 'q5', 'q4'], None, 'q4')
+
+    # A short first page going back still fills from the newest row
+    assert page_ids(fetch_qa_page(db, before='q5', page_size=3)) == (['q6'], None, 'q6')
+
+
+def test_filters_prefix_and_deleted_cursors():
+    db = seeded_db()
+    assert page_ids(fetch_qa_page(db, reviewed=True, page_size=2)) == (['q6', 'q3'], None, 'q3')
+    assert page_ids(fetch_qa_page(db, reviewed=True, after='q3', page_size=2)) == (['q0'], 'q0', None)
+    assert page_ids(fetch_qa_page(db, reviewed=False, ai_generated=True)) == (['q4', 'q2'], None, None)
+
+    # A search orders by question so the range filter can use it
+    db.load('learned_qa', {'x': {'question': "quest", 'created_at': START}})
+    by_prefix = fetch_qa_page(db, prefix="question ", page_size=4)
+    assert page_ids(by_prefix) == (['q0', 'q1', 'q2', 'q3'], None, 'q3')
+    assert page_ids(fetch_qa_page(db, prefix="question ", after='q3', page_size=4)) == (['q4', 'q5', 'q6'],
+                                                                                         'q4', None)
+    assert page_ids(fetch_qa_page(db, prefix="question ", before='q4', page_size=4))[0] == ['q0', 'q1', 'q2', 'q3']
+
+    # Someone deleted the row the cursor points at: start over
+    del db.collections['learned_qa']['q4']
+    assert page_ids(fetch_qa_page(db, after='q4', page_size=3)) == (['q6', 'q5', 'q3'], None, 'q3')
@@ -0,0 +1,27 @@
+from datetime import datetime, timezone
+
+from qa_record import QARecord
+
+
+def test_record_reads_like_the_store_dict():
+    data = {
+        'question': "What's your Favorite Stack?",
+        'answer': "Flask and React.",
+        'ai_generated': True,
+        'reviewed': False,
+        'created_at': datetime(2024, 5, 1, 12, 30, 15, 250, tzinfo=timezone.utc),
+        'updated_at': datetime(2024, 5, 2, 8, 0),
+        'aliases': ["whats ur fav stack"],
+    }
+    record = QARecord(data)
+    assert record == data and dict(record) == data and {**record} == data
+    assert record.text == "what's your favorite stack?"
+    assert record.get('reviewed') is False and record.get('missing') is None
+    assert record['updated_at'].tzinfo is None and record['created_at'].tzinfo is not None
+    assert dict(record, reviewed=True)['reviewed'] is True
+
+
+def test_missing_fields_stay_missing():
+    record = QARecord({'question': "Hi", 'answer': "Hello"})
+    assert 'created_at' not in record and len(record) == 4
+    assert record.get('ai_generated') is False
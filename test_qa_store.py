@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+from fake_firestore import FakeFirestore
+from qa_store import FirestoreStore, SQLiteStore, migrate
+
+START = datetime(2026, 1, 1, 12, 0)
+
+
+def pair(i, question=None, ai_generated=True, reviewed=False):
+    created = START + timedelta(minutes=i)
+    return {'question': question or f"question {i}", 'answer': f"answer {i}", 'ai_generated': ai_generated,
+            'reviewed': reviewed, 'created_at': created, 'updated_at': created}
+
+
+def test_sqlite_round_trip_and_counts(tmp_path):
+    store = SQLiteStore(str(tmp_path / "qa.db"))
+    assert store.connect().execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    store.write('a', dict(pair(1), source='import'))
+    store.commit({'b': ('set', pair(2, reviewed=True)), 'c': ('set', pair(3, ai_generated=False))})
+
+    assert store.get('a') == dict(pair(1), source='import')
+    assert store.write('a', {'reviewed': True}, op='update')['reviewed'] is True
+    store.write('c', op='delete')
+    assert store.get('c') is None
+    assert store.counts() == {'total_qa': 2, 'ai_generated': 2, 'manual': 0, 'reviewed': 2, 'unreviewed': 0}
+    assert set(store.changed_since(START + timedelta(minutes=1))) == {'b'}
+
+
+def test_sqlite_pages_and_searches(tmp_path):
+    store = SQLiteStore(str(tmp_path / "qa.db"))
+    store.commit({f"q{i}": ('set', pair(i)) for i in range(7)})
+    store.commit({'docker': ('set', pair(10, "Have you used Docker Compose?")),
+                  'k8s': ('set', pair(11, "What about dockerized Kubernetes?"))})
+
+    first = store.page(page_size=3)
+    assert [row['id'] for row in first['rows']] == ['k8s', 'docker', 'q6']
+    second = store.page(after=first['next_cursor'], page_size=3)
+    assert [row['id'] for row in second['rows']] == ['q5', 'q4', 'q3']
+    back = store.page(before=second['prev_cursor'], page_size=3)
+    assert back['rows'] == first['rows'] and back['prev_cursor'] is None
+
+    assert [row['id'] for row in store.page(prefix="dock")['rows']] == ['docker', 'k8s']
+    store.write('docker', {'question': "Have you used Podman?"}, op='update')
+    assert [row['id'] for row in store.page(prefix="dock")['rows']] == ['k8s']
+
+
+def test_migrates_between_backends(tmp_path):
+    db = FakeFirestore()
+    db.load('learned_qa', {f"q{i}": pair(i, reviewed=i % 2 == 0) for i in range(5)})
+    sqlite = SQLiteStore(str(tmp_path / "qa.db"))
+
+    assert migrate(FirestoreStore(db), sqlite, chunk_size=2) == 5
+    assert sqlite.load_all() == FirestoreStore(db).load_all()
+
+    target = FirestoreStore(FakeFirestore())
+    assert migrate(sqlite, target) == 5
+    assert target.counts()['reviewed'] == 3
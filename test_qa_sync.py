@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+
+from fake_firestore import FakeFirestore
+from qa_store import FirestoreStore, SQLiteStore
+from qa_sync import QASync
+
+START = datetime(2026, 1, 1, 12, 0)
+
+
+def pair(question, seconds=0):
+    stamp = START + timedelta(seconds=seconds)
+    return {'question': question, 'answer': f"answer to {question}", 'ai_generated': True, 'reviewed': False,
+            'created_at': stamp, 'updated_at': stamp}
+
+
+class Recorder:
+    """on_change/on_remove/on_load callbacks that keep what they were given"""
+
+    def __init__(self):
+        self.loaded = None
+        self.changes = []
+        self.removed = []
+
+    def sync(self, store, **options):
+        return QASync(store, on_change=lambda doc_id, data: self.changes.append((doc_id, data['answer'])),
+                      on_remove=self.removed.append, on_load=self.on_load, **options)
+
+    def on_load(self, docs):
+        self.loaded = dict(docs)
+
+
+def test_poll_applies_changes_and_late_commits():
+    db = FakeFirestore()
+    db.load('learned_qa', {'a': pair("a"), 'b': pair("b", 1)})
+    store = FirestoreStore(db)
+    recorder = Recorder()
+    sync = recorder.sync(store, mode='poll', poll_interval=3600, poll_margin=30)
+    try:
+        assert set(sync.start()) == {'a', 'b'} and set(recorder.loaded) == {'a', 'b'}
+
+        store.write('c', pair("c", 20))
+        store.write('a', dict(pair("a", 21), answer="edited"))
+        sync.poll_once()
+        assert sorted(recorder.changes) == [('a', "edited"), ('c', "answer to c")]
+
+        # Stamped before the newest pair this worker has seen, committed after it was polled
+        store.write('late', pair("late", 5))
+        sync.poll_once()
+        # Pairs already applied at the same updated_at are not applied again
+        assert recorder.changes[2:] == [('late', "answer to late")]
+        sync.poll_once()
+        assert len(recorder.changes) == 3
+    finally:
+        sync.stop()
+
+
+def test_poll_reconciles_deletions_and_very_late_commits():
+    db = FakeFirestore()
+    db.load('learned_qa', {'a': pair("a"), 'b': pair("b", 100)})
+    store = FirestoreStore(db)
+    recorder = Recorder()
+    sync = recorder.sync(store, mode='poll', poll_interval=3600, poll_margin=30)
+    try:
+        sync.start()
+        store.write('a', op='delete')
+        # Older than the overlap window: only the id reconcile finds it
+        store.write('stale', pair("stale", 10))
+        sync.poll_once()
+        assert recorder.changes == [] and recorder.removed == []
+
+        sync.poll_once(reconcile=True)
+        assert recorder.removed == ['a']
+        assert recorder.changes == [('stale', "answer to stale")]
+        assert sync.known_ids == {'b', 'stale'}
+    finally:
+        sync.stop()
+
+
+def test_listen_delivers_initial_load_then_changes():
+    db = FakeFirestore()
+    db.load('learned_qa', {'a': pair("a")})
+    store = FirestoreStore(db)
+    recorder = Recorder()
+    sync = recorder.sync(store, mode='listen', initial_timeout=1)
+    try:
+        assert set(sync.start()) == {'a'} and sync.mode == 'listen' and sync.thread is None
+        store.write('b', pair("b", 1))
+        store.write('a', {'answer': "edited"}, op='update')
+        store.write('b', op='delete')
+        assert recorder.changes == [('b', "answer to b"), ('a', "edited")]
+        assert recorder.removed == ['b'] and sync.applied == 3
+    finally:
+        sync.stop()
+    assert db.watches == []
+
+
+def test_listen_falls_back_to_polling_without_a_listener(tmp_path):
+    store = SQLiteStore(str(tmp_path / "qa.db"))
+    store.write('a', pair("a"))
+    recorder = Recorder()
+    sync = recorder.sync(store, mode='listen', poll_interval=3600)
+    try:
+        assert set(sync.start()) == {'a'} and sync.mode == 'poll'
+        store.write('b', pair("b", 1))
+        sync.poll_once()
+        assert recorder.changes == [('b', "answer to b")]
+    finally:
+        sync.stop()
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+import yaml
+
+from prompt_context import PromptContext
+from qa_dedupe import NearDuplicateIndex
+from qa_index import QAIndex
+from shared_snapshot import Snapshot, SnapshotCoordinator, shared_views, write_snapshot
+
+TOPICS = ["react", "django", "firebase", "docker", "postgres", "flask", "groq", "aws"]
+
+
+def make_pairs():
+    base = datetime(2024, 1, 1)
+    return {
+        f"p{i}": {
+            'question': f"how did you use {topic} in project {i}?",
+            'answer': f"I used {topic} for the {['backend', 'frontend', 'deploys'][i % 3]} of project {i}.",
+            'ai_generated': True,
+            'reviewed': False,
+            'created_at': base,
+            'updated_at': base + timedelta(minutes=i),
+            **({'aliases': [f"how did u use {topic} in project {i}"]} if i % 5 == 0 else {}),
+        }
+        for i, topic in enumerate(TOPICS * 4)
+    }
+
+
+def test_shared_views_match_in_memory_indexes(tmp_path):
+    with open('resume.yaml') as file:
+        resume = yaml.safe_load(file)
+    pairs = make_pairs()
+    write_snapshot(str(tmp_path / 'qa.snap'), pairs)
+    learned_qa, qa_index, near_duplicates, bm25, texts = shared_views(Snapshot(str(tmp_path / 'qa.snap')))
+    shared_context = PromptContext(resume, index=bm25, texts=texts)
+
+    memory_index, memory_duplicates = QAIndex(), NearDuplicateIndex()
+    memory_index.rebuild(pairs)
+    memory_duplicates.rebuild(pairs)
+    memory_context = PromptContext(resume, pairs)
+
+    # Local edits land in the layers on top of the snapshot
+    edited = dict(pairs['p3'], answer="Rewritten docker answer", updated_at=datetime(2025, 1, 1))
+    for qa, index, duplicates, context in ((pairs, memory_index, memory_duplicates, memory_context),
+                                           (learned_qa, qa_index, near_duplicates, shared_context)):
+        qa['p3'] = edited
+        index.add('p3', edited['question'])
+        duplicates.add('p3', edited)
+        context.add_qa('p3', edited)
+        del qa['p4']
+        index.remove('p4')
+        duplicates.remove('p4')
+        context.remove_qa('p4')
+
+    assert dict(learned_qa) == pairs and len(qa_index) == len(memory_index)
+    for question in ["how did you use docker in project 3?", "how did u use react in project 0",
+                     "how did you use postgres in project 4?", "rewritten docker answer"]:
+        assert qa_index.candidates(question) == memory_index.candidates(question)
+        assert near_duplicates.find(question) == memory_duplicates.find(question)
+        assert shared_context.render(question) == memory_context.render(question)
+
+
+def test_pending_keeps_changes_missing_from_a_new_snapshot(tmp_path):
+    path = str(tmp_path / 'qa.snap')
+    pairs = make_pairs()
+    write_snapshot(path, pairs)
+    learned_qa = shared_views(Snapshot(path))[0]
+    learned_qa['new'] = dict(pairs['p1'], question="brand new question", updated_at=datetime(2025, 1, 1))
+    del learned_qa['p2']
+
+    # Republished before seeing either change: both are replayed
+    assert learned_qa.pending(Snapshot(path)) == ([('new', learned_qa['new'])], ['p2'])
+    # Republished with them: nothing left to replay
+    pairs['new'] = learned_qa['new']
+    del pairs['p2']
+    write_snapshot(path, pairs, generation=2)
+    assert learned_qa.pending(Snapshot(path)) == ([], [])
+
+
+def test_one_publisher_and_followers_swap_to_new_files(tmp_path):
+    path = str(tmp_path / 'qa.snap')
+    swapped = []
+    publisher, follower = (SnapshotCoordinator(path, on_lead=None, on_swap=swapped.append, publish=None)
+                           for _ in range(2))
+    assert publisher.try_lead() and not follower.try_lead()
+
+    publisher.write(make_pairs())
+    follower.check()
+    publisher.write({})
+    follower.check()
+    follower.check()
+    assert [snapshot.generation for snapshot in swapped] == [1, 2]
+    assert swapped[-1].count == 0
@@ -0,0 +1,129 @@
+import os
+import threading
+import time
+
+from groq_stub import GroqStub
+from llm_client import GroqClient
+from single_flight import SingleFlight
+
+
+def run_together(count, func):
+    """Start `count` threads at the same moment and collect their results"""
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def worker(i):
+        barrier.wait()
+        results[i] = func(i)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def coalesced_call(flights, key, func):
+    flight, leader = flights.join(key)
+    if not leader:
+        result = flight.wait(5)
+        if result is not None:
+            return result
+    result = None
+    try:
+        result = func()
+    finally:
+        if leader:
+            flights.finish(flight, result)
+    return result
+
+
+def test_duplicates_share_one_call():
+    flights = SingleFlight()
+    calls = []
+
+    def generate():
+        calls.append(1)
+        time.sleep(0.2)
+        return "shared answer"
+
+    results = run_together(10, lambda i: coalesced_call(flights, "what is your tech stack", generate))
+    assert results == ["shared answer"] * 10
+    assert len(calls) == 1
+    assert flights.stats() == {'in_flight': 0, 'leaders': 1, 'joined': 9, 'shared': 0}
+
+
+def test_failed_leader_lets_waiters_retry():
+    flights = SingleFlight()
+    flight, leader = flights.join("q")
+    waiter, waiter_leads = flights.join("q")
+    assert leader and not waiter_leads
+    flights.finish(flight, None)
+    assert waiter.wait(1) is None
+    assert flights.join("q")[1]
+
+
+def test_workers_share_through_lock_dir(tmp_path):
+    # Two SingleFlight instances stand in for two gunicorn workers
+    first, second = SingleFlight(lock_dir=str(tmp_path)), SingleFlight(lock_dir=str(tmp_path))
+    calls = []
+
+    def generate():
+        calls.append(1)
+        time.sleep(0.3)
+        return "host answer"
+
+    results = run_together(2, lambda i: coalesced_call([first, second][i], "q", generate))
+    assert len(calls) == 1
+    assert results == ["host answer"] * 2
+    assert first.stats()['shared'] + second.stats()['shared'] == 1
+
+
+def test_chatbot_coalesces_identical_ai_questions(patch_chatbot):
+    with GroqStub(latency=0.3) as stub:
+        chatbot = patch_chatbot(llm=GroqClient('test-key', base_url=stub.url), flights=SingleFlight())
+        question = "Which harbor lantern compass would you pick?"
+        answers = run_together(8, lambda i: chatbot.get_response(question))
+        assert len(stub.requests) == 1
+        assert all(answer.startswith(stub.answer) for answer in answers)
+
+
+def age(path, seconds):
+    os.utime(path, (time.time() - seconds, time.time() - seconds))
+
+
+def test_sweep_only_removes_lock_files_nobody_holds(tmp_path):
+    flights = SingleFlight(lock_dir=str(tmp_path), wait_timeout=1, result_ttl=1)
+    flight, leader = flights.join("q")
+    lock_path = flights.path("q", '.lock')
+    orphan = tmp_path / "0123.json.1.2.tmp"
+    orphan.write_text("{")
+    age(lock_path, 60)
+    age(orphan, 60)
+
+    flights.sweep()
+    assert leader and os.path.exists(lock_path) and not orphan.exists()
+    flights.finish(flight, None)
+    age(lock_path, 60)
+    flights.sweep()
+    assert not os.path.exists(lock_path)
+
+
+def test_waiter_relocks_a_lock_file_unlinked_under_it(tmp_path):
+    first = SingleFlight(lock_dir=str(tmp_path), poll_interval=0.01)
+    second = SingleFlight(lock_dir=str(tmp_path), poll_interval=0.01)
+    flight, _ = first.join("q")
+    waiting = threading.Thread(target=second.join, args=("q",))
+    waiting.start()
+    time.sleep(0.1)
+
+    # The file the waiter opened is unlinked before the leader lets go of it
+    lock_path = first.path("q", '.lock')
+    os.remove(lock_path)
+    first.finish(flight, None)
+    waiting.join(2)
+
+    held = second.flights["q"].lock_file
+    assert os.path.samestat(os.fstat(held.fileno()), os.stat(lock_path))
+    second.finish(second.flights["q"], None)
@@ -0,0 +1,61 @@
+import os
+import pickle
+from datetime import datetime
+
+import yaml
+
+from compiled_resume import ResumeLoader
+from startup_snapshot import SNAPSHOT_VERSION, load_snapshot, resume_digest, save_snapshot
+
+RESUME = {'personal': {'name': "Ada", 'location': "Cork"}}
+
+
+class FirestoreDatetime(datetime):
+    """Stands in for Firestore's DatetimeWithNanoseconds"""
+
+
+def write_resume(path, resume):
+    with open(path, 'w') as file:
+        yaml.safe_dump(resume, file)
+    return resume_digest(path)
+
+
+def test_round_trip_and_unusable_snapshots(tmp_path):
+    path = str(tmp_path / 'snap.pickle')
+    stamp = FirestoreDatetime(2026, 1, 1, 12, 0)
+    assert save_snapshot(path, RESUME, "abc123", {'a': {'question': "q", 'created_at': stamp}})
+    assert os.listdir(tmp_path) == ['snap.pickle']
+
+    snapshot = load_snapshot(path)
+    assert snapshot['version'] == SNAPSHOT_VERSION and snapshot['resume'] == RESUME
+    assert snapshot['resume_digest'] == "abc123"
+    created = snapshot['learned_qa']['a']['created_at']
+    assert type(created) is datetime and created == stamp
+
+    assert load_snapshot(str(tmp_path / 'missing.pickle')) is None
+    with open(path, 'wb') as file:
+        pickle.dump(dict(snapshot, version=SNAPSHOT_VERSION + 1), file)
+    assert load_snapshot(path) is None
+    with open(path, 'wb') as file:
+        file.write(b"not a pickle")
+    assert load_snapshot(path) is None
+    # A write that fails is reported instead of raising
+    assert not save_snapshot(str(tmp_path / 'no-such-dir' / 'snap.pickle'), RESUME, "abc123", {})
+
+
+def test_snapshot_resume_is_used_only_while_its_digest_matches(tmp_path):
+    resume_path, snapshot_path = str(tmp_path / 'resume.yaml'), str(tmp_path / 'snap.pickle')
+    digest = write_resume(resume_path, RESUME)
+    assert resume_digest(str(tmp_path / 'missing.yaml')) is None
+
+    # A snapshot taken from this exact file is served without parsing it again
+    cached = dict(RESUME, personal={'name': "Ada", 'location': "From the snapshot"})
+    save_snapshot(snapshot_path, cached, digest, {})
+    loaded = ResumeLoader(resume_path).load(load_snapshot(snapshot_path))
+    assert loaded.digest == digest and loaded.answer("where are you based?") == "I'm based in From the snapshot"
+
+    # resume.yaml edited since: the stale snapshot resume is ignored
+    write_resume(resume_path, dict(RESUME, personal={'name': "Ada", 'location': "Galway"}))
+    loaded = ResumeLoader(resume_path).load(load_snapshot(snapshot_path))
+    assert loaded.digest == resume_digest(resume_path) != digest
+    assert loaded.answer("where are you based?") == "I'm based in Galway"
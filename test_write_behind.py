@@ -0,0 +1,115 @@
+import time
+
+import pytest
+
+from fake_firestore import FakeFirestore
+from qa_store import FirestoreStore
+from write_behind import WriteBehindQueue, coalesce
+
+
+def test_save_does_not_wait_for_firestore(patch_chatbot):
+    db = FakeFirestore(latency=0.3)
+    store = FirestoreStore(db)
+    writer = WriteBehindQueue(store, flush_interval=0.05).start()
+    chatbot = patch_chatbot(qa_store=store, qa_writer=writer)
+    try:
+        started = time.monotonic()
+        qa_id = chatbot.save_learned_qa("What is your favorite editor?", "VS Code and Cursor.")
+        elapsed = time.monotonic() - started
+
+        assert elapsed < 0.1
+        assert chatbot.learned_qa[qa_id]['answer'] == "VS Code and Cursor."
+        assert writer.flush(5)
+        assert db.collections['learned_qa'][qa_id]['answer'] == "VS Code and Cursor."
+    finally:
+        writer.stop()
+
+
+def test_coalesces_writes_into_batches():
+    db = FakeFirestore(latency=0.05)
+    writer = WriteBehindQueue(FirestoreStore(db), batch_size=50, flush_interval=0.05)
+    for i in range(20):
+        writer.enqueue(f"q{i}", {'question': f"q{i}", 'answer': 'a'})
+    writer.enqueue("q0", {'question': "q0", 'answer': 'latest'})
+    writer.start()
+    assert writer.flush(5)
+    writer.stop()
+
+    # One commit: 20 pairs plus the counters update
+    assert db.commits == [21]
+    assert db.collections['meta']['learned_qa_stats']['total'] == 20
+    assert db.collections['learned_qa']['q0']['answer'] == 'latest'
+    assert writer.stats()['committed'] == 20
+
+
+def test_coalesces_aliases_updates_and_deletes():
+    pair = {'question': "q", 'answer': "a", 'aliases': ["x"]}
+    assert coalesce(('set', pair), ('alias', {'aliases': ["y"], 'updated_at': 2})) == (
+        'set', dict(pair, aliases=["x", "y"], updated_at=2))
+    assert coalesce(('alias', {'aliases': ["x"]}), ('alias', {'aliases': ["y"]})) == ('alias', {'aliases': ["x", "y"]})
+    assert coalesce(('update', {'answer': "b"}), ('alias', {'aliases': ["y"]})) == (
+        'alias', {'answer': "b", 'aliases': ["y"]})
+    assert coalesce(('alias', {'aliases': ["y"]}), ('update', {'aliases': []})) == ('update', {'aliases': []})
+    assert coalesce(('delete', None), ('alias', {'aliases': ["y"]})) == ('delete', None)
+    assert coalesce(('alias', {'aliases': ["y"]}), ('delete', None)) == ('delete', None)
+
+
+def test_admin_writes_land_after_queued_saves(patch_chatbot):
+    db = FakeFirestore()
+    store = FirestoreStore(db)
+    # The first commit fails, so the AI save is still retrying when the admin acts
+    db.fail_commits = 1
+    writer = WriteBehindQueue(store, flush_interval=0.05, retry_backoff=0.3).start()
+    chatbot = patch_chatbot(qa_store=store, qa_writer=writer)
+    try:
+        qa_id = chatbot.save_learned_qa("What is your favorite ferry route?", "Dover to Calais.")
+        time.sleep(0.1)
+        assert chatbot.write_qa(qa_id, op='delete') is None
+        chatbot.forget_qa(qa_id)
+        assert writer.flush(5)
+        assert qa_id not in db.collections['learned_qa']
+        assert db.collections['meta']['learned_qa_stats']['total'] == 0
+
+        chatbot.save_learned_qa("What is your favorite ferry route?", "Dover to Calais.")
+        edited = chatbot.write_qa(qa_id, {'answer': "Holyhead to Dublin.", 'reviewed': True}, op='update')
+        assert edited['question'] == "What is your favorite ferry route?" and edited['reviewed'] is True
+        assert store.get(qa_id)['answer'] == "Holyhead to Dublin."
+        with pytest.raises(KeyError):
+            chatbot.write_qa("no-such-pair", {'reviewed': True}, op='update')
+    finally:
+        writer.stop()
+
+
+def test_retries_failed_commits():
+    db = FakeFirestore()
+    db.fail_commits = 2
+    writer = WriteBehindQueue(FirestoreStore(db), flush_interval=0.05, retry_backoff=0.01).start()
+    writer.enqueue("q1", {'question': "q1", 'answer': 'a'})
+    assert writer.flush(5)
+    writer.stop()
+
+    assert 'q1' in db.collections['learned_qa']
+    assert writer.stats()['failed'] == 0
+
+
+def test_bounded_queue_rejects_overflow():
+    writer = WriteBehindQueue(FirestoreStore(FakeFirestore()), max_queue=2)
+    assert writer.enqueue("a", {})
+    assert writer.enqueue("b", {})
+    assert not writer.enqueue("c", {})
+
+
+def test_stop_flushes_pending_writes():
+    db = FakeFirestore(latency=0.05)
+    writer = WriteBehindQueue(FirestoreStore(db), flush_interval=0.05).start()
+    for i in range(5):
+        writer.enqueue(f"q{i}", {'question': f"q{i}", 'answer': 'a'})
+    writer.stop()
+    assert len(db.collections['learned_qa']) == 5
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,181 @@
+"""Write-behind queue that persists learned Q&A pairs in batches.
+
+save_learned_qa updates the in-memory store immediately and hands the
+write to this queue, so the visitor never waits on a Firestore round trip.
+A background thread coalesces queued pairs into one commit at a time on the
+learned Q&A store (qa_store.py), retries failed commits and flushes what is
+left on shutdown. Admin edits go through the same queue with write(), which
+waits for the commit, so they always land after the writes queued before them.
+"""
+import atexit
+import queue
+import threading
+import time
+
+from qa_counters import pair_after
+from qa_dedupe import add_aliases
+
+# Firestore batches are limited to 500 operations
+MAX_BATCH_SIZE = 500
+
+
+def coalesce(previous, write):
+    """One (op, data) write with the effect of `previous` followed by `write`"""
+    op, data = write
+    if previous is None or op in ('set', 'delete'):
+        return write
+    previous_op, previous_data = previous
+    if previous_op == 'delete':
+        # Nothing left to update
+        return previous
+    if previous_op == 'set':
+        return 'set', pair_after(previous_data, op, data)
+    merged = {**previous_data, **data}
+    if op == 'update':
+        # An update that sets the aliases replaces the ones queued before it
+        return ('update' if previous_op == 'update' or 'aliases' in data else 'alias'), merged
+    merged['aliases'] = add_aliases(previous_data.get('aliases'), data.get('aliases'))
+    return ('update' if previous_op == 'update' and 'aliases' in previous_data else 'alias'), merged
+
+
+class PendingWrite:
+    """A queued write someone waits on; done once its batch commits or is dropped"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class WriteBehindQueue:
+    """Bounded queue of pending document writes drained by a daemon thread"""
+
+    def __init__(self, store, max_queue=1000, batch_size=50,
+                 flush_interval=0.5, max_retries=3, retry_backoff=0.5):
+        self.store = store
+        # Leave room in each batch for the counters update
+        self.batch_size = min(batch_size, MAX_BATCH_SIZE - 1)
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.thread = None
+        self.stopping = threading.Event()
+        self.committed = 0
+        self.commits = 0
+        self.failed = 0
+        self.stats_lock = threading.Lock()
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="qa-write-behind", daemon=True)
+            self.thread.start()
+            atexit.register(self.stop)
+        return self
+
+    def enqueue(self, doc_id, data, op='set'):
+        """Queue a write; returns False if the queue is full"""
+        try:
+            self.queue.put_nowait((op, doc_id, data, None))
+            return True
+        except queue.Full:
+            return False
+
+    def write(self, doc_id, data=None, op='set', timeout=30.0):
+        """Queue a write behind the pending ones and wait for it; returns the pair afterwards.
+
+        Raises KeyError when an update finds no pair, or the commit's error if
+        the batch was dropped.
+        """
+        pending = PendingWrite()
+        try:
+            self.queue.put((op, doc_id, data, pending), timeout=timeout)
+        except queue.Full:
+            raise TimeoutError("Q&A write queue is full") from None
+        if not pending.done.wait(timeout):
+            raise TimeoutError(f"Q&A write to {doc_id} not committed after {timeout:g}s")
+        if pending.error is not None:
+            raise pending.error
+        if pending.result is None and op != 'delete':
+            raise KeyError(f"Q&A pair {doc_id} not found")
+        return pending.result
+
+    def flush(self, timeout=10.0):
+        """Block until every queued write has been committed or dropped"""
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stop(self, timeout=10.0):
+        """Flush pending writes and stop the worker thread"""
+        if self.thread is None:
+            return
+        self.flush(timeout)
+        self.stopping.set()
+        self.thread.join(timeout)
+        self.thread = None
+
+    def stats(self):
+        with self.stats_lock:
+            return {
+                'pending': self.queue.qsize(),
+                'committed': self.committed,
+                'commits': self.commits,
+                'failed': self.failed,
+            }
+
+    # ==================== WORKER ====================
+
+    def run(self):
+        while not self.stopping.is_set():
+            try:
+                first = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            items = [first]
+            while len(items) < self.batch_size:
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self.commit(items)
+            finally:
+                for _ in items:
+                    self.queue.task_done()
+
+    def commit(self, items):
+        """Commit one batch, coalescing the writes to each document into one"""
+        latest = {}
+        for op, doc_id, data, _ in items:
+            latest[doc_id] = coalesce(latest.get(doc_id), (op, data))
+        waiting = [(doc_id, pending) for _, doc_id, _, pending in items if pending is not None]
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                results = self.store.commit(latest) or {}
+                with self.stats_lock:
+                    self.committed += len(latest)
+                    self.commits += 1
+                print(f"💾 Committed {len(latest)} Q&A write(s) to {self.store.label}")
+                for doc_id, pending in waiting:
+                    pending.result = results.get(doc_id)
+                    pending.done.set()
+                return True
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    with self.stats_lock:
+                        self.failed += len(latest)
+                    print(f"⚠️ Dropping {len(latest)} Q&A write(s) after {attempt + 1} attempts: {e}")
+                    for _, pending in waiting:
+                        pending.error = e
+                        pending.done.set()
+                    return False
+                print(f"⚠️ {self.store.label} batch commit failed, retrying: {e}")
+                time.sleep(self.retry_backoff * (2 ** attempt))